@@ -1,12 +1,19 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+import microservice_client
+from background import cancel_tasks, run_periodically
 from config import settings
-from database import engine, Base
-from models import HealthResponse
+from database import engine, Base, pool_status
+from partitioning import maintain_partitions
+from reaper import reap_stale_searches
+from retention import parse_rules, run_retention
+from metrics import db_checkout_timeouts, db_checkout_wait_seconds
+from models import HealthResponse, MetricsResponse, PoolMetrics
 from routes import search, results, update
 
 logging.basicConfig(
@@ -21,9 +28,30 @@ async def lifespan(app: FastAPI):
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created")
+    maintain_partitions(engine)
+
+    tasks = [asyncio.create_task(
+        run_periodically("stale-search reaper", settings.SEARCH_REAPER_INTERVAL_SECONDS, reap_stale_searches)
+    )]
+    if len(microservice_client.dispatcher.urls) > 1:
+        tasks.append(asyncio.create_task(
+            run_periodically(
+                "microservice health", settings.MICROSERVICE_HEALTH_INTERVAL_SECONDS, microservice_client.check_health
+            )
+        ))
+    if settings.DB_PARTITION_ROUTES:
+        tasks.append(asyncio.create_task(
+            run_periodically("partitions", 86400, lambda: maintain_partitions(engine))
+        ))
+    if settings.RETENTION_ENABLED:
+        parse_rules(settings.RETENTION_RULES)  # fail fast on bad configuration
+        tasks.append(asyncio.create_task(
+            run_periodically("retention", settings.RETENTION_INTERVAL_SECONDS, run_retention)
+        ))
     yield
 
     logger.info("Shutting down...")
+    await cancel_tasks(tasks)
 
 
 app = FastAPI(
@@ -46,6 +74,17 @@ async def health_check():
     return HealthResponse(status="healthy")
 
 
+@app.get("/metrics", response_model=MetricsResponse)
+async def metrics():
+    return MetricsResponse(
+        database=PoolMetrics(
+            **pool_status(),
+            checkout_wait_seconds=db_checkout_wait_seconds.summary(),
+            checkout_timeouts=db_checkout_timeouts.value,
+        )
+    )
+
+
 app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(results.router, prefix="/api", tags=["results"])
 app.include_router(update.router, prefix="/api", tags=["update"])
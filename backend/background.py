@@ -0,0 +1,27 @@
+import asyncio
+import logging
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+    """Run a blocking maintenance job in a worker thread every ``interval_seconds``.
+
+    Failures are logged and the loop carries on; the task only ends when cancelled.
+    """
+    logger.info(f"Starting background job '{name}' every {interval_seconds}s")
+    while True:
+        try:
+            await asyncio.to_thread(func)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Background job '{name}' failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def cancel_tasks(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
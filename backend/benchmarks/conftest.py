@@ -0,0 +1,52 @@
+import os
+import tempfile
+
+# Like the test suite, benchmarks never touch the configured database.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+)
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest
+
+from benchmarks.route_factory import RouteShape
+
+DEFAULT_SHAPES = "10x1x2,10x3x2,10x5x2,10x3x3,100x3x2"
+# Fractions of an ingested batch that another search already stored.
+DEFAULT_DUPLICATE_RATES = "0,0.1,0.3,0.6"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--route-shapes",
+        default=DEFAULT_SHAPES,
+        help="Comma-separated ROUTESxDEPTHxBRANCHING shapes to benchmark (default: %(default)s)",
+    )
+    parser.addoption(
+        "--duplicate-rates",
+        default=DEFAULT_DUPLICATE_RATES,
+        help="Comma-separated duplicate fractions for the dedup benchmarks (default: %(default)s)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "shape" in metafunc.fixturenames:
+        shapes = [RouteShape.parse(spec) for spec in metafunc.config.getoption("route_shapes").split(",")]
+        metafunc.parametrize("shape", shapes, ids=str)
+    if "duplicate_rate" in metafunc.fixturenames:
+        rates = [float(rate) for rate in metafunc.config.getoption("duplicate_rates").split(",")]
+        metafunc.parametrize("duplicate_rate", rates, ids=lambda rate: f"dup{rate:g}")
+
+
+@pytest.fixture
+def db():
+    import db_models  # noqa: F401 - registers the tables on Base.metadata
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
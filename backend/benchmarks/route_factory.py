@@ -0,0 +1,73 @@
+"""Generated routes of a chosen shape for benchmarks.
+
+A route of depth ``d`` and branching factor ``b`` is a full tree: the target
+is made from ``b`` precursors by one reaction, each precursor is made the same
+way, down to ``d`` levels of reactions. The leaves are starting materials, a
+``purchasable`` fraction of them with catalog entries. Such a route has
+``(b**(d+1) - 1) / (b - 1)`` molecules and ``(b**d - 1) / (b - 1)`` reactions
+(``d + 1`` molecules and ``d`` reactions for ``b = 1``).
+
+Routes are plain ``RouteData`` dicts. The module imports nothing from the
+backend so the microservice benchmarks can load it as well.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from retrosynthesis_search import RouteData
+
+CATALOGS = ["enamine", "molport", "sigma", "mcule", "chemspace"]
+
+
+@dataclass(frozen=True)
+class RouteShape:
+    routes: int
+    depth: int
+    branching: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "RouteShape":
+        """``ROUTESxDEPTHxBRANCHING``, e.g. ``100x3x2``."""
+        routes, depth, branching = (int(part) for part in spec.lower().split("x"))
+        return cls(routes, depth, branching)
+
+    def __str__(self) -> str:
+        return f"{self.routes}x{self.depth}x{self.branching}"
+
+
+def make_route(
+    depth: int, branching: int, purchasable: float = 0.7, rng: random.Random | None = None, prefix: str = ""
+) -> RouteData:
+    """One generated route; ``prefix`` goes in front of its reaction names to tell routes of one shape apart."""
+    rng = rng or random.Random(0)
+    molecules = []
+    reactions = []
+
+    def expand(smiles: str, level: int) -> None:
+        if level == depth:
+            entries = []
+            if rng.random() < purchasable:
+                entries.append({
+                    "vendor_id": f"V-{rng.randrange(10**6)}",
+                    "catalog_name": rng.choice(CATALOGS),
+                    "lead_time_weeks": float(rng.choice([0, 1, 2, 4, 8, 12])),
+                })
+            molecules.append({"smiles": smiles, "catalog_entries": entries})
+            return
+        molecules.append({"smiles": smiles, "catalog_entries": []})
+        sources = [f"{smiles}.{i}" for i in range(branching)]
+        reactions.append({"name": f"{prefix}R{len(reactions)}", "target": smiles, "sources": sources})
+        for source in sources:
+            expand(source, level + 1)
+
+    expand("T", 0)
+    return {"score": round(rng.random(), 4), "molecules": molecules, "reactions": reactions}
+
+
+def make_routes(shape: RouteShape, seed: int = 0) -> list[RouteData]:
+    """``shape.routes`` distinct routes (the backend would drop identical ones as duplicates)."""
+    rng = random.Random(seed)
+    return [make_route(shape.depth, shape.branching, rng=rng, prefix=f"{seed}.{i}:") for i in range(shape.routes)]
@@ -0,0 +1,68 @@
+"""Microbenchmarks for the backend's per-route hot paths.
+
+Each benchmark runs once per route shape (see ``--route-shapes`` in
+conftest.py), so comparing shapes gives the scaling curve of each path:
+
+    cd backend && pytest benchmarks --benchmark-group-by=func --benchmark-sort=name
+"""
+from benchmarks.route_factory import make_routes
+from db_models import Route as RouteDB, Search
+from models import SearchUpdate
+from retrosynthesis_search import SearchStatus, build_retrosynthesis_tree
+from route_mapping import route_data_options, route_to_data
+from routes.update import update_search
+
+
+def run(coroutine):
+    """Drive an endpoint coroutine that never actually suspends, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended; use asyncio.run instead")
+
+
+def new_search(db) -> str:
+    search = Search(smiles="T", status=SearchStatus.PENDING.value)
+    db.add(search)
+    db.commit()
+    return search.id
+
+
+def test_build_retrosynthesis_tree(benchmark, shape):
+    routes = make_routes(shape)
+
+    trees = benchmark(lambda: [build_retrosynthesis_tree(route) for route in routes])
+
+    assert len(trees) == shape.routes
+
+
+def test_update_search_ingest(benchmark, db, shape):
+    update = SearchUpdate(routes=make_routes(shape), is_complete=False)
+
+    search_ids = []
+
+    def setup():
+        search_ids.append(new_search(db))
+        return (search_ids[-1],), {}
+
+    result = benchmark.pedantic(lambda search_id: run(update_search(search_id, update, db)), setup=setup, rounds=10)
+
+    assert result.status == "ok"
+    # Every route is written, so this measures ingest rather than duplicate skipping.
+    assert db.query(RouteDB).filter(RouteDB.search_id == search_ids[-1]).count() == shape.routes
+
+
+def test_results_orm_mapping(benchmark, db, shape):
+    search_id = new_search(db)
+    run(update_search(search_id, SearchUpdate(routes=make_routes(shape), is_complete=True), db))
+
+    def load_and_map():
+        # Start from an empty identity map so every round loads the rows again.
+        db.expunge_all()
+        routes = db.query(RouteDB).filter(RouteDB.search_id == search_id).options(*route_data_options()).all()
+        return [route_to_data(route) for route in routes]
+
+    mapped = benchmark(load_and_map)
+
+    assert len(mapped) == shape.routes
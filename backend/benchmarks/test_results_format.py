@@ -0,0 +1,43 @@
+"""Payload size and encoding cost of the tree and DAG results formats.
+
+``extra_info`` records the JSON size of each format, raw and gzipped, for the
+route shape. Run with ``--benchmark-json`` to keep them, or see the printed
+table with ``-s``:
+
+    cd backend && pytest benchmarks/test_results_format.py -s --route-shapes 50x3x2,50x5x2
+"""
+import gzip
+import json
+
+import pytest
+
+from benchmarks.route_factory import make_routes
+from models import RetrosynthesisTree, SearchResultsDagResponse, SearchResultsResponse
+from retrosynthesis_search import build_retrosynthesis_tree, encode_routes_dag
+
+
+def payload_sizes(model) -> tuple[int, int]:
+    body = model.model_dump_json().encode()
+    return len(body), len(gzip.compress(body))
+
+
+def tree_response(trees) -> SearchResultsResponse:
+    return SearchResultsResponse(
+        search_id="s", total_routes=len(trees), routes=[RetrosynthesisTree(**tree) for tree in trees], cursor=0
+    )
+
+
+def dag_response(trees) -> SearchResultsDagResponse:
+    return SearchResultsDagResponse(search_id="s", total_routes=len(trees), cursor=0, **encode_routes_dag(trees))
+
+
+@pytest.mark.parametrize("make_response", [tree_response, dag_response], ids=["tree", "dag"])
+def test_results_payload(benchmark, shape, make_response):
+    trees = [build_retrosynthesis_tree(route) for route in make_routes(shape)]
+
+    response = benchmark(make_response, trees)
+
+    raw, compressed = payload_sizes(response)
+    benchmark.extra_info.update(json_bytes=raw, gzip_bytes=compressed)
+    print(f"\n{make_response.__name__:<14} {shape}: {raw:>9} bytes JSON, {compressed:>8} gzipped")
+    assert json.loads(response.model_dump_json())["total_routes"] == shape.routes
@@ -0,0 +1,55 @@
+"""Ingest cost and storage of route deduplication at a given duplicate rate.
+
+Each round ingests a batch into a new search where ``duplicate_rate`` of the
+routes were already stored by an earlier search, with body sharing on and
+off. ``extra_info`` records the molecule, catalog entry and reaction rows one
+ingest writes, so storage saved reads straight off a saved run:
+
+    cd backend && pytest benchmarks/test_route_dedup.py --duplicate-rates 0,0.3 --benchmark-save=dedup
+"""
+import itertools
+
+import pytest
+
+from benchmarks.route_factory import RouteShape, make_routes
+from benchmarks.test_hot_paths import new_search, run
+from config import settings
+from db_models import CatalogEntry, Reaction, RouteMolecule
+from models import SearchUpdate
+from routes.update import update_search
+
+SHAPE = RouteShape(50, 3, 2)
+
+
+def child_rows(db) -> int:
+    return db.query(RouteMolecule).count() + db.query(CatalogEntry).count() + db.query(Reaction).count()
+
+
+@pytest.mark.parametrize("share", [True, False], ids=["shared", "copied"])
+def test_ingest_with_duplicates(benchmark, db, monkeypatch, duplicate_rate, share):
+    monkeypatch.setattr(settings, "ROUTE_SHARE_BODIES", share)
+    earlier = make_routes(SHAPE, seed=0)
+    run(update_search(new_search(db), SearchUpdate(routes=earlier, is_complete=True), db))
+    duplicates = earlier[:int(SHAPE.routes * duplicate_rate)]
+    seeds = itertools.count(1)
+
+    def make_update() -> SearchUpdate:
+        # Fresh routes differ per round, so only `duplicates` can be shared.
+        fresh = make_routes(SHAPE, seed=next(seeds))[len(duplicates):]
+        return SearchUpdate(routes=duplicates + fresh, is_complete=False)
+
+    update = make_update()
+    before = child_rows(db)
+    run(update_search(new_search(db), update, db))
+    benchmark.extra_info["child_rows_per_ingest"] = child_rows(db) - before
+    benchmark.extra_info["child_rows_in_batch"] = sum(
+        len(route.molecules) + len(route.reactions) + sum(len(mol.catalog_entries) for mol in route.molecules)
+        for route in update.routes
+    )
+
+    def setup():
+        return (new_search(db), make_update()), {}
+
+    result = benchmark.pedantic(lambda search_id, update: run(update_search(search_id, update, db)), setup=setup, rounds=10)
+
+    assert result.status == "ok"
@@ -0,0 +1,36 @@
+"""Decoding cost of SearchUpdate callback bodies.
+
+``fastapi`` is FastAPI's default handling of a JSON body (Starlette's
+``json.loads`` followed by validation of the resulting dicts); ``bytes`` is
+the FAST_BODY_DECODING path, which validates straight from the raw body with a
+precompiled ``TypeAdapter``:
+
+    cd backend && pytest benchmarks/test_update_decoding.py --benchmark-group-by=param:shape
+"""
+import json
+
+import pytest
+from pydantic import TypeAdapter
+
+from benchmarks.route_factory import make_routes
+from models import SearchUpdate
+
+_ADAPTER = TypeAdapter(SearchUpdate)
+
+
+def fastapi(body: bytes) -> SearchUpdate:
+    return _ADAPTER.validate_python(json.loads(body), from_attributes=True)
+
+
+def from_bytes(body: bytes) -> SearchUpdate:
+    return _ADAPTER.validate_json(body)
+
+
+@pytest.mark.parametrize("decode", [fastapi, from_bytes], ids=["fastapi", "bytes"])
+def test_decode_update(benchmark, shape, decode):
+    body = json.dumps({"routes": make_routes(shape), "is_complete": False, "batch_index": 1}).encode()
+
+    update = benchmark(decode, body)
+
+    benchmark.extra_info["body_bytes"] = len(body)
+    assert len(update.routes) == shape.routes
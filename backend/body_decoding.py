@@ -0,0 +1,55 @@
+import json
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from config import settings
+
+
+class _PrevalidatedJSONRequest(Request):
+    """Request whose ``json()`` is the body already validated by ``adapter`` when it is valid.
+
+    FastAPI passes a model instance of the body's own type through its
+    validation unchanged, so a valid body is parsed and validated once, in
+    pydantic-core, without building the intermediate dicts. Anything else is
+    handed over as plain ``json.loads`` output, exactly as Starlette would,
+    and FastAPI validates and reports it as before.
+    """
+
+    def __init__(self, scope, receive, adapter: TypeAdapter):
+        super().__init__(scope, receive)
+        self._adapter = adapter
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            body = await self.body()
+            try:
+                self._json = self._adapter.validate_json(body)
+            except ValidationError:
+                self._json = json.loads(body)
+        return self._json
+
+
+class PrevalidatedBodyRoute(APIRoute):
+    """Route class that decodes a JSON model body straight from the raw bytes.
+
+    Used for large, hot request bodies (update callbacks). The validation
+    schema is compiled once per route. Only plain ``BaseModel`` bodies are
+    handled; other routes, and all routes when FAST_BODY_DECODING is off, go
+    through FastAPI's usual ``json.loads`` + validation.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        annotation = self.body_field.field_info.annotation if self.body_field is not None else None
+        if not (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+            return handler
+        adapter = TypeAdapter(annotation)
+
+        async def route_handler(request: Request) -> Response:
+            if settings.FAST_BODY_DECODING:
+                request = _PrevalidatedJSONRequest(request.scope, request.receive, adapter)
+            return await handler(request)
+
+        return route_handler
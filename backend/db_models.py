@@ -1,42 +1,107 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Float, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, String, Float, ForeignKey, DateTime, Boolean, Text, Integer, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
-import uuid
 
+from config import settings
 from database import Base
-from retrosynthesis_search import SearchStatus
+from ids import uuid7
+from retrosynthesis_search import SearchPriority, SearchStatus
+
+
+def _route_partition_args() -> dict:
+    # Route data is range-partitioned on its UUIDv7 primary key, whose leading
+    # bits are the owning search's creation time (see partitioning.py).
+    if settings.DB_PARTITION_ROUTES:
+        return {"postgresql_partition_by": "RANGE (id)"}
+    return {}
 
 
 class Search(Base):
     __tablename__ = "searches"
+    # Active-search counts per microservice instance, for least-outstanding
+    # dispatch, only read the rows of the active statuses.
+    __table_args__ = (Index("ix_searches_status_microservice", "status", "microservice_url"),)
 
-    id = Column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
     smiles = Column(String, nullable=False, index=True)
     status = Column(String, nullable=False, default=SearchStatus.PENDING.value)
+    priority = Column(String, nullable=False, default=SearchPriority.NORMAL.value)
+    tenant = Column(String, nullable=True, index=True)
+    # Top-K mode: only the best max_routes routes by score are kept.
+    max_routes = Column(Integer, nullable=True)
+    # Microservice instance the search was dispatched to (see dispatch.py).
+    microservice_url = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    archived_at = Column(DateTime(timezone=True), nullable=True)
+    archive_path = Column(String, nullable=True)
+    last_batch_index = Column(Integer, nullable=True)
+    # Number of routes ingested so far; each route's ingest_seq is its position
+    # in that sequence, so clients can ask for routes past a cursor.
+    ingest_cursor = Column(Integer, nullable=False, default=0)
+    # Summary of the stored routes, maintained by update_search in the same
+    # transaction as the routes themselves.
+    route_count = Column(Integer, nullable=False, default=0)
+    purchasable_route_count = Column(Integer, nullable=False, default=0)
+    best_score = Column(Float, nullable=True)
+    worst_score = Column(Float, nullable=True)
+    # Latest progress reported by the microservice, 0..1, how many batches it
+    # expects to send and when it expects to finish; written with the batch
+    # that carried them.
+    progress = Column(Float, nullable=True)
+    expected_batches = Column(Integer, nullable=True)
+    estimated_completion_at = Column(DateTime(timezone=True), nullable=True)
 
     routes = relationship("Route", back_populates="search", cascade="all, delete-orphan")
 
 
 class Route(Base):
     __tablename__ = "routes"
-
-    id = Column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Results are always scoped to one search, so every sortable feature is
+    # indexed together with search_id.
+    __table_args__ = (
+        Index("ix_routes_search_score", "search_id", "score"),
+        Index("ix_routes_search_step_count", "search_id", "step_count"),
+        Index("ix_routes_search_depth", "search_id", "depth"),
+        Index("ix_routes_search_purchasable_leaves", "search_id", "purchasable_leaf_count"),
+        Index("ix_routes_search_max_lead_time", "search_id", "max_lead_time_weeks"),
+        Index("ix_routes_search_ingest_seq", "search_id", "ingest_seq"),
+        Index("ix_routes_content_hash", "content_hash"),
+        _route_partition_args(),
+    )
+
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
     search_id = Column(UUID(as_uuid=False), ForeignKey("searches.id"), nullable=False, index=True)
     score = Column(Float, nullable=False, index=True)
+    ingest_seq = Column(Integer, nullable=True)
+    # route_hash.route_content_hash of the molecules and reactions. A route
+    # whose body is already stored for another search has no child rows of its
+    # own and points at the route that holds them.
+    content_hash = Column(String(64), nullable=True)
+    body_route_id = Column(UUID(as_uuid=False), ForeignKey("routes.id"), nullable=True)
+
+    # Precomputed at ingest by route_features.compute_route_features.
+    step_count = Column(Integer, nullable=True)
+    depth = Column(Integer, nullable=True)
+    leaf_count = Column(Integer, nullable=True)
+    purchasable_leaf_count = Column(Integer, nullable=True)
+    max_lead_time_weeks = Column(Float, nullable=True)
+    min_lead_time_weeks = Column(Float, nullable=True)
 
     search = relationship("Search", back_populates="routes")
+    body = relationship("Route", remote_side=[id])
     molecules = relationship("RouteMolecule", back_populates="route", cascade="all, delete-orphan")
     reactions = relationship("Reaction", back_populates="route", cascade="all, delete-orphan")
+    vendors = relationship("RouteVendor", back_populates="route", cascade="all, delete-orphan")
 
 
 class RouteMolecule(Base):
     __tablename__ = "route_molecules"
+    __table_args__ = _route_partition_args()
 
-    id = Column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
     route_id = Column(UUID(as_uuid=False), ForeignKey("routes.id"), nullable=False, index=True)
     smiles = Column(String, nullable=False, index=True)
     is_purchasable = Column(Boolean, nullable=False, default=False)
@@ -47,8 +112,9 @@ class RouteMolecule(Base):
 
 class CatalogEntry(Base):
     __tablename__ = "catalog_entries"
+    __table_args__ = _route_partition_args()
 
-    id = Column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
     molecule_id = Column(UUID(as_uuid=False), ForeignKey("route_molecules.id"), nullable=False, index=True)
     vendor_id = Column(String, nullable=False)
     catalog_name = Column(String, nullable=False)
@@ -59,11 +125,35 @@ class CatalogEntry(Base):
 
 class Reaction(Base):
     __tablename__ = "reactions"
+    __table_args__ = _route_partition_args()
 
-    id = Column(UUID(as_uuid=False), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
     route_id = Column(UUID(as_uuid=False), ForeignKey("routes.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     target = Column(String, nullable=False, index=True)
     sources = Column(Text, nullable=False)
 
     route = relationship("Route", back_populates="reactions")
+
+
+class RouteVendor(Base):
+    __tablename__ = "route_vendors"
+    __table_args__ = (
+        Index("ix_route_vendors_catalog_route", "catalog_name", "route_id"),
+        _route_partition_args(),
+    )
+
+    id = Column(UUID(as_uuid=False), primary_key=True, default=uuid7)
+    route_id = Column(UUID(as_uuid=False), ForeignKey("routes.id"), nullable=False, index=True)
+    catalog_name = Column(String, nullable=False)
+
+    route = relationship("Route", back_populates="vendors")
+
+
+class RateLimitBucket(Base):
+    """Token bucket state for the shared (``RATE_LIMIT_STORE=database``) rate limiter."""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
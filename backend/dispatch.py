@@ -0,0 +1,136 @@
+import bisect
+import hashlib
+import logging
+import time
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+LEAST_OUTSTANDING = "least_outstanding"
+CONSISTENT_HASH = "consistent_hash"
+STRATEGIES = (LEAST_OUTSTANDING, CONSISTENT_HASH)
+
+# Points per instance on the hash ring; enough to spread SMILES evenly over a
+# handful of instances and to move only ~1/n of them when one is added.
+_RING_REPLICAS = 100
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class Endpoint:
+    __slots__ = ("url", "healthy", "saturated_until")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.healthy = True
+        self.saturated_until = 0.0
+
+
+class Dispatcher:
+    """Picks the microservice instance for each new search.
+
+    ``least_outstanding`` prefers the instance with the fewest active searches
+    (counts come from the caller, who has them from the database);
+    ``consistent_hash`` places each SMILES on a hash ring so repeat targets
+    go to the same instance. Either way ``candidates`` returns the instances
+    in the order to try them, so a caller can fail over down the list.
+    Instances marked down sink to the end of the list until a health check
+    or a successful request brings them back; instances that answered 429
+    are left out until their Retry-After passes.
+    """
+
+    def __init__(self, urls: list[str], strategy: str = LEAST_OUTSTANDING):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown dispatch strategy '{strategy}'; expected one of {', '.join(STRATEGIES)}")
+        urls = list(dict.fromkeys(url.rstrip("/") for url in urls))
+        if not urls:
+            raise ValueError("At least one microservice URL is required")
+        self.strategy = strategy
+        self.endpoints = {url: Endpoint(url) for url in urls}
+        ring = sorted((_hash(f"{url}#{i}"), url) for url in urls for i in range(_RING_REPLICAS))
+        self._ring_keys = [key for key, _ in ring]
+        self._ring_urls = [url for _, url in ring]
+
+    @property
+    def urls(self) -> list[str]:
+        return list(self.endpoints)
+
+    @property
+    def uses_outstanding(self) -> bool:
+        """Whether ``candidates`` needs active-search counts to choose."""
+        return self.strategy == LEAST_OUTSTANDING and len(self.endpoints) > 1
+
+    def _ring_order(self, smiles: str) -> list[str]:
+        order: dict[str, None] = {}
+        start = bisect.bisect(self._ring_keys, _hash(smiles))
+        for i in range(len(self._ring_urls)):
+            order.setdefault(self._ring_urls[(start + i) % len(self._ring_urls)])
+            if len(order) == len(self.endpoints):
+                break
+        return list(order)
+
+    def candidates(self, smiles: str, outstanding: dict[str, int] | None = None) -> list[str]:
+        if self.strategy == CONSISTENT_HASH:
+            order = self._ring_order(smiles)
+        else:
+            # sorted() is stable, so ties go to instances in configured order.
+            outstanding = outstanding or {}
+            order = sorted(self.endpoints, key=lambda url: outstanding.get(url, 0))
+        now = time.monotonic()
+        available = [url for url in order if self.endpoints[url].saturated_until <= now]
+        return [url for url in available if self.endpoints[url].healthy] + [
+            url for url in available if not self.endpoints[url].healthy
+        ]
+
+    def assign(self, smiles: list[str], outstanding: dict[str, int] | None = None) -> list[list[str]]:
+        """``candidates`` for each of a batch of searches, counting earlier ones as outstanding."""
+        outstanding = dict(outstanding or {})
+        assigned = []
+        for target in smiles:
+            candidates = self.candidates(target, outstanding)
+            if candidates:
+                outstanding[candidates[0]] = outstanding.get(candidates[0], 0) + 1
+            assigned.append(candidates)
+        return assigned
+
+    def mark_up(self, url: str) -> None:
+        endpoint = self.endpoints[url]
+        if not endpoint.healthy:
+            logger.info(f"Microservice {url} is healthy again")
+        endpoint.healthy = True
+
+    def mark_down(self, url: str, reason: object) -> None:
+        endpoint = self.endpoints[url]
+        if endpoint.healthy:
+            logger.warning(f"Microservice {url} is unavailable: {reason}")
+        endpoint.healthy = False
+
+    def mark_saturated(self, url: str, retry_after: float) -> None:
+        self.endpoints[url].saturated_until = time.monotonic() + retry_after
+
+    def retry_after(self) -> float:
+        """Seconds until the first saturated instance may accept work again (0 if none is saturated)."""
+        now = time.monotonic()
+        waits = [e.saturated_until - now for e in self.endpoints.values() if e.saturated_until > now]
+        return min(waits, default=0.0)
+
+    def saturated_retry_after(self) -> float:
+        """``retry_after`` when every instance is saturated, else 0."""
+        now = time.monotonic()
+        if any(e.saturated_until <= now for e in self.endpoints.values()):
+            return 0.0
+        return self.retry_after()
+
+    def check_health(self, client: httpx.Client) -> None:
+        """Probe every instance's ``/health`` and mark it up or down accordingly."""
+        for url in self.endpoints:
+            try:
+                response = client.get(f"{url}/health")
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                self.mark_down(url, e)
+            else:
+                self.mark_up(url)
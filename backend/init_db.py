@@ -1,6 +1,8 @@
 from database import engine, Base
+from partitioning import ensure_partitions
 
 if __name__ == "__main__":
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_partitions(engine)
     print("Database tables created successfully!")
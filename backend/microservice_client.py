@@ -0,0 +1,193 @@
+import logging
+
+import httpx
+
+from config import settings
+from dispatch import Dispatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TENANT = "default"
+SATURATED_ERROR = "Microservice queue is saturated"
+
+# Instances are tried in the dispatcher's order. A request that never reached
+# an instance (refused connection, connect timeout) or that it answered with
+# one of these statuses is retried on the next one; any other failure may
+# have started the job, so it is not retried elsewhere.
+_UNAVAILABLE_STATUSES = (502, 503, 504)
+
+dispatcher = Dispatcher(settings.MICROSERVICE_URLS, settings.MICROSERVICE_DISPATCH)
+
+
+class MicroserviceSaturatedError(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"{SATURATED_ERROR}; retry after {retry_after:g}s")
+        self.retry_after = retry_after
+
+
+def saturated_retry_after() -> float:
+    """Seconds until some microservice instance may accept work again (0 if any is not saturated).
+
+    While every instance has told us it is saturated, new searches are turned
+    away without calling them (and without creating rows).
+    """
+    return dispatcher.saturated_retry_after()
+
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", "1"))
+    except ValueError:
+        return 1.0
+
+
+def check_health() -> None:
+    with httpx.Client(timeout=settings.MICROSERVICE_HEALTH_TIMEOUT_SECONDS) as client:
+        dispatcher.check_health(client)
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient()
+
+
+async def _post(
+    client: httpx.AsyncClient, endpoints: list[str], path: str, payload: dict, timeout: float
+) -> tuple[str, httpx.Response]:
+    """POST ``payload`` to the first of ``endpoints`` that takes it; returns that endpoint and its response."""
+    error: Exception | None = None
+    saturated = False
+    for url in endpoints:
+        try:
+            response = await client.post(f"{url}{path}", json=payload, timeout=timeout)
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            dispatcher.mark_down(url, e)
+            error = e
+            continue
+        if response.status_code == 429:
+            dispatcher.mark_saturated(url, _retry_after(response))
+            saturated = True
+            continue
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            if response.status_code not in _UNAVAILABLE_STATUSES:
+                raise
+            dispatcher.mark_down(url, e)
+            error = e
+            continue
+        dispatcher.mark_up(url)
+        return url, response
+    if saturated or error is None:
+        raise MicroserviceSaturatedError(dispatcher.retry_after() or 1.0)
+    raise error
+
+
+def callback_url(search_id: str) -> str:
+    return f"http://{settings.CALLBACK_HOST}:{settings.API_PORT}/api/search/{search_id}/update"
+
+
+def _search_request(search_id: str, smiles: str, priority: str, tenant: str | None) -> dict:
+    return {
+        "smiles": smiles,
+        "callback_url": callback_url(search_id),
+        "search_id": search_id,
+        "priority": priority,
+        "tenant": tenant or DEFAULT_TENANT,
+    }
+
+
+async def start_search(
+    search_id: str,
+    smiles: str,
+    priority: str = "normal",
+    tenant: str | None = None,
+    endpoints: list[str] | None = None,
+) -> str:
+    """Start ``search_id`` on the first of ``endpoints`` (default: the dispatcher's choice) that takes it.
+
+    Returns the URL of the instance now running the search.
+    """
+    async with _client() as client:
+        url, _ = await _post(
+            client,
+            endpoints if endpoints is not None else dispatcher.candidates(smiles),
+            "/start_search",
+            _search_request(search_id, smiles, priority, tenant),
+            timeout=5.0,
+        )
+    return url
+
+
+async def cancel_search(search_id: str, endpoint: str | None = None) -> None:
+    """Ask the microservice to stop working on ``search_id``; unknown jobs are fine.
+
+    Without the ``endpoint`` running it (searches started before it was
+    recorded) every instance is asked.
+    """
+    errors = []
+    async with _client() as client:
+        for url in [endpoint] if endpoint else dispatcher.urls:
+            try:
+                response = await client.delete(f"{url}/search/{search_id}", timeout=5.0)
+                if response.status_code != 404:
+                    response.raise_for_status()
+            except httpx.HTTPError as e:
+                errors.append(e)
+    if errors:
+        raise errors[0]
+
+
+async def start_search_batch(
+    searches: list[tuple[str, str]],
+    priority: str = "low",
+    tenant: str | None = None,
+    endpoints: list[list[str]] | None = None,
+) -> tuple[dict[str, str | None], dict[str, str]]:
+    """Dispatch ``(search_id, smiles)`` pairs, each to its ``endpoints`` (default: ``dispatcher.assign``).
+
+    Searches are grouped by their first-choice instance and sent in chunks
+    of MICROSERVICE_BATCH_SIZE; a chunk that instance cannot take fails over
+    as a whole. Returns an error message per search id, or None for searches
+    the microservice accepted, and the instance URL of each accepted search.
+    A chunk that fails as a whole marks each of its searches with the
+    failure, or with SATURATED_ERROR when every instance is saturated.
+    """
+    if endpoints is None:
+        endpoints = dispatcher.assign([smiles for _, smiles in searches])
+    groups: dict[str, list[tuple[tuple[str, str], list[str]]]] = {}
+    for search, candidates in zip(searches, endpoints):
+        groups.setdefault(candidates[0] if candidates else "", []).append((search, candidates))
+
+    errors: dict[str, str | None] = {}
+    accepted_by: dict[str, str] = {}
+    async with _client() as client:
+        for group in groups.values():
+            for start in range(0, len(group), settings.MICROSERVICE_BATCH_SIZE):
+                chunk = [search for search, _ in group[start:start + settings.MICROSERVICE_BATCH_SIZE]]
+                try:
+                    url, response = await _post(
+                        client,
+                        group[start][1],
+                        "/start_search/batch",
+                        {"searches": [
+                            _search_request(search_id, smiles, priority, tenant) for search_id, smiles in chunk
+                        ]},
+                        timeout=30.0,
+                    )
+                    results = response.json()["results"]
+                except MicroserviceSaturatedError:
+                    logger.warning(f"Microservice saturated; not starting a chunk of {len(chunk)} searches")
+                    errors.update((search_id, SATURATED_ERROR) for search_id, _ in chunk)
+                    continue
+                except Exception as e:
+                    logger.error(f"Failed to initiate microservice batch of {len(chunk)} searches: {e}")
+                    errors.update((search_id, str(e)) for search_id, _ in chunk)
+                    continue
+
+                for (search_id, _), result in zip(chunk, results):
+                    if result["status"] == "accepted":
+                        errors[search_id] = None
+                        accepted_by[search_id] = url
+                    else:
+                        errors[search_id] = result.get("error") or "rejected"
+    return errors, accepted_by
@@ -1,7 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel
+from enum import Enum
+from pydantic import BaseModel, Field
 
-from retrosynthesis_search import SearchStatus
+from retrosynthesis_search import SearchPriority, SearchStatus
 
 
 class CatalogEntry(BaseModel):
@@ -22,9 +23,52 @@ class MoleculeNode(BaseModel):
     reactions: list[ReactionNode]
 
 
+class RouteFeatures(BaseModel):
+    step_count: int
+    depth: int
+    leaf_count: int
+    purchasable_leaf_count: int
+    max_lead_time_weeks: float | None = None
+    min_lead_time_weeks: float | None = None
+    vendors: list[str]
+
+
 class RetrosynthesisTree(BaseModel):
     score: float
     root: MoleculeNode
+    features: RouteFeatures | None = None
+
+
+class DagMolecule(BaseModel):
+    smiles: str
+    catalog_entries: list[CatalogEntry]
+    is_purchasable: bool
+
+
+class DagReaction(BaseModel):
+    name: str
+    product: int
+    reactants: list[int]
+
+
+class DagRoute(BaseModel):
+    score: float
+    root: int
+    reactions: list[int]
+    features: RouteFeatures | None = None
+
+
+class ResultsFormat(str, Enum):
+    TREE = "tree"
+    DAG = "dag"
+
+
+class RouteSortKey(str, Enum):
+    SCORE = "score"
+    STEPS = "steps"
+    DEPTH = "depth"
+    LEAD_TIME = "lead_time"
+    PURCHASABLE_LEAVES = "purchasable_leaves"
 
 
 class Reaction(BaseModel):
@@ -58,23 +102,64 @@ class SearchUpdate(BaseModel):
     routes: list[Route]
     is_complete: bool = False
     error_message: str | None = None
+    # 1-based position of this batch; lets redelivered batches be ignored.
+    batch_index: int | None = None
+    # The microservice's estimate of how far the search is and how long is left.
+    progress: float | None = Field(None, ge=0, le=1)
+    expected_batches: int | None = Field(None, ge=1)
+    eta_seconds: float | None = Field(None, ge=0)
 
 
 class SearchCreateRequest(BaseModel):
     smiles: str
+    priority: SearchPriority = SearchPriority.NORMAL
+    # Searches are scheduled fairly across tenants; omitted means the shared default tenant.
+    tenant: str | None = None
+    # Keep only the best this many routes by score; omitted means SEARCH_DEFAULT_MAX_ROUTES.
+    max_routes: int | None = Field(None, ge=1)
 
 
 class SearchCreateResponse(BaseModel):
     id: str
 
 
+class SearchBatchCreateRequest(BaseModel):
+    smiles: list[str] = Field(min_length=1)
+    # Bulk submissions default to the low class so they do not starve interactive searches.
+    priority: SearchPriority = SearchPriority.LOW
+    tenant: str | None = None
+    max_routes: int | None = Field(None, ge=1)
+
+
+class SearchBatchItem(BaseModel):
+    id: str
+    smiles: str
+    status: SearchStatus
+    error_message: str | None = None
+
+
+class SearchBatchCreateResponse(BaseModel):
+    searches: list[SearchBatchItem]
+
+
 class SearchStatusResponse(BaseModel):
     id: str
     smiles: str
     status: SearchStatus
+    priority: SearchPriority = SearchPriority.NORMAL
+    tenant: str | None = None
+    max_routes: int | None = None
     created_at: str
     updated_at: str
     error_message: str | None = None
+    archived_at: str | None = None
+    route_count: int = 0
+    purchasable_route_count: int = 0
+    best_score: float | None = None
+    worst_score: float | None = None
+    progress: float | None = None
+    expected_batches: int | None = None
+    eta_seconds: float | None = None
 
 
 class UpdateResponse(BaseModel):
@@ -85,7 +170,43 @@ class SearchResultsResponse(BaseModel):
     search_id: str
     total_routes: int
     routes: list[RetrosynthesisTree]
+    # Pass back as ?since= to receive only routes ingested after this response.
+    cursor: int
+
+
+class SearchResultsDagResponse(BaseModel):
+    """Results with shared molecules and reactions; see encode_routes_dag."""
+    search_id: str
+    total_routes: int
+    molecules: list[DagMolecule]
+    reactions: list[DagReaction]
+    routes: list[DagRoute]
+    cursor: int
 
 
 class HealthResponse(BaseModel):
     status: str
+
+
+class LatencySummary(BaseModel):
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class PoolMetrics(BaseModel):
+    pool_class: str
+    size: int | None = None
+    checked_in: int | None = None
+    in_use: int | None = None
+    overflow: int | None = None
+    max_overflow: int | None = None
+    checkout_wait_seconds: LatencySummary
+    checkout_timeouts: int
+
+
+class MetricsResponse(BaseModel):
+    database: PoolMetrics
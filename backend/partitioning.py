@@ -0,0 +1,134 @@
+import logging
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from config import settings
+from ids import uuid7_lower_bound
+
+logger = logging.getLogger(__name__)
+
+# Parents before children: creation order. Drops run in reverse so no
+# partition is detached while rows in another partition still reference it.
+PARTITIONED_TABLES = ("routes", "route_molecules", "catalog_entries", "reactions", "route_vendors")
+
+_PARTITION_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def month_start(at: datetime) -> datetime:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return at.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + (month.month - 1) + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partitioning_enabled(bind: Engine) -> bool:
+    if not settings.DB_PARTITION_ROUTES:
+        return False
+    if bind.dialect.name != "postgresql":
+        logger.warning("DB_PARTITION_ROUTES is only supported on PostgreSQL; ignoring")
+        return False
+    return True
+
+
+def ensure_partitions(bind: Engine, now: datetime | None = None) -> list[str]:
+    """Create monthly partitions from last month through DB_PARTITION_MONTHS_AHEAD.
+
+    Each table also gets a default partition as a safety net for searches older
+    than the managed window.
+    """
+    if not partitioning_enabled(bind):
+        return []
+
+    first = add_months(month_start(now or datetime.now(timezone.utc)), -1)
+    created = []
+    with bind.begin() as conn:
+        for offset in range(settings.DB_PARTITION_MONTHS_AHEAD + 2):
+            month = add_months(first, offset)
+            lower = uuid7_lower_bound(month)
+            upper = uuid7_lower_bound(add_months(month, 1))
+            for table in PARTITIONED_TABLES:
+                name = partition_name(table, month)
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+                ))
+                created.append(name)
+        for table in PARTITIONED_TABLES:
+            conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+    return created
+
+
+def _monthly_partitions(conn, table: str) -> dict[datetime, str]:
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table"
+    ), {"table": table})
+    partitions = {}
+    for (name,) in rows:
+        match = _PARTITION_SUFFIX.search(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def drop_partitions_before(bind: Engine, cutoff: datetime) -> list[str]:
+    """Drop every monthly partition that ends on or before ``cutoff``.
+
+    Route data goes by detaching and dropping whole partitions, then the owning
+    searches are removed with a single set-based delete. No row-by-row ORM
+    cascade is involved.
+    """
+    if not partitioning_enabled(bind):
+        return []
+
+    cutoff_month = month_start(cutoff)
+    dropped = []
+    with bind.begin() as conn:
+        expired = sorted(
+            month for month in _monthly_partitions(conn, "routes") if month < cutoff_month
+        )
+        if not expired:
+            return []
+
+        for month in expired:
+            for table in reversed(PARTITIONED_TABLES):
+                name = partition_name(table, month)
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+
+        deleted = conn.execute(
+            text(
+                "DELETE FROM searches s WHERE s.created_at < :bound "
+                "AND NOT EXISTS (SELECT 1 FROM routes r WHERE r.search_id = s.id)"
+            ),
+            {"bound": add_months(expired[-1], 1)},
+        ).rowcount
+    logger.info(f"Dropped {len(dropped)} route partitions and {deleted} searches before {cutoff_month:%Y-%m}")
+    return dropped
+
+
+def apply_partition_retention(bind: Engine, now: datetime | None = None) -> list[str]:
+    if settings.DB_PARTITION_RETENTION_MONTHS <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -settings.DB_PARTITION_RETENTION_MONTHS)
+    return drop_partitions_before(bind, cutoff)
+
+
+def maintain_partitions(bind: Engine) -> None:
+    ensure_partitions(bind)
+    apply_partition_retention(bind)
@@ -0,0 +1,133 @@
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from database import SessionLocal
+from db_models import RateLimitBucket
+
+logger = logging.getLogger(__name__)
+
+
+def refill(tokens: float, updated_at: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class TokenBucketStore(ABC):
+    """Where token buckets live. ``take`` is the only operation a backend needs.
+
+    ``take`` removes ``cost`` tokens from the bucket ``key`` (``rate`` tokens
+    per second refill, at most ``capacity``) and returns 0 if that succeeded,
+    otherwise the number of seconds until enough tokens are available. A
+    shared store (database, Redis, ...) must do the read-modify-write
+    atomically.
+    """
+
+    @abstractmethod
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0, now: float | None = None) -> float:
+        ...
+
+
+class InMemoryTokenBucketStore(TokenBucketStore):
+    """Per-process buckets; the least recently used are evicted past ``max_keys``."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = refill(tokens, updated_at, now, rate, capacity)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            if not wait:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class DatabaseTokenBucketStore(TokenBucketStore):
+    """Buckets in the ``rate_limit_buckets`` table, shared by all backend processes.
+
+    Each ``take`` is one short transaction that locks the bucket row
+    (``SELECT ... FOR UPDATE`` on PostgreSQL).
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0, now: float | None = None) -> float:
+        now = time.time() if now is None else now
+        for _ in range(2):
+            db = self.session_factory()
+            try:
+                bucket = db.query(RateLimitBucket).filter(RateLimitBucket.key == key).with_for_update().first()
+                if bucket is None:
+                    bucket = RateLimitBucket(key=key, tokens=capacity, updated_at=now)
+                    db.add(bucket)
+                tokens = refill(bucket.tokens, bucket.updated_at, now, rate, capacity)
+                wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+                bucket.tokens = tokens - cost if not wait else tokens
+                bucket.updated_at = now
+                db.commit()
+                return wait
+            except IntegrityError:
+                # Another process created the bucket first; retry against its row.
+                db.rollback()
+            finally:
+                db.close()
+        raise RuntimeError(f"Could not update rate limit bucket {key}")
+
+
+def make_store(name: str) -> TokenBucketStore:
+    if name == "memory":
+        return InMemoryTokenBucketStore()
+    if name == "database":
+        return DatabaseTokenBucketStore()
+    raise ValueError(f"Unknown RATE_LIMIT_STORE {name!r}; expected 'memory' or 'database'")
+
+
+store: TokenBucketStore = make_store(settings.RATE_LIMIT_STORE)
+
+
+def client_key(request: Request) -> str:
+    api_key = request.headers.get(settings.RATE_LIMIT_KEY_HEADER)
+    if api_key:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class RateLimit:
+    """FastAPI dependency enforcing one token bucket per client for a class of endpoints."""
+
+    def __init__(self, scope: str, per_minute: float, burst: float):
+        self.scope = scope
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+
+    def __call__(self, request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        key = f"{self.scope}:{client_key(request)}"
+        wait = store.take(key, self.rate, self.capacity)
+        if wait:
+            logger.info(f"Rate limited {key} for {wait:.1f}s")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+limit_writes = RateLimit("write", settings.RATE_LIMIT_WRITE_PER_MINUTE, settings.RATE_LIMIT_WRITE_BURST)
+limit_reads = RateLimit("read", settings.RATE_LIMIT_READ_PER_MINUTE, settings.RATE_LIMIT_READ_BURST)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+import microservice_client
+from config import settings
+from database import SessionLocal
+from db_models import Search
+from retrosynthesis_search import SearchStatus
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (SearchStatus.PENDING.value, SearchStatus.IN_PROGRESS.value)
+
+
+async def _cancel_jobs(searches: list[tuple[str, str | None]]) -> None:
+    results = await asyncio.gather(
+        *(microservice_client.cancel_search(search_id, url) for search_id, url in searches), return_exceptions=True
+    )
+    for (search_id, _), result in zip(searches, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to cancel microservice job for reaped search {search_id}: {result}")
+
+
+def reap_stale_searches(now: datetime | None = None) -> int:
+    """Fail in-progress searches that have not heard from the microservice in SEARCH_STALE_AFTER_SECONDS.
+
+    The microservice resumes interrupted jobs on its own, so this only catches
+    searches whose job was lost for good (e.g. its job store was wiped).
+    Pending searches are left alone: their job may just be waiting in the
+    microservice's queue. Reaped searches reject further updates with 410,
+    and their jobs are cancelled in case they are still around.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=settings.SEARCH_STALE_AFTER_SECONDS)
+    stale = (Search.status == SearchStatus.IN_PROGRESS.value, Search.updated_at < cutoff)
+    db = SessionLocal()
+    try:
+        reaped = [
+            (search_id, url)
+            for search_id, url in db.query(Search.id, Search.microservice_url).filter(*stale).with_for_update()
+        ]
+        if reaped:
+            db.execute(
+                update(Search)
+                .where(Search.id.in_([search_id for search_id, _ in reaped]), *stale)
+                .values(
+                    status=SearchStatus.FAILED.value,
+                    error_message=f"Search timed out: no update from the microservice for "
+                                  f"{settings.SEARCH_STALE_AFTER_SECONDS:g} seconds",
+                )
+            )
+            db.commit()
+    finally:
+        db.close()
+    if reaped:
+        logger.warning(f"Marked {len(reaped)} stale searches as failed")
+        asyncio.run(_cancel_jobs(reaped))
+    return len(reaped)
@@ -0,0 +1,220 @@
+import gzip
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from config import settings
+from database import SessionLocal
+from db_models import (
+    Search,
+    Route as RouteDB,
+    RouteMolecule,
+    CatalogEntry as CatalogEntryDB,
+    Reaction as ReactionDB,
+    RouteVendor,
+)
+from retrosynthesis_search import RouteData, SearchStatus
+from route_mapping import route_data_options, route_to_data
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE = "archive"
+DELETE = "delete"
+
+
+@dataclass(frozen=True)
+class RetentionRule:
+    status: SearchStatus
+    max_age: timedelta
+    action: str
+
+
+def parse_rules(spec: str) -> list[RetentionRule]:
+    """Parse ``status:days:action`` rules, e.g. ``completed:30:archive,failed:7:delete``."""
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            status_name, days, action = item.split(":")
+            rule = RetentionRule(SearchStatus(status_name), timedelta(days=float(days)), action)
+        except ValueError as e:
+            raise ValueError(f"Invalid retention rule '{item}': {e}") from e
+        if rule.action not in (ARCHIVE, DELETE):
+            raise ValueError(f"Invalid retention action '{rule.action}' in rule '{item}'")
+        if rule.action == ARCHIVE and rule.status != SearchStatus.COMPLETED:
+            raise ValueError(f"Only completed searches can be archived: '{item}'")
+        rules.append(rule)
+    return rules
+
+
+def archive_path(search: Search) -> Path:
+    return Path(settings.RETENTION_ARCHIVE_DIR) / f"{search.created_at:%Y/%m}" / f"{search.id}.ndjson.gz"
+
+
+def write_archive(search: Search, routes: Iterator[RouteData]) -> Path:
+    """Write a search as gzipped NDJSON: one header line, then one route per line.
+
+    The file is written under a temporary name and renamed once fsync'd, so a
+    crash never leaves a truncated archive behind a valid path.
+    """
+    path = archive_path(search)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    header = {
+        "search_id": search.id,
+        "smiles": search.smiles,
+        "status": search.status,
+        "created_at": search.created_at.isoformat(),
+        "updated_at": search.updated_at.isoformat(),
+    }
+    with open(tmp_path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            for route in routes:
+                f.write(json.dumps(route, separators=(",", ":")).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_archive(path: str | Path) -> list[RouteData]:
+    with gzip.open(path, "rb") as f:
+        next(f)  # header
+        return [json.loads(line) for line in f]
+
+
+def _iter_route_data(db: Session, search_id: str, batch_size: int) -> Iterator[RouteData]:
+    last_id = None
+    while True:
+        # Load each chunk's molecules, catalog entries, reactions and shared
+        # bodies with a few IN queries rather than several per route.
+        query = db.query(RouteDB).filter(RouteDB.search_id == search_id).options(*route_data_options())
+        if last_id is not None:
+            query = query.filter(RouteDB.id > last_id)
+        batch = query.order_by(RouteDB.id).limit(batch_size).all()
+        if not batch:
+            return
+        for route in batch:
+            yield route_to_data(route)
+        last_id = batch[-1].id
+        db.expunge_all()
+
+
+def _hand_off_bodies(db: Session, route_ids: list[str]) -> None:
+    """Move shared route bodies held by ``route_ids`` to one of the routes still using them."""
+    heirs = db.query(RouteDB.body_route_id, func.min(RouteDB.id)).filter(
+        RouteDB.body_route_id.in_(route_ids),
+        RouteDB.id.notin_(route_ids),
+    ).group_by(RouteDB.body_route_id).all()
+    for holder_id, heir_id in heirs:
+        db.query(RouteMolecule).filter(RouteMolecule.route_id == holder_id).update(
+            {RouteMolecule.route_id: heir_id}, synchronize_session=False
+        )
+        db.query(ReactionDB).filter(ReactionDB.route_id == holder_id).update(
+            {ReactionDB.route_id: heir_id}, synchronize_session=False
+        )
+        db.query(RouteDB).filter(RouteDB.body_route_id == holder_id, RouteDB.id.notin_(route_ids)).update(
+            {RouteDB.body_route_id: heir_id}, synchronize_session=False
+        )
+        db.query(RouteDB).filter(RouteDB.id == heir_id).update(
+            {RouteDB.body_route_id: None}, synchronize_session=False
+        )
+
+
+def delete_routes(db: Session, route_ids: list[str]) -> None:
+    """Delete routes and their child rows with set-based statements, children first.
+
+    Bodies that routes of other searches share are handed to one of those
+    routes first, so only bodies nobody else uses are deleted.
+    """
+    _hand_off_bodies(db, route_ids)
+    molecule_ids = db.query(RouteMolecule.id).filter(RouteMolecule.route_id.in_(route_ids))
+    db.query(CatalogEntryDB).filter(CatalogEntryDB.molecule_id.in_(molecule_ids)).delete(synchronize_session=False)
+    db.query(RouteMolecule).filter(RouteMolecule.route_id.in_(route_ids)).delete(synchronize_session=False)
+    db.query(ReactionDB).filter(ReactionDB.route_id.in_(route_ids)).delete(synchronize_session=False)
+    db.query(RouteVendor).filter(RouteVendor.route_id.in_(route_ids)).delete(synchronize_session=False)
+    db.query(RouteDB).filter(RouteDB.id.in_(route_ids)).delete(synchronize_session=False)
+
+
+def delete_search_routes(db: Session, search_id: str, batch_size: int) -> int:
+    """Delete a search's routes in short transactions of ``batch_size`` routes.
+
+    Each chunk is selected through the ``routes.search_id`` index and committed
+    on its own, so locks are held briefly and ingest into hot searches is not
+    blocked behind one large cascading delete.
+    """
+    deleted = 0
+    while True:
+        route_ids = [
+            route_id for (route_id,) in
+            db.query(RouteDB.id).filter(RouteDB.search_id == search_id).limit(batch_size).all()
+        ]
+        if not route_ids:
+            return deleted
+        delete_routes(db, route_ids)
+        db.commit()
+        deleted += len(route_ids)
+        if settings.RETENTION_BATCH_PAUSE_SECONDS > 0:
+            time.sleep(settings.RETENTION_BATCH_PAUSE_SECONDS)
+
+
+def archive_search(db: Session, search: Search) -> Path:
+    path = write_archive(search, _iter_route_data(db, search.id, settings.RETENTION_BATCH_SIZE))
+    db.expunge_all()
+    search = db.query(Search).filter(Search.id == search.id).one()
+    # Mark archived before deleting so readers switch to the archive and never
+    # see a partially deleted route set.
+    search.archived_at = datetime.now(timezone.utc)
+    search.archive_path = str(path)
+    db.commit()
+    delete_search_routes(db, search.id, settings.RETENTION_BATCH_SIZE)
+    return path
+
+
+def apply_rule(db: Session, rule: RetentionRule, now: datetime, limit: int) -> int:
+    cutoff = now - rule.max_age
+    query = db.query(Search.id).filter(
+        Search.status == rule.status.value,
+        Search.updated_at < cutoff,
+    )
+    if rule.action == ARCHIVE:
+        query = query.filter(Search.archived_at.is_(None))
+    search_ids = [search_id for (search_id,) in query.order_by(Search.updated_at).limit(limit).all()]
+
+    for search_id in search_ids:
+        search = db.query(Search).filter(Search.id == search_id).one()
+        if rule.action == ARCHIVE:
+            path = archive_search(db, search)
+            logger.info(f"Archived search {search_id} to {path}")
+        else:
+            delete_search_routes(db, search_id, settings.RETENTION_BATCH_SIZE)
+            db.query(Search).filter(Search.id == search_id).delete(synchronize_session=False)
+            db.commit()
+            logger.info(f"Deleted search {search_id}")
+    return len(search_ids)
+
+
+def run_retention(now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    rules = parse_rules(settings.RETENTION_RULES)
+    processed = 0
+    db = SessionLocal()
+    try:
+        for rule in rules:
+            processed += apply_rule(db, rule, now, settings.RETENTION_MAX_SEARCHES_PER_RUN)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    if processed:
+        logger.info(f"Retention run processed {processed} searches")
+    return processed
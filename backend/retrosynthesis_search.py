@@ -1,15 +1,25 @@
 import uuid
 from collections import defaultdict
 from enum import Enum
-from typing import TypedDict
+from typing import TYPE_CHECKING, TypedDict
 from datetime import datetime, timezone
 
+if TYPE_CHECKING:
+    from route_intern import RouteInterner
+
 
 class SearchStatus(str, Enum):
     PENDING = "pending"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class SearchPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
 
 
 class SearchRequestData(TypedDict):
@@ -83,6 +93,30 @@ class RetrosynthesisTree(TypedDict):
     root: MoleculeNode
 
 
+class DagMolecule(TypedDict):
+    smiles: str
+    catalog_entries: list[CatalogEntryData]
+    is_purchasable: bool
+
+
+class DagReaction(TypedDict):
+    name: str
+    product: int
+    reactants: list[int]
+
+
+class DagRoute(TypedDict):
+    score: float
+    root: int
+    reactions: list[int]
+
+
+class RoutesDag(TypedDict):
+    molecules: list[DagMolecule]
+    reactions: list[DagReaction]
+    routes: list[DagRoute]
+
+
 def create_search_request(smiles: str) -> SearchRequestData:
     now = datetime.now(timezone.utc)
     return {
@@ -131,7 +165,12 @@ def update_search_progress(
     }
 
 
-def build_retrosynthesis_tree(route: RouteData) -> RetrosynthesisTree:
+def build_retrosynthesis_tree(route: RouteData, interner: "RouteInterner | None" = None) -> RetrosynthesisTree:
+    """Nest a route's reactions under its single root molecule.
+
+    With an ``interner``, starting-material nodes are shared with every other
+    tree built through it.
+    """
     molecule_map: dict[str, MoleculeData] = {m["smiles"]: m for m in route["molecules"]}
     reactions_by_target: dict[str, list[ReactionData]] = defaultdict(list)
     targets: set[str] = set()
@@ -161,6 +200,9 @@ def build_retrosynthesis_tree(route: RouteData) -> RetrosynthesisTree:
 
         visited.add(smiles)
 
+        if interner is not None and smiles not in reactions_by_target:
+            return interner.leaf(smiles, catalog_entries)
+
         reactions: list[ReactionNode] = [
             {
                 "name": r["name"],
@@ -182,3 +224,78 @@ def build_retrosynthesis_tree(route: RouteData) -> RetrosynthesisTree:
         "score": route["score"],
         "root": build_molecule_node(root_smiles, set()),
     }
+
+
+def encode_routes_dag(trees: list[RetrosynthesisTree]) -> RoutesDag:
+    """Encode trees with every distinct molecule node and reaction listed once.
+
+    Routes refer to ``molecules`` and ``reactions`` by index. A route's tree
+    is its ``root`` molecule expanded, recursively, with the route's reactions
+    whose ``product`` that molecule is, in the order they are listed.
+    """
+    molecules: list[DagMolecule] = []
+    molecule_index: dict[tuple, int] = {}
+    reactions: list[DagReaction] = []
+    reaction_index: dict[tuple, int] = {}
+    routes: list[DagRoute] = []
+
+    def add_molecule(node: MoleculeNode) -> int:
+        entries = tuple((e["vendor_id"], e["catalog_name"], e["lead_time_weeks"]) for e in node["catalog_entries"])
+        key = (node["smiles"], entries)
+        if key not in molecule_index:
+            molecule_index[key] = len(molecules)
+            molecules.append({
+                "smiles": node["smiles"],
+                "catalog_entries": node["catalog_entries"],
+                "is_purchasable": node["is_purchasable"],
+            })
+        return molecule_index[key]
+
+    for tree in trees:
+        route_reactions: list[int] = []
+        seen: set[int] = set()
+
+        def walk(node: MoleculeNode) -> int:
+            product = add_molecule(node)
+            for reaction in node["reactions"]:
+                reactants = [walk(child) for child in reaction["reactants"]]
+                key = (reaction["name"], product, tuple(reactants))
+                if key not in reaction_index:
+                    reaction_index[key] = len(reactions)
+                    reactions.append({"name": reaction["name"], "product": product, "reactants": reactants})
+                index = reaction_index[key]
+                # A molecule used twice in one route is expanded the same way both times.
+                if index not in seen:
+                    seen.add(index)
+                    route_reactions.append(index)
+            return product
+
+        root = walk(tree["root"])
+        routes.append({"score": tree["score"], "root": root, "reactions": route_reactions})
+
+    return {"molecules": molecules, "reactions": reactions, "routes": routes}
+
+
+def decode_routes_dag(dag: RoutesDag) -> list[RetrosynthesisTree]:
+    """Inverse of ``encode_routes_dag``."""
+    trees: list[RetrosynthesisTree] = []
+    for route in dag["routes"]:
+        by_product: dict[int, list[DagReaction]] = defaultdict(list)
+        for index in route["reactions"]:
+            reaction = dag["reactions"][index]
+            by_product[reaction["product"]].append(reaction)
+
+        def inflate(index: int) -> MoleculeNode:
+            molecule = dag["molecules"][index]
+            return {
+                "smiles": molecule["smiles"],
+                "catalog_entries": molecule["catalog_entries"],
+                "is_purchasable": molecule["is_purchasable"],
+                "reactions": [
+                    {"name": reaction["name"], "reactants": [inflate(r) for r in reaction["reactants"]]}
+                    for reaction in by_product[index]
+                ],
+            }
+
+        trees.append({"score": route["score"], "root": inflate(route["root"])})
+    return trees
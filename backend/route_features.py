@@ -0,0 +1,68 @@
+from typing import TypedDict
+
+from retrosynthesis_search import RouteData
+
+
+class RouteFeatures(TypedDict):
+    step_count: int
+    depth: int
+    leaf_count: int
+    purchasable_leaf_count: int
+    max_lead_time_weeks: float | None
+    min_lead_time_weeks: float | None
+    vendors: list[str]
+
+
+def compute_route_features(route: RouteData) -> RouteFeatures:
+    """Summarize a route for server-side filtering and ranking.
+
+    - ``step_count``: number of reactions.
+    - ``depth``: longest chain of reactions from any product down to a leaf.
+    - ``leaf_count`` / ``purchasable_leaf_count``: starting materials, i.e.
+      molecules that no reaction in the route produces, and those of them with
+      at least one catalog entry.
+    - ``max_lead_time_weeks``: time until every purchasable starting material
+      can be on hand, taking the fastest catalog entry for each.
+    - ``min_lead_time_weeks``: fastest lead time of any purchasable starting material.
+    - ``vendors``: sorted catalog names offering any molecule in the route.
+    """
+    catalog = {m["smiles"]: m["catalog_entries"] for m in route["molecules"]}
+    sources_by_target: dict[str, list[str]] = {}
+    nodes = set(catalog)
+    for reaction in route["reactions"]:
+        sources_by_target.setdefault(reaction["target"], []).extend(reaction["sources"])
+        nodes.add(reaction["target"])
+        nodes.update(reaction["sources"])
+
+    depths: dict[str, int] = {}
+
+    def depth_of(smiles: str, visiting: set[str]) -> int:
+        if smiles in depths:
+            return depths[smiles]
+        sources = sources_by_target.get(smiles)
+        if not sources or smiles in visiting:
+            return 0
+        visiting.add(smiles)
+        depth = 1 + max(depth_of(source, visiting) for source in sources)
+        visiting.discard(smiles)
+        depths[smiles] = depth
+        return depth
+
+    leaves = nodes - sources_by_target.keys()
+    leaf_lead_times = [
+        min(entry["lead_time_weeks"] for entry in catalog[smiles])
+        for smiles in leaves
+        if catalog.get(smiles)
+    ]
+
+    return {
+        "step_count": len(route["reactions"]),
+        "depth": max((depth_of(target, set()) for target in sources_by_target), default=0),
+        "leaf_count": len(leaves),
+        "purchasable_leaf_count": len(leaf_lead_times),
+        "max_lead_time_weeks": max(leaf_lead_times, default=None),
+        "min_lead_time_weeks": min(leaf_lead_times, default=None),
+        "vendors": sorted({
+            entry["catalog_name"] for entries in catalog.values() for entry in entries
+        }),
+    }
@@ -0,0 +1,29 @@
+import hashlib
+import json
+
+from retrosynthesis_search import RouteData
+
+
+def route_content_hash(route: RouteData) -> str:
+    """SHA-256 of a route's chemistry, independent of score and listing order.
+
+    Molecules (with their catalog entries) and reactions (with their sources)
+    are sorted before hashing, so the same route reported in a different order
+    or by a different search hashes the same.
+    """
+    molecules = sorted(
+        [
+            mol["smiles"],
+            sorted(
+                [entry["vendor_id"], entry["catalog_name"], float(entry["lead_time_weeks"])]
+                for entry in mol.get("catalog_entries", [])
+            ),
+        ]
+        for mol in route.get("molecules", [])
+    )
+    reactions = sorted(
+        [rxn["name"], rxn["target"], sorted(rxn["sources"])]
+        for rxn in route.get("reactions", [])
+    )
+    canonical = json.dumps({"molecules": molecules, "reactions": reactions}, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
@@ -0,0 +1,73 @@
+from retrosynthesis_search import CatalogEntryData, MoleculeNode, RouteData
+
+
+class RouteInterner:
+    """Per-request table that hands out one shared object per distinct route part.
+
+    Routes read from a request body or the database repeat the same building
+    blocks, but every occurrence arrives as its own strings and catalog entry
+    dicts. Passing them through one interner makes equal SMILES, names and
+    vendor ids a single string, equal catalog entry lists a single list, and
+    equal starting-material nodes a single tree node. The results are shared
+    between routes, so treat them as read-only.
+    """
+
+    __slots__ = ("_strings", "_entries", "_leaves")
+
+    def __init__(self):
+        self._strings: dict[str, str] = {}
+        self._entries: dict[tuple, list[CatalogEntryData]] = {}
+        self._leaves: dict[tuple[str, int], MoleculeNode] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def string(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def catalog_entries(self, entries: list[CatalogEntryData]) -> list[CatalogEntryData]:
+        key = tuple((e["vendor_id"], e["catalog_name"], e["lead_time_weeks"]) for e in entries)
+        shared = self._entries.get(key)
+        if shared is None:
+            shared = self._entries[key] = [
+                {
+                    "vendor_id": self.string(vendor_id),
+                    "catalog_name": self.string(catalog_name),
+                    "lead_time_weeks": lead_time_weeks,
+                }
+                for vendor_id, catalog_name, lead_time_weeks in key
+            ]
+        return shared
+
+    def route(self, route: RouteData) -> RouteData:
+        string = self.string
+        return {
+            "score": route["score"],
+            "molecules": [
+                {"smiles": string(mol["smiles"]), "catalog_entries": self.catalog_entries(mol.get("catalog_entries", []))}
+                for mol in route["molecules"]
+            ],
+            "reactions": [
+                {
+                    "name": string(rxn["name"]),
+                    "target": string(rxn["target"]),
+                    "sources": [string(source) for source in rxn["sources"]],
+                }
+                for rxn in route["reactions"]
+            ],
+        }
+
+    def leaf(self, smiles: str, catalog_entries: list[CatalogEntryData]) -> MoleculeNode:
+        """Tree node for a molecule no reaction in the route makes."""
+        entries = self.catalog_entries(catalog_entries)
+        # The interned entry list lives as long as the interner, so its id is a stable key.
+        key = (smiles, id(entries))
+        node = self._leaves.get(key)
+        if node is None:
+            node = self._leaves[key] = {
+                "smiles": self.string(smiles),
+                "catalog_entries": entries,
+                "is_purchasable": bool(entries),
+                "reactions": [],
+            }
+        return node
@@ -0,0 +1,55 @@
+import json
+
+from sqlalchemy.orm import selectinload
+
+from db_models import Route as RouteDB, RouteMolecule
+from retrosynthesis_search import RouteData
+from route_intern import RouteInterner
+
+
+def route_data_options() -> list:
+    """Eager loads for everything route_to_data reads, including shared bodies."""
+    return [
+        selectinload(RouteDB.molecules).selectinload(RouteMolecule.catalog_entries),
+        selectinload(RouteDB.reactions),
+        selectinload(RouteDB.vendors),
+        selectinload(RouteDB.body).selectinload(RouteDB.molecules).selectinload(RouteMolecule.catalog_entries),
+        selectinload(RouteDB.body).selectinload(RouteDB.reactions),
+    ]
+
+
+def route_to_data(route: RouteDB, interner: RouteInterner | None = None) -> RouteData:
+    # Deduplicated routes keep their molecules and reactions on another route.
+    body = route.body if route.body_route_id is not None else route
+
+    molecules_data = []
+    for mol in body.molecules:
+        molecules_data.append({
+            "smiles": mol.smiles,
+            "catalog_entries": [
+                {
+                    "vendor_id": ce.vendor_id,
+                    "catalog_name": ce.catalog_name,
+                    "lead_time_weeks": ce.lead_time_weeks,
+                }
+                for ce in mol.catalog_entries
+            ],
+        })
+
+    reactions_data = []
+    for reaction in body.reactions:
+        sources = json.loads(reaction.sources) if isinstance(reaction.sources, str) else reaction.sources
+        reactions_data.append({
+            "name": reaction.name,
+            "target": reaction.target,
+            "sources": sources,
+        })
+
+    data = {
+        "score": route.score,
+        "molecules": molecules_data,
+        "reactions": reactions_data,
+    }
+    # Every row comes back with its own copy of each string; intern them so
+    # routes that share building blocks share the objects too.
+    return interner.route(data) if interner is not None else data
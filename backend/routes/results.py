@@ -1,30 +1,154 @@
-import json
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session, Query as OrmQuery
+from sqlalchemy import asc, desc, or_, select
 
-from database import get_db
-from db_models import Search, Route as RouteDB
+from database import get_read_db
+from db_models import Search, Route as RouteDB, RouteVendor
 from models import (
+    DagRoute,
+    ResultsFormat,
+    SearchResultsDagResponse,
     SearchResultsResponse,
-    RetrosynthesisTree,
-    CatalogEntry as CatalogEntryModel,
+    RouteSortKey,
 )
-from retrosynthesis_search import build_retrosynthesis_tree, RouteData
+from rate_limit import limit_reads
+from retention import read_archive
+from retrosynthesis_search import build_retrosynthesis_tree, encode_routes_dag, RouteData
+from route_features import RouteFeatures, compute_route_features
+from route_intern import RouteInterner
+from route_mapping import route_data_options, route_to_data
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Column and direction for each sort key; ties always break on score, best first.
+_SORT_COLUMNS = {
+    RouteSortKey.SCORE: (RouteDB.score, desc),
+    RouteSortKey.STEPS: (RouteDB.step_count, asc),
+    RouteSortKey.DEPTH: (RouteDB.depth, asc),
+    RouteSortKey.LEAD_TIME: (RouteDB.max_lead_time_weeks, asc),
+    RouteSortKey.PURCHASABLE_LEAVES: (RouteDB.purchasable_leaf_count, desc),
+}
 
-@router.get("/search/{search_id}/results", response_model=SearchResultsResponse)
+_SORT_FEATURES = {
+    RouteSortKey.STEPS: ("step_count", 1),
+    RouteSortKey.DEPTH: ("depth", 1),
+    RouteSortKey.LEAD_TIME: ("max_lead_time_weeks", 1),
+    RouteSortKey.PURCHASABLE_LEAVES: ("purchasable_leaf_count", -1),
+}
+
+
+class RouteFilters:
+    def __init__(
+        self,
+        min_score: Optional[float] = None,
+        max_steps: Optional[int] = Query(None, ge=0, description="Maximum number of reactions"),
+        max_depth: Optional[int] = Query(None, ge=0, description="Maximum longest reaction chain"),
+        min_purchasable_leaves: Optional[int] = Query(None, ge=0),
+        fully_purchasable: bool = Query(False, description="Only routes whose starting materials are all purchasable"),
+        max_lead_time_weeks: Optional[float] = Query(None, ge=0),
+        vendor: Optional[list[str]] = Query(None, description="Only routes offered by any of these catalogs"),
+        sort_by: RouteSortKey = RouteSortKey.SCORE,
+        limit: Optional[int] = Query(None, ge=1, description="Return only the top routes after sorting"),
+    ):
+        self.min_score = min_score
+        self.max_steps = max_steps
+        self.max_depth = max_depth
+        self.min_purchasable_leaves = min_purchasable_leaves
+        self.fully_purchasable = fully_purchasable
+        self.max_lead_time_weeks = max_lead_time_weeks
+        self.vendors = vendor
+        self.sort_by = sort_by
+        self.limit = limit
+
+    def apply(self, query: OrmQuery) -> OrmQuery:
+        if self.min_score is not None:
+            query = query.filter(RouteDB.score >= self.min_score)
+        if self.max_steps is not None:
+            query = query.filter(RouteDB.step_count <= self.max_steps)
+        if self.max_depth is not None:
+            query = query.filter(RouteDB.depth <= self.max_depth)
+        if self.min_purchasable_leaves is not None:
+            query = query.filter(RouteDB.purchasable_leaf_count >= self.min_purchasable_leaves)
+        if self.fully_purchasable:
+            query = query.filter(RouteDB.purchasable_leaf_count == RouteDB.leaf_count)
+        if self.max_lead_time_weeks is not None:
+            query = query.filter(RouteDB.max_lead_time_weeks <= self.max_lead_time_weeks)
+        if self.vendors:
+            query = query.filter(RouteDB.id.in_(
+                select(RouteVendor.route_id).where(RouteVendor.catalog_name.in_(self.vendors))
+            ))
+
+        column, direction = _SORT_COLUMNS[self.sort_by]
+        query = query.order_by(direction(column).nulls_last(), desc(RouteDB.score))
+        if self.limit is not None:
+            query = query.limit(self.limit)
+        return query
+
+    def matches(self, score: float, features: RouteFeatures) -> bool:
+        checks = [
+            self.min_score is None or score >= self.min_score,
+            self.max_steps is None or features["step_count"] <= self.max_steps,
+            self.max_depth is None or features["depth"] <= self.max_depth,
+            self.min_purchasable_leaves is None or features["purchasable_leaf_count"] >= self.min_purchasable_leaves,
+            not self.fully_purchasable or features["purchasable_leaf_count"] == features["leaf_count"],
+            self.max_lead_time_weeks is None or (
+                features["max_lead_time_weeks"] is not None
+                and features["max_lead_time_weeks"] <= self.max_lead_time_weeks
+            ),
+            not self.vendors or bool(set(self.vendors) & set(features["vendors"])),
+        ]
+        return all(checks)
+
+    def select(self, routes: list[RouteData]) -> list[tuple[RouteData, RouteFeatures]]:
+        """Apply the same filtering, ordering and limit in memory (archived searches)."""
+        selected = [
+            (route, features)
+            for route in routes
+            if self.matches(route["score"], features := compute_route_features(route))
+        ]
+        selected.sort(key=lambda item: -item[0]["score"])
+        if self.sort_by in _SORT_FEATURES:
+            name, sign = _SORT_FEATURES[self.sort_by]
+            # NULLs sort last, matching nulls_last() on the SQL path.
+            selected.sort(key=lambda item: (item[1][name] is None, sign * (item[1][name] or 0)))
+        return selected[:self.limit] if self.limit is not None else selected
+
+
+def _stored_features(route: RouteDB) -> RouteFeatures | None:
+    if route.step_count is None:
+        return None
+    return {
+        "step_count": route.step_count,
+        "depth": route.depth,
+        "leaf_count": route.leaf_count,
+        "purchasable_leaf_count": route.purchasable_leaf_count,
+        "max_lead_time_weeks": route.max_lead_time_weeks,
+        "min_lead_time_weeks": route.min_lead_time_weeks,
+        "vendors": sorted(vendor.catalog_name for vendor in route.vendors),
+    }
+
+
+@router.get(
+    "/search/{search_id}/results",
+    response_model=SearchResultsResponse | SearchResultsDagResponse,
+    dependencies=[Depends(limit_reads)],
+)
 async def get_search_results(
     search_id: str,
-    min_score: Optional[float] = None,
-    db: Session = Depends(get_db)
+    filters: RouteFilters = Depends(),
+    since: Optional[int] = Query(
+        None, ge=0, description="Only routes ingested after this cursor from an earlier response"
+    ),
+    format: ResultsFormat = Query(
+        ResultsFormat.TREE, description="tree: nested trees; dag: shared molecule and reaction tables"
+    ),
+    db: Session = Depends(get_read_db)
 ):
     search = db.query(Search).filter(Search.id == search_id).first()
     if not search:
@@ -33,52 +157,67 @@ async def get_search_results(
             detail=f"Search {search_id} not found"
         )
 
-    query = db.query(RouteDB).filter(RouteDB.search_id == search_id)
-    if min_score is not None:
-        query = query.filter(RouteDB.score >= min_score)
-    routes = query.order_by(desc(RouteDB.score)).all()
+    # Read the cursor before the routes and bound the route query by it, so a
+    # batch committed in between is left for the next poll instead of being
+    # returned both now and again after ?since=cursor.
+    cursor = search.ingest_cursor or 0
+    interner = RouteInterner()
 
-    retrosynthesis_trees = []
-    for route in routes:
-        molecules_data = []
-        for mol in route.molecules:
-            catalog_entries_data = [
-                CatalogEntryModel(
-                    vendor_id=ce.vendor_id,
-                    catalog_name=ce.catalog_name,
-                    lead_time_weeks=ce.lead_time_weeks
-                )
-                for ce in mol.catalog_entries
-            ]
-            molecules_data.append({
-                "smiles": mol.smiles,
-                "catalog_entries": [ce.dict() for ce in catalog_entries_data]
-            })
-
-        reactions_data = []
-        for reaction in route.reactions:
-            sources = json.loads(reaction.sources) if isinstance(reaction.sources, str) else reaction.sources
-            reactions_data.append({
-                "name": reaction.name,
-                "target": reaction.target,
-                "sources": sources
-            })
-
-        route_data: RouteData = {
-            "score": route.score,
-            "molecules": molecules_data,
-            "reactions": reactions_data
-        }
+    if since is not None and since >= cursor:
+        selected = []
+    elif search.archived_at is not None:
+        # Archived searches are served straight from their archive file. They
+        # are complete, so a client behind the cursor simply gets everything.
+        try:
+            archived = filters.select([interner.route(route) for route in read_archive(search.archive_path)])
+        except OSError as e:
+            logger.error(f"Failed to read archive for search {search_id}: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Archived results for search {search_id} are unavailable"
+            )
+        selected = [(f"#{i}", route, features) for i, (route, features) in enumerate(archived)]
+    else:
+        query = db.query(RouteDB).filter(RouteDB.search_id == search_id).options(*route_data_options())
+        if since is not None:
+            query = query.filter(RouteDB.ingest_seq > since)
+        # Routes stored before ingest_seq existed have none and are always included.
+        query = query.filter(or_(RouteDB.ingest_seq <= cursor, RouteDB.ingest_seq.is_(None)))
+        routes = filters.apply(query).all()
+        selected = [(route.id, route_to_data(route, interner), _stored_features(route)) for route in routes]
 
+    retrosynthesis_trees = []
+    for label, route_data, features in selected:
         try:
-            tree = build_retrosynthesis_tree(route_data)
-            retrosynthesis_trees.append(RetrosynthesisTree(**tree))
+            tree = build_retrosynthesis_tree(route_data, interner)
+            if format == ResultsFormat.DAG:
+                retrosynthesis_trees.append((tree, features))
+            else:
+                retrosynthesis_trees.append({**tree, "features": features})
         except Exception as e:
-            logger.warning(f"Failed to build tree for route {route.id}: {e}")
+            logger.warning(f"Failed to build tree for route {label}: {e}")
             continue
 
-    return SearchResultsResponse(
-        search_id=search_id,
-        total_routes=len(retrosynthesis_trees),
-        routes=retrosynthesis_trees
-    )
+    if format == ResultsFormat.DAG:
+        dag = encode_routes_dag([tree for tree, _ in retrosynthesis_trees])
+        return SearchResultsDagResponse(
+            search_id=search_id,
+            total_routes=len(retrosynthesis_trees),
+            molecules=dag["molecules"],
+            reactions=dag["reactions"],
+            routes=[
+                DagRoute(**route, features=features)
+                for route, (_, features) in zip(dag["routes"], retrosynthesis_trees)
+            ],
+            cursor=cursor,
+        )
+
+    # The trees already have the RetrosynthesisTree shape. Serializing them as
+    # they are keeps the interned nodes shared; validating them into models
+    # would copy every node once per route.
+    return JSONResponse({
+        "search_id": search_id,
+        "total_routes": len(retrosynthesis_trees),
+        "routes": retrosynthesis_trees,
+        "cursor": cursor,
+    })
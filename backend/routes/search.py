@@ -1,54 +1,112 @@
 import logging
+import math
+from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, func, insert, update
 from sqlalchemy.orm import Session
 
-import httpx
+import microservice_client
 from config import settings
-from database import get_db
+from database import get_db, get_read_db, note_write
 from db_models import Search
+from ids import uuid7
+from rate_limit import limit_reads, limit_writes
+from reaper import ACTIVE_STATUSES
 from models import (
+    SearchBatchCreateRequest,
+    SearchBatchCreateResponse,
+    SearchBatchItem,
     SearchCreateRequest,
     SearchCreateResponse,
     SearchStatusResponse,
 )
-from retrosynthesis_search import SearchStatus
+from retrosynthesis_search import SearchPriority, SearchStatus
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/search", response_model=SearchCreateResponse, status_code=status.HTTP_201_CREATED)
+def _saturated(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Search capacity is saturated; retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def _outstanding_searches(db: Session) -> dict[str, int] | None:
+    """Active searches per microservice instance, when the dispatcher chooses by them."""
+    if not microservice_client.dispatcher.uses_outstanding:
+        return None
+    return dict(
+        db.query(Search.microservice_url, func.count())
+        .filter(Search.status.in_(ACTIVE_STATUSES), Search.microservice_url.isnot(None))
+        .group_by(Search.microservice_url)
+        .all()
+    )
+
+
+def _record_failover(db: Session, accepted_by: dict[str, str], assigned: dict[str, str | None]) -> None:
+    """Point searches that failed over to another instance at the one that took them."""
+    moved: dict[str, list[str]] = {}
+    for search_id, url in accepted_by.items():
+        if url != assigned.get(search_id):
+            moved.setdefault(url, []).append(search_id)
+    for url, search_ids in moved.items():
+        db.execute(update(Search).where(Search.id.in_(search_ids)).values(microservice_url=url))
+    if moved:
+        db.commit()
+
+
+@router.post(
+    "/search",
+    response_model=SearchCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_writes)],
+)
 async def create_search(
     request: SearchCreateRequest,
     db: Session = Depends(get_db)
 ):
+    retry_after = microservice_client.saturated_retry_after()
+    if retry_after:
+        raise _saturated(retry_after)
+
     logger.info(f"Creating search for SMILES: {request.smiles}")
 
+    # The instance is chosen, and recorded, before the row is committed so
+    # concurrent requests already count this search against it.
+    endpoints = microservice_client.dispatcher.candidates(request.smiles, _outstanding_searches(db))
+
     # Create search record
     search = Search(
         smiles=request.smiles,
-        status=SearchStatus.PENDING.value
+        status=SearchStatus.PENDING.value,
+        priority=request.priority.value,
+        tenant=request.tenant,
+        max_routes=request.max_routes or settings.SEARCH_DEFAULT_MAX_ROUTES or None,
+        microservice_url=endpoints[0] if endpoints else None,
     )
     db.add(search)
     db.commit()
     db.refresh(search)
+    note_write(search.id)
 
     try:
-        async with httpx.AsyncClient() as client:
-            callback_url = f"http://{settings.CALLBACK_HOST}:{settings.API_PORT}/api/search/{search.id}/update"
-            microservice_request = {
-                "smiles": request.smiles,
-                "callback_url": callback_url
-            }
-            response = await client.post(
-                f"{settings.MICROSERVICE_URL}/start_search",
-                json=microservice_request,
-                timeout=5.0
-            )
-            response.raise_for_status()
-            logger.info(f"Microservice search initiated for search_id: {search.id}")
+        url = await microservice_client.start_search(
+            search.id, request.smiles, request.priority.value, request.tenant, endpoints
+        )
+        if url and url != search.microservice_url:
+            search.microservice_url = url
+            db.commit()
+        logger.info(f"Microservice search initiated for search_id: {search.id}")
+    except microservice_client.MicroserviceSaturatedError as e:
+        # Nothing will ever work on this search; do not leave it pending.
+        db.delete(search)
+        db.commit()
+        raise _saturated(e.retry_after)
     except Exception as e:
         logger.error(f"Failed to initiate microservice search: {e}")
         search.status = SearchStatus.FAILED.value
@@ -58,23 +116,170 @@ async def create_search(
     return SearchCreateResponse(id=search.id)
 
 
-@router.get("/search/{search_id}/status", response_model=SearchStatusResponse)
-async def get_search_status(
-    search_id: str,
+@router.post(
+    "/search/batch",
+    response_model=SearchBatchCreateResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(limit_writes)],
+)
+async def create_search_batch(
+    request: SearchBatchCreateRequest,
     db: Session = Depends(get_db)
 ):
-    search = db.query(Search).filter(Search.id == search_id).first()
-    if not search:
+    if len(request.smiles) > settings.SEARCH_BATCH_MAX_SIZE:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Search {search_id} not found"
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Batch of {len(request.smiles)} searches exceeds the limit of {settings.SEARCH_BATCH_MAX_SIZE}"
+        )
+    retry_after = microservice_client.saturated_retry_after()
+    if retry_after:
+        raise _saturated(retry_after)
+    logger.info(f"Creating batch of {len(request.smiles)} searches")
+
+    now = datetime.utcnow()
+    max_routes = request.max_routes or settings.SEARCH_DEFAULT_MAX_ROUTES or None
+    endpoints = microservice_client.dispatcher.assign(request.smiles, _outstanding_searches(db))
+    rows = [
+        {
+            "id": uuid7(now),
+            "smiles": smiles,
+            "status": SearchStatus.PENDING.value,
+            "priority": request.priority.value,
+            "tenant": request.tenant,
+            "max_routes": max_routes,
+            "microservice_url": candidates[0] if candidates else None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for smiles, candidates in zip(request.smiles, endpoints)
+    ]
+    db.execute(insert(Search), rows)
+    db.commit()
+    note_write(*(row["id"] for row in rows))
+
+    errors, accepted_by = await microservice_client.start_search_batch(
+        [(row["id"], row["smiles"]) for row in rows], request.priority.value, request.tenant, endpoints
+    )
+
+    if all(error == microservice_client.SATURATED_ERROR for error in errors.values()):
+        db.execute(delete(Search).where(Search.id.in_([row["id"] for row in rows])))
+        db.commit()
+        raise _saturated(microservice_client.saturated_retry_after())
+    _record_failover(db, accepted_by, {row["id"]: row["microservice_url"] for row in rows})
+
+    failed = {
+        search_id: f"Failed to initiate search: {error}"
+        for search_id, error in errors.items()
+        if error is not None
+    }
+    # Failures usually share one cause (e.g. microservice unreachable), so
+    # group them to keep this to a handful of UPDATE statements.
+    by_error: dict[str, list[str]] = {}
+    for search_id, error in failed.items():
+        by_error.setdefault(error, []).append(search_id)
+    for error, search_ids in by_error.items():
+        db.execute(
+            update(Search)
+            .where(Search.id.in_(search_ids))
+            .values(status=SearchStatus.FAILED.value, error_message=error)
+        )
+    if failed:
+        db.commit()
+        logger.error(f"{len(failed)}/{len(rows)} searches in batch failed to start")
+
+    return SearchBatchCreateResponse(searches=[
+        SearchBatchItem(
+            id=row["id"],
+            smiles=row["smiles"],
+            status=SearchStatus.FAILED if row["id"] in failed else SearchStatus.PENDING,
+            error_message=failed.get(row["id"]),
         )
+        for row in rows
+    ])
 
+
+def _eta_seconds(search: Search, now: datetime) -> float | None:
+    if search.estimated_completion_at is None or search.status not in ACTIVE_STATUSES:
+        return None
+    finish = search.estimated_completion_at
+    if finish.tzinfo is not None:
+        finish = finish.astimezone(timezone.utc).replace(tzinfo=None)
+    # Overdue estimates report 0 rather than a negative time.
+    return max(0.0, round((finish - now).total_seconds(), 1))
+
+
+def _status_response(search: Search) -> SearchStatusResponse:
     return SearchStatusResponse(
         id=search.id,
         smiles=search.smiles,
         status=SearchStatus(search.status),
+        priority=SearchPriority(search.priority),
+        tenant=search.tenant,
+        max_routes=search.max_routes,
         created_at=search.created_at.isoformat(),
         updated_at=search.updated_at.isoformat(),
-        error_message=search.error_message
+        error_message=search.error_message,
+        archived_at=search.archived_at.isoformat() if search.archived_at else None,
+        route_count=search.route_count or 0,
+        purchasable_route_count=search.purchasable_route_count or 0,
+        best_score=search.best_score,
+        worst_score=search.worst_score,
+        progress=search.progress,
+        expected_batches=search.expected_batches,
+        eta_seconds=_eta_seconds(search, datetime.utcnow()),
     )
+
+
+@router.get("/search/{search_id}/status", response_model=SearchStatusResponse, dependencies=[Depends(limit_reads)])
+async def get_search_status(
+    search_id: str,
+    db: Session = Depends(get_read_db)
+):
+    search = db.query(Search).filter(Search.id == search_id).first()
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Search {search_id} not found"
+        )
+
+    return _status_response(search)
+
+
+@router.delete("/search/{search_id}", response_model=SearchStatusResponse, dependencies=[Depends(limit_writes)])
+async def cancel_search(
+    search_id: str,
+    db: Session = Depends(get_db)
+):
+    # Conditional UPDATE so a callback completing the search at the same time
+    # cannot be overwritten: only searches that are still running get cancelled.
+    cancelled = db.execute(
+        update(Search)
+        .where(Search.id == search_id, Search.status.in_(ACTIVE_STATUSES))
+        .values(status=SearchStatus.CANCELLED.value, updated_at=datetime.utcnow())
+    ).rowcount
+    db.commit()
+    if cancelled:
+        note_write(search_id)
+
+    search = db.query(Search).filter(Search.id == search_id).first()
+    if not search:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Search {search_id} not found"
+        )
+    if not cancelled and search.status != SearchStatus.CANCELLED.value:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Search {search_id} is already {search.status}"
+        )
+
+    if cancelled:
+        logger.info(f"Cancelled search {search_id}")
+        try:
+            await microservice_client.cancel_search(search_id, search.microservice_url)
+        except Exception as e:
+            # Not fatal: late callbacks are rejected with 410, which also
+            # makes the microservice drop the job.
+            logger.error(f"Failed to cancel microservice job for search {search_id}: {e}")
+
+    return _status_response(search)
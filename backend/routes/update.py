@@ -1,23 +1,79 @@
 import json
 import logging
+from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from database import get_db
+from body_decoding import PrevalidatedBodyRoute
+from config import settings
+from database import get_db, note_write
+from ids import uuid7
 from db_models import (
     Search,
     Route as RouteDB,
     RouteMolecule,
     CatalogEntry as CatalogEntryDB,
     Reaction as ReactionDB,
+    RouteVendor,
 )
 from models import SearchUpdate, UpdateResponse
+from reaper import ACTIVE_STATUSES
+from retention import delete_routes
+from route_features import compute_route_features
+from route_hash import route_content_hash
+from route_intern import RouteInterner
 from retrosynthesis_search import SearchStatus
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# Update callbacks are the largest request bodies; decode them from the raw bytes.
+router = APIRouter(route_class=PrevalidatedBodyRoute)
+
+
+def _known_bodies(db: Session, search_id: str, hashes: set[str]) -> tuple[set[str], dict[str, str]]:
+    """Hashes the search already has, and for other hashes a route of another search holding that body."""
+    if not hashes:
+        return set(), {}
+    seen = {
+        content_hash for (content_hash,) in
+        db.query(RouteDB.content_hash).filter(RouteDB.search_id == search_id, RouteDB.content_hash.in_(hashes)).all()
+    }
+    shared = {}
+    if settings.ROUTE_SHARE_BODIES and not settings.DB_PARTITION_ROUTES and hashes - seen:
+        shared = dict(
+            db.query(RouteDB.content_hash, RouteDB.id).filter(
+                RouteDB.content_hash.in_(hashes - seen),
+                RouteDB.body_route_id.is_(None),
+            ).all()
+        )
+    return seen, shared
+
+
+def _top_k(db: Session, search: Search, candidates: list) -> tuple[list, list]:
+    """Split new routes into those to store and stored routes to delete, keeping max_routes.
+
+    Of the stored and new routes together, the best ``max_routes`` by score
+    survive. On equal scores the stored route stays. Only the lowest stored
+    routes are read, through the (search_id, score) index.
+    """
+    order = sorted(range(len(candidates)), key=lambda i: -candidates[i][0].score)
+    keep = set(order[:search.max_routes])
+    excess = (search.route_count or 0) + len(keep) - search.max_routes
+    evicted = []
+    if excess > 0:
+        lowest = db.query(RouteDB.id, RouteDB.score, RouteDB.leaf_count, RouteDB.purchasable_leaf_count).filter(
+            RouteDB.search_id == search.id
+        ).order_by(RouteDB.score.asc()).limit(excess).all()
+        # New routes sort before stored ones on ties, so they are dropped first.
+        pool = [(candidates[i][0].score, 0, i) for i in keep] + [(row.score, 1, n) for n, row in enumerate(lowest)]
+        for _, stored, index in sorted(pool)[:excess]:
+            if stored:
+                evicted.append(lowest[index])
+            else:
+                keep.discard(index)
+    return [candidate for i, candidate in enumerate(candidates) if i in keep], evicted
 
 
 @router.post("/search/{search_id}/update", response_model=UpdateResponse)
@@ -28,33 +84,99 @@ async def update_search(
 ):
     logger.info(f"Received update for search {search_id}: {len(update.routes)} routes, complete={update.is_complete}")
 
-    search = db.query(Search).filter(Search.id == search_id).first()
+    # Lock the search row so concurrent updates number their routes one after
+    # the other and never hand out the same ingest_seq twice.
+    search = db.query(Search).filter(Search.id == search_id).with_for_update().first()
     if not search:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Search {search_id} not found"
         )
 
+    if search.status not in ACTIVE_STATUSES:
+        # Cancelled, or already finished (e.g. failed by the reaper): 410 tells
+        # the microservice to drop the job instead of retrying, and the search
+        # keeps its final status.
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Search {search_id} was cancelled" if search.status == SearchStatus.CANCELLED.value
+            else f"Search {search_id} is already {search.status}"
+        )
+
+    if update.batch_index is not None and search.last_batch_index is not None \
+            and update.batch_index <= search.last_batch_index:
+        # The microservice resumes jobs from its last acknowledged batch, so a
+        # batch we stored but it never saw acknowledged can arrive again.
+        logger.info(f"Ignoring redelivered batch {update.batch_index} for search {search_id}")
+        return UpdateResponse(status="duplicate")
+
     try:
-        for route_model in update.routes:
+        # Child ids carry the search's creation time so all of a search's route
+        # data lands in the same time range (and partition, when enabled).
+        # Assigning ids up front also lets the session insert everything in a
+        # single flush at commit instead of one round trip per route/molecule.
+        created_at = search.created_at
+        interner = RouteInterner()
+        route_dicts = [interner.route(route_model.model_dump()) for route_model in update.routes]
+        hashes = [route_content_hash(route_data) for route_data in route_dicts]
+        seen, shared = _known_bodies(db, search_id, set(hashes))
+        candidates = []
+        for route_model, route_data, content_hash in zip(update.routes, route_dicts, hashes):
+            if content_hash not in seen:
+                seen.add(content_hash)
+                candidates.append((route_model, route_data, content_hash))
+        unique_count = len(candidates)
+        evicted = []
+        if search.max_routes:
+            candidates, evicted = _top_k(db, search, candidates)
+
+        cursor = search.ingest_cursor or 0
+        scores = []
+        purchasable_routes = 0
+        for route_model, route_data, content_hash in candidates:
+            features = compute_route_features(route_data)
+            cursor += 1
+            scores.append(route_model.score)
+            if features["purchasable_leaf_count"] == features["leaf_count"]:
+                purchasable_routes += 1
             route_db = RouteDB(
+                id=uuid7(created_at),
                 search_id=search_id,
-                score=route_model.score
+                score=route_model.score,
+                ingest_seq=cursor,
+                content_hash=content_hash,
+                body_route_id=shared.get(content_hash),
+                step_count=features["step_count"],
+                depth=features["depth"],
+                leaf_count=features["leaf_count"],
+                purchasable_leaf_count=features["purchasable_leaf_count"],
+                max_lead_time_weeks=features["max_lead_time_weeks"],
+                min_lead_time_weeks=features["min_lead_time_weeks"],
             )
             db.add(route_db)
-            db.flush()
+
+            for catalog_name in features["vendors"]:
+                db.add(RouteVendor(
+                    id=uuid7(created_at),
+                    route_id=route_db.id,
+                    catalog_name=catalog_name
+                ))
+
+            if route_db.body_route_id is not None:
+                continue
 
             for mol_model in route_model.molecules:
                 route_mol = RouteMolecule(
+                    id=uuid7(created_at),
                     route_id=route_db.id,
                     smiles=mol_model.smiles,
                     is_purchasable=bool(mol_model.catalog_entries)
                 )
                 db.add(route_mol)
-                db.flush()
 
                 for cat_entry in mol_model.catalog_entries:
                     catalog_entry = CatalogEntryDB(
+                        id=uuid7(created_at),
                         molecule_id=route_mol.id,
                         vendor_id=cat_entry.vendor_id,
                         catalog_name=cat_entry.catalog_name,
@@ -64,6 +186,7 @@ async def update_search(
 
             for reaction_model in route_model.reactions:
                 reaction_db = ReactionDB(
+                    id=uuid7(created_at),
                     route_id=route_db.id,
                     name=reaction_model.name,
                     target=reaction_model.target,
@@ -71,15 +194,51 @@ async def update_search(
                 )
                 db.add(reaction_db)
 
+        if unique_count < len(update.routes):
+            logger.info(f"Skipped {len(update.routes) - unique_count} duplicate routes for search {search_id}")
+        if evicted:
+            delete_routes(db, [route.id for route in evicted])
+            search.route_count = (search.route_count or 0) - len(evicted)
+            search.purchasable_route_count = (search.purchasable_route_count or 0) - sum(
+                1 for route in evicted if route.purchasable_leaf_count == route.leaf_count
+            )
+        search.ingest_cursor = cursor
+        if scores:
+            best = max(scores)
+            worst = min(scores)
+            search.route_count = (search.route_count or 0) + len(scores)
+            search.purchasable_route_count = (search.purchasable_route_count or 0) + purchasable_routes
+            search.best_score = best if search.best_score is None else max(search.best_score, best)
+            search.worst_score = worst if search.worst_score is None else min(search.worst_score, worst)
+        if evicted:
+            # The lowest stored scores are gone; read the new minimum back. The
+            # session does not autoflush, so write the new routes first or a
+            # new route that is now the lowest would be missed.
+            db.flush()
+            search.worst_score = db.query(func.min(RouteDB.score)).filter(RouteDB.search_id == search_id).scalar()
+        if update.batch_index is not None:
+            search.last_batch_index = update.batch_index
+
+        if update.progress is not None:
+            search.progress = update.progress
+        if update.expected_batches is not None:
+            search.expected_batches = update.expected_batches
+        if update.eta_seconds is not None:
+            search.estimated_completion_at = datetime.utcnow() + timedelta(seconds=update.eta_seconds)
+
         if update.error_message:
             search.status = SearchStatus.FAILED.value
             search.error_message = update.error_message
+            search.estimated_completion_at = None
         elif update.is_complete:
             search.status = SearchStatus.COMPLETED.value
+            search.progress = 1.0
+            search.estimated_completion_at = None
         else:
             search.status = SearchStatus.IN_PROGRESS.value
 
         db.commit()
+        note_write(search_id)
         logger.info(f"Successfully updated search {search_id}")
 
         return UpdateResponse(status="ok")
@@ -90,6 +249,7 @@ async def update_search(
         search.status = SearchStatus.FAILED.value
         search.error_message = str(e)
         db.commit()
+        note_write(search_id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update search: {str(e)}"
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import tracemalloc
+
+# Tests never touch the configured database: point the app at a throwaway
+# SQLite file (or TEST_DATABASE_URL) before any backend module is imported.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db"
+)
+
+import pytest
+
+
+@pytest.fixture
+def db():
+    import db_models  # noqa: F401 - registers the tables on Base.metadata
+    from database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def retained_bytes():
+    """Measure the memory still held by what a callable builds, via tracemalloc."""
+    def measure(build) -> int:
+        tracemalloc.start()
+        try:
+            result = build()
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return current
+
+    return measure
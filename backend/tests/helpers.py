@@ -0,0 +1,39 @@
+"""Routes, searches and update callbacks shared by the ingest and results tests."""
+from db_models import Search
+from retrosynthesis_search import SearchStatus
+
+
+def route(score: float = 0.5, name: str | None = None, lead_time: float = 1.0, purchasable: bool = True) -> dict:
+    """A one-step route CCO <- CC, where CC can be bought unless ``purchasable`` is false.
+
+    The reaction is named after the score unless ``name`` is given, so routes
+    with different scores are distinct and none are deduplicated; pass the
+    same ``name`` to get routes with equal content.
+    """
+    entries = [{"vendor_id": "V1", "catalog_name": "enamine", "lead_time_weeks": lead_time}] if purchasable else []
+    return {
+        "score": score,
+        "molecules": [
+            {"smiles": "CCO", "catalog_entries": []},
+            {"smiles": "CC", "catalog_entries": entries},
+        ],
+        "reactions": [{"name": name or f"R-{score}", "target": "CCO", "sources": ["CC"]}],
+    }
+
+
+def new_search(db, **fields) -> str:
+    search = Search(**{"smiles": "CCO", "status": SearchStatus.IN_PROGRESS.value, **fields})
+    db.add(search)
+    db.commit()
+    return search.id
+
+
+def ingest(client, search_id: str, routes: list[dict], batch_index: int = 1, is_complete: bool = False):
+    """Post one update callback and check it was stored."""
+    response = client.post(
+        f"/api/search/{search_id}/update",
+        json={"routes": routes, "is_complete": is_complete, "batch_index": batch_index},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "ok"
+    return response
@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import microservice_client
+from app import app
+from db_models import Route, Search
+from retrosynthesis_search import SearchStatus
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    cancelled = []
+
+    async def cancel_search(search_id, endpoint=None):
+        cancelled.append(search_id)
+
+    monkeypatch.setattr(microservice_client, "cancel_search", cancel_search)
+    test_client = TestClient(app)
+    test_client.cancelled = cancelled
+    return test_client
+
+
+def test_cancel_running_search(client, db):
+    search = Search(smiles="CCO", status=SearchStatus.IN_PROGRESS.value)
+    db.add(search)
+    db.commit()
+
+    response = client.delete(f"/api/search/{search.id}")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == SearchStatus.CANCELLED.value
+    assert client.cancelled == [search.id]
+    # Cancelling again is a no-op.
+    assert client.delete(f"/api/search/{search.id}").status_code == 200
+    assert client.cancelled == [search.id]
+
+
+def test_cancel_finished_search_conflicts(client, db):
+    search = Search(smiles="CCO", status=SearchStatus.COMPLETED.value)
+    db.add(search)
+    db.commit()
+
+    assert client.delete(f"/api/search/{search.id}").status_code == 409
+    assert client.delete("/api/search/missing").status_code == 404
+    assert client.cancelled == []
+
+
+def test_late_callbacks_are_rejected_without_writes(client, db):
+    search = Search(smiles="CCO", status=SearchStatus.CANCELLED.value)
+    db.add(search)
+    db.commit()
+    updated_at = search.updated_at
+
+    response = client.post(
+        f"/api/search/{search.id}/update",
+        json={
+            "routes": [{"score": 0.9, "molecules": [{"smiles": "CCO", "catalog_entries": []}], "reactions": []}],
+            "is_complete": True,
+            "batch_index": 1,
+        },
+    )
+
+    assert response.status_code == 410
+    db.expire_all()
+    assert search.status == SearchStatus.CANCELLED.value
+    assert search.updated_at == updated_at
+    assert search.last_batch_index is None
+    assert db.query(Route).count() == 0
@@ -0,0 +1,160 @@
+import json
+from collections import Counter
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import microservice_client
+import rate_limit
+from app import app
+from db_models import Search
+from dispatch import CONSISTENT_HASH, LEAST_OUTSTANDING, Dispatcher
+from rate_limit import InMemoryTokenBucketStore
+from retrosynthesis_search import SearchStatus
+
+URLS = ["http://ms-a:8001", "http://ms-b:8001", "http://ms-c:8001"]
+
+
+class StubInstance:
+    """Stands in for one microservice process."""
+
+    def __init__(self):
+        self.down = False
+        self.status_code = 200
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.down:
+            raise httpx.ConnectError("Connection refused", request=request)
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"status": "healthy"})
+        if self.status_code != 200:
+            return httpx.Response(self.status_code, headers={"Retry-After": "30"})
+        if request.method == "DELETE":
+            self.cancelled.append(request.url.path.rsplit("/", 1)[1])
+            return httpx.Response(200, json={"status": "cancelled"})
+        body = json.loads(request.content)
+        if request.url.path == "/start_search/batch":
+            self.started.extend(search["search_id"] for search in body["searches"])
+            return httpx.Response(200, json={"results": [{"status": "accepted"} for _ in body["searches"]]})
+        self.started.append(body["search_id"])
+        return httpx.Response(200, json={"status": "started"})
+
+
+@pytest.fixture
+def stubs(db, monkeypatch):
+    stubs = {url: StubInstance() for url in URLS}
+    transport = httpx.MockTransport(
+        lambda request: stubs[f"http://{request.url.host}:{request.url.port}"].handle(request)
+    )
+    monkeypatch.setattr(microservice_client, "_client", lambda: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(microservice_client, "dispatcher", Dispatcher(URLS, LEAST_OUTSTANDING))
+    monkeypatch.setattr(rate_limit, "store", InMemoryTokenBucketStore())
+    stubs["transport"] = transport
+    return stubs
+
+
+@pytest.fixture
+def client(stubs):
+    return TestClient(app)
+
+
+def create(client, smiles: str = "CCO") -> str:
+    response = client.post("/api/search", json={"smiles": smiles})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def instance_of(db, search_id: str) -> str:
+    db.expire_all()
+    return db.query(Search).filter(Search.id == search_id).one().microservice_url
+
+
+def test_least_outstanding_spreads_searches_and_follows_completion(client, stubs, db):
+    ids = [create(client) for _ in range(6)]
+
+    assert [len(stubs[url].started) for url in URLS] == [2, 2, 2]
+    assert {url: stubs[url].started for url in URLS} == {
+        url: [i for i in ids if instance_of(db, i) == url] for url in URLS
+    }
+
+    # Finished searches no longer count, so the next one goes where they ran.
+    db.query(Search).filter(Search.microservice_url == URLS[1]).update({"status": SearchStatus.COMPLETED.value})
+    db.commit()
+    assert instance_of(db, create(client)) == URLS[1]
+
+
+def test_consistent_hash_keeps_smiles_on_one_instance(client, stubs, db, monkeypatch):
+    monkeypatch.setattr(microservice_client, "dispatcher", Dispatcher(URLS, CONSISTENT_HASH))
+
+    first, second = create(client, "c1ccccc1O"), create(client, "c1ccccc1O")
+    assert instance_of(db, first) == instance_of(db, second)
+
+    spread = Counter(microservice_client.dispatcher.candidates(f"C{'C' * i}O")[0] for i in range(300))
+    assert set(spread) == set(URLS)
+    assert min(spread.values()) > 50
+
+
+def test_unreachable_instance_fails_over_until_healthy(client, stubs, db):
+    stubs[URLS[0]].down = True
+
+    search_id = create(client)
+
+    assert instance_of(db, search_id) == URLS[1]
+    assert stubs[URLS[1]].started == [search_id]
+    # Marked down, it is not tried again before the next health check...
+    stubs[URLS[0]].down = False
+    assert URLS[0] not in {instance_of(db, create(client)) for _ in range(3)}
+    assert microservice_client.dispatcher.candidates("CCO")[-1] == URLS[0]
+
+    # ...which brings it back, and it has the fewest searches.
+    microservice_client.dispatcher.check_health(httpx.Client(transport=stubs["transport"]))
+    assert instance_of(db, create(client)) == URLS[0]
+
+
+def test_every_instance_down_fails_the_search(client, stubs, db):
+    for url in URLS:
+        stubs[url].down = True
+
+    search = client.get(f"/api/search/{create(client)}/status").json()
+
+    assert search["status"] == SearchStatus.FAILED.value
+    assert "Connection refused" in search["error_message"]
+
+
+def test_saturated_instances_are_skipped_until_all_are(client, stubs, db):
+    stubs[URLS[0]].status_code = 429
+    stubs[URLS[1]].status_code = 503
+
+    assert instance_of(db, create(client)) == URLS[2]
+
+    stubs[URLS[2]].status_code = 429
+    response = client.post("/api/search", json={"smiles": "CCO"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert db.query(Search).count() == 1
+
+
+def test_batch_is_spread_and_fails_over(client, stubs, db):
+    stubs[URLS[2]].down = True
+
+    response = client.post("/api/search/batch", json={"smiles": [f"C{i}" for i in range(9)]})
+
+    assert response.status_code == 201
+    items = response.json()["searches"]
+    assert all(item["status"] == SearchStatus.PENDING.value for item in items)
+    assert len(stubs[URLS[0]].started) + len(stubs[URLS[1]].started) == 9
+    assert {instance_of(db, item["id"]) for item in items} == set(URLS[:2])
+    for url in URLS[:2]:
+        assert sorted(stubs[url].started) == sorted(i["id"] for i in items if instance_of(db, i["id"]) == url)
+
+
+def test_cancel_goes_to_the_instance_running_the_search(client, stubs, db):
+    search_id = create(client)
+    url = instance_of(db, search_id)
+
+    assert client.delete(f"/api/search/{search_id}").status_code == 200
+
+    assert {u: stubs[u].cancelled for u in URLS} == {u: [search_id] if u == url else [] for u in URLS}
@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from ids import uuid7, uuid7_lower_bound, uuid7_timestamp
+
+
+def test_uuid7_has_version_and_variant():
+    value = uuid.UUID(uuid7())
+
+    assert value.version == 7
+    assert value.variant == uuid.RFC_4122
+
+
+def test_uuid7_sorts_by_time():
+    earlier = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    later = earlier + timedelta(milliseconds=1)
+
+    ids = [uuid7(later), uuid7(earlier)]
+
+    assert sorted(ids) == [ids[1], ids[0]]
+
+
+def test_uuid7_naive_datetime_is_utc():
+    aware = datetime(2024, 5, 17, 12, 30, tzinfo=timezone.utc)
+
+    assert uuid7_timestamp(uuid7(aware.replace(tzinfo=None))) == aware
+
+
+def test_uuid7_lower_bound_precedes_ids_from_same_instant():
+    at = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+    assert uuid7_lower_bound(at) < uuid7(at)
+    assert uuid7(at - timedelta(milliseconds=1)) < uuid7_lower_bound(at)
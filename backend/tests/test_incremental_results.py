@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from tests.helpers import ingest, new_search, route
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+@pytest.fixture
+def search_id(db):
+    return new_search(db)
+
+
+def scores(response) -> list[float]:
+    return sorted(tree["score"] for tree in response.json()["routes"])
+
+
+def test_since_returns_only_newly_ingested_routes(client, search_id):
+    first = client.get(f"/api/search/{search_id}/results")
+    assert first.json()["cursor"] == 0
+    assert first.json()["routes"] == []
+
+    ingest(client, search_id, [route(0.5), route(0.7)], 1)
+    second = client.get(f"/api/search/{search_id}/results", params={"since": first.json()["cursor"]})
+    assert scores(second) == [0.5, 0.7]
+    assert second.json()["cursor"] == 2
+
+    ingest(client, search_id, [route(0.6)], 2)
+    ingest(client, search_id, [route(0.9)], 3, is_complete=True)
+    third = client.get(f"/api/search/{search_id}/results", params={"since": second.json()["cursor"]})
+    assert scores(third) == [0.6, 0.9]
+    assert third.json()["cursor"] == 4
+
+    # Nothing new: no routes, same cursor.
+    fourth = client.get(f"/api/search/{search_id}/results", params={"since": 4})
+    assert fourth.json() == {"search_id": search_id, "total_routes": 0, "routes": [], "cursor": 4}
+
+    # Without since the full set is returned, as before.
+    assert scores(client.get(f"/api/search/{search_id}/results")) == [0.5, 0.6, 0.7, 0.9]
+
+
+def test_since_combines_with_filters(client, search_id):
+    ingest(client, search_id, [route(0.2), route(0.8)], 1)
+    ingest(client, search_id, [route(0.3), route(0.9), route(0.95)], 2)
+
+    response = client.get(f"/api/search/{search_id}/results", params={"since": 2, "min_score": 0.5, "limit": 1})
+
+    assert scores(response) == [0.95]
+    assert response.json()["cursor"] == 5
+
+
+def test_redelivered_batch_does_not_advance_cursor(client, search_id):
+    ingest(client, search_id, [route(0.5)], 1)
+    duplicate = client.post(
+        f"/api/search/{search_id}/update",
+        json={"routes": [route(0.5)], "is_complete": False, "batch_index": 1},
+    )
+
+    assert duplicate.json()["status"] == "duplicate"
+    assert client.get(f"/api/search/{search_id}/results").json()["cursor"] == 1
+
+
+def test_status_carries_route_aggregates(client, search_id):
+    status = client.get(f"/api/search/{search_id}/status").json()
+    assert (status["route_count"], status["best_score"], status["worst_score"]) == (0, None, None)
+
+    ingest(client, search_id, [route(0.6), route(0.4, purchasable=False)], 1)
+    ingest(client, search_id, [route(0.9), route(0.5)], 2, is_complete=True)
+
+    status = client.get(f"/api/search/{search_id}/status").json()
+    assert status["route_count"] == 4
+    assert status["purchasable_route_count"] == 3
+    assert status["best_score"] == 0.9
+    assert status["worst_score"] == 0.4
+    # The counts agree with what /results would return.
+    purchasable = client.get(f"/api/search/{search_id}/results", params={"fully_purchasable": True}).json()
+    assert purchasable["total_routes"] == status["purchasable_route_count"]
+
+
+def test_dag_format_shares_molecules_across_routes(client, search_id):
+    ingest(client, search_id, [route(0.5), route(0.7), route(0.9)], 1)
+
+    trees = client.get(f"/api/search/{search_id}/results").json()
+    dag = client.get(f"/api/search/{search_id}/results", params={"format": "dag"}).json()
+
+    assert dag["total_routes"] == 3
+    assert dag["cursor"] == trees["cursor"]
+    assert sorted(m["smiles"] for m in dag["molecules"]) == ["CC", "CCO"]
+    assert [route["score"] for route in dag["routes"]] == [tree["score"] for tree in trees["routes"]]
+    assert dag["routes"][0]["features"] == trees["routes"][0]["features"]
@@ -0,0 +1,87 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import Session, sessionmaker
+
+import database
+import rate_limit
+from app import app
+from metrics import Counter, LatencyRecorder, db_checkout_timeouts
+from rate_limit import InMemoryTokenBucketStore
+
+
+def test_latency_recorder_summary():
+    recorder = LatencyRecorder()
+    for value in range(1, 101):
+        recorder.observe(value / 1000)
+
+    summary = recorder.summary()
+
+    assert summary["count"] == 100
+    assert summary["p50"] == 0.051
+    assert summary["p99"] == 0.099
+    assert summary["max"] == 0.1
+
+
+def test_latency_recorder_window_keeps_totals():
+    recorder = LatencyRecorder(window=10)
+    for _ in range(50):
+        recorder.observe(1.0)
+
+    summary = recorder.summary()
+
+    assert summary["count"] == 50
+    assert summary["mean"] == 1.0
+
+
+def test_latency_recorder_empty():
+    summary = LatencyRecorder().summary()
+
+    assert summary["count"] == 0
+    assert summary["p95"] == 0.0
+
+
+def test_counter():
+    counter = Counter()
+    counter.inc()
+    counter.inc(2)
+
+    assert counter.value == 3
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(rate_limit, "store", InMemoryTokenBucketStore())
+    return TestClient(app)
+
+
+def test_pool_exhaustion_answers_503_and_is_counted(client, monkeypatch):
+    class ExhaustedSession(Session):
+        def connection(self, *args, **kwargs):
+            raise PoolTimeoutError("QueuePool limit reached")
+
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(class_=ExhaustedSession, bind=database.engine))
+    before = db_checkout_timeouts.value
+
+    response = client.get("/api/search/0190a0b4-0000-7000-8000-000000000001/status")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert db_checkout_timeouts.value == before + 1
+    assert client.get("/metrics").json()["database"]["checkout_timeouts"] == before + 1
+
+
+def test_metrics_reports_pool_state(client):
+    # A successful checkout is timed.
+    assert client.get("/api/search/0190a0b4-0000-7000-8000-000000000001/status").status_code == 404
+
+    database_metrics = client.get("/metrics").json()["database"]
+
+    assert set(database_metrics) == {
+        "pool_class", "size", "checked_in", "in_use", "overflow", "max_overflow",
+        "checkout_wait_seconds", "checkout_timeouts",
+    }
+    assert database_metrics["pool_class"] == type(database.engine.pool).__name__
+    assert set(database_metrics["checkout_wait_seconds"]) == {"count", "mean", "p50", "p95", "p99", "max"}
+    assert database_metrics["checkout_wait_seconds"]["count"] >= 1
+    assert isinstance(database_metrics["checkout_timeouts"], int)
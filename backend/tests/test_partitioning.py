@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+from partitioning import add_months, month_start, partition_name
+
+
+def test_month_start_normalizes_to_utc_first_of_month():
+    at = datetime(2024, 3, 17, 15, 45, 12)
+
+    assert month_start(at) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def test_add_months_crosses_year_boundaries():
+    month = datetime(2024, 11, 1, tzinfo=timezone.utc)
+
+    assert add_months(month, 2) == datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -11) == datetime(2023, 12, 1, tzinfo=timezone.utc)
+
+
+def test_partition_name():
+    month = datetime(2024, 7, 1, tzinfo=timezone.utc)
+
+    assert partition_name("routes", month) == "routes_p202407"
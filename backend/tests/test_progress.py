@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from app import app
+from db_models import Search
+from retrosynthesis_search import SearchStatus
+
+
+def post_update(client, search_id, **fields):
+    response = client.post(f"/api/search/{search_id}/update", json={"routes": [], **fields})
+    assert response.status_code == 200
+
+
+def test_status_reports_progress_and_eta(db):
+    client = TestClient(app)
+    search = Search(smiles="CCO", status=SearchStatus.PENDING.value)
+    db.add(search)
+    db.commit()
+
+    status = client.get(f"/api/search/{search.id}/status").json()
+    assert (status["progress"], status["expected_batches"], status["eta_seconds"]) == (None, None, None)
+
+    post_update(client, search.id, batch_index=1, progress=0.25, expected_batches=4, eta_seconds=120)
+    status = client.get(f"/api/search/{search.id}/status").json()
+    assert (status["progress"], status["expected_batches"]) == (0.25, 4)
+    assert 110 <= status["eta_seconds"] <= 120
+
+    post_update(client, search.id, batch_index=2, is_complete=True, progress=1.0, expected_batches=2, eta_seconds=0)
+    status = client.get(f"/api/search/{search.id}/status").json()
+    assert (status["progress"], status["expected_batches"]) == (1.0, 2)
+    assert status["eta_seconds"] is None
+
+
+def test_progress_out_of_range_is_rejected(db):
+    client = TestClient(app)
+    search = Search(smiles="CCO", status=SearchStatus.IN_PROGRESS.value)
+    db.add(search)
+    db.commit()
+
+    response = client.post(f"/api/search/{search.id}/update", json={"routes": [], "progress": 1.5})
+
+    assert response.status_code == 422
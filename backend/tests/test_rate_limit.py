@@ -0,0 +1,76 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import microservice_client
+import rate_limit
+from app import app
+from config import settings
+from db_models import Search
+from dispatch import Dispatcher
+from rate_limit import DatabaseTokenBucketStore, InMemoryTokenBucketStore, TokenBucketStore
+
+
+@pytest.mark.parametrize("make_store", [InMemoryTokenBucketStore, DatabaseTokenBucketStore])
+def test_token_bucket(db, make_store):
+    store = make_store()
+
+    # Burst of 3, refilling one token per second.
+    assert [store.take("k", rate=1.0, capacity=3, now=100.0) for _ in range(3)] == [0, 0, 0]
+    assert store.take("k", rate=1.0, capacity=3, now=100.0) == pytest.approx(1.0)
+    assert store.take("k", rate=1.0, capacity=3, now=100.5) == pytest.approx(0.5)
+    assert store.take("k", rate=1.0, capacity=3, now=101.0) == 0
+    # Buckets are independent per key.
+    assert store.take("other", rate=1.0, capacity=3, now=101.0) == 0
+
+
+def test_store_without_take_cannot_be_created():
+    class IncompleteStore(TokenBucketStore):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(rate_limit, "store", InMemoryTokenBucketStore())
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(microservice_client, "dispatcher", Dispatcher([settings.MICROSERVICE_URL]))
+
+    async def start_search(*args):
+        pass
+
+    monkeypatch.setattr(microservice_client, "start_search", start_search)
+    return TestClient(app)
+
+
+def test_create_search_is_rate_limited_per_client(client, monkeypatch):
+    monkeypatch.setattr(rate_limit.limit_writes, "capacity", 2)
+
+    assert client.post("/api/search", json={"smiles": "CCO"}).status_code == 201
+    assert client.post("/api/search", json={"smiles": "CCO"}).status_code == 201
+    response = client.post("/api/search", json={"smiles": "CCO"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # Another API key has its own bucket.
+    assert client.post("/api/search", json={"smiles": "CCO"}, headers={"X-API-Key": "other"}).status_code == 201
+
+
+def test_saturated_microservice_returns_429_without_pending_rows(client, db, monkeypatch):
+    async def start_search(*args):
+        microservice_client.dispatcher.mark_saturated(settings.MICROSERVICE_URL, 30)
+        raise microservice_client.MicroserviceSaturatedError(30)
+
+    monkeypatch.setattr(microservice_client, "start_search", start_search)
+
+    response = client.post("/api/search", json={"smiles": "CCO"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "30"
+    assert db.query(Search).count() == 0
+
+    # Until Retry-After passes, requests are turned away without trying again.
+    monkeypatch.setattr(microservice_client, "start_search", None)
+    assert client.post("/api/search", json={"smiles": "CCO"}).status_code == 429
+    assert client.post("/api/search/batch", json={"smiles": ["CCO"]}).status_code == 429
+    assert db.query(Search).count() == 0
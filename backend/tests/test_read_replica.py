@@ -0,0 +1,115 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import database
+import microservice_client
+import rate_limit
+from app import app
+from config import settings
+from database import Base, make_engine
+from db_models import Search
+from rate_limit import InMemoryTokenBucketStore
+from retrosynthesis_search import SearchStatus
+
+ROUTE = {
+    "score": 0.5,
+    "molecules": [{"smiles": "CCO", "catalog_entries": []}, {"smiles": "CC", "catalog_entries": []}],
+    "reactions": [{"name": "R1", "target": "CCO", "sources": ["CC"]}],
+}
+
+
+@pytest.fixture
+def replica(db, tmp_path, monkeypatch):
+    """A second SQLite file standing in for a replica that has fallen behind the primary."""
+    engine = make_engine(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(database, "replica_engine", engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", session_factory)
+    monkeypatch.setattr(database, "_recent_writes", OrderedDict())
+    monkeypatch.setattr(rate_limit, "store", InMemoryTokenBucketStore())
+    session = session_factory()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(replica):
+    return TestClient(app)
+
+
+def add_search(session, search_id: str, status: SearchStatus, age: timedelta) -> None:
+    updated_at = datetime.utcnow() - age
+    session.add(Search(id=search_id, smiles="CCO", status=status.value, created_at=updated_at, updated_at=updated_at))
+    session.commit()
+
+
+def status_of(client, search_id: str) -> str:
+    response = client.get(f"/api/search/{search_id}/status")
+    assert response.status_code == 200
+    return response.json()["status"]
+
+
+SEARCH_ID = "0190a0b4-0000-7000-8000-000000000001"
+
+
+def test_settled_searches_are_read_from_the_replica(client, db, replica):
+    add_search(db, SEARCH_ID, SearchStatus.COMPLETED, timedelta(hours=1))
+    add_search(replica, SEARCH_ID, SearchStatus.IN_PROGRESS, timedelta(hours=1))
+
+    assert status_of(client, SEARCH_ID) == SearchStatus.IN_PROGRESS.value
+
+
+def test_searches_missing_or_just_updated_on_the_replica_are_read_from_the_primary(client, db, replica):
+    add_search(db, SEARCH_ID, SearchStatus.COMPLETED, timedelta(0))
+    assert status_of(client, SEARCH_ID) == SearchStatus.COMPLETED.value
+
+    # Updated by another backend process: the replica may still be missing later writes.
+    add_search(replica, SEARCH_ID, SearchStatus.IN_PROGRESS, timedelta(seconds=1))
+    assert status_of(client, SEARCH_ID) == SearchStatus.COMPLETED.value
+
+
+def test_own_writes_are_read_from_the_primary_until_the_window_passes(client, db, replica, monkeypatch):
+    add_search(db, SEARCH_ID, SearchStatus.IN_PROGRESS, timedelta(hours=1))
+    add_search(replica, SEARCH_ID, SearchStatus.IN_PROGRESS, timedelta(hours=1))
+    assert client.get(f"/api/search/{SEARCH_ID}/results").json()["total_routes"] == 0
+
+    response = client.post(f"/api/search/{SEARCH_ID}/update", json={"routes": [ROUTE], "is_complete": True})
+    assert response.status_code == 200
+
+    assert status_of(client, SEARCH_ID) == SearchStatus.COMPLETED.value
+    assert client.get(f"/api/search/{SEARCH_ID}/results").json()["total_routes"] == 1
+
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 0)
+    assert status_of(client, SEARCH_ID) == SearchStatus.IN_PROGRESS.value
+    assert client.get(f"/api/search/{SEARCH_ID}/results").json()["total_routes"] == 0
+
+
+def test_created_search_is_visible_at_once(client, db, replica, monkeypatch):
+    async def start_search(*args):
+        pass
+
+    monkeypatch.setattr(microservice_client, "start_search", start_search)
+    search_id = client.post("/api/search", json={"smiles": "CCO"}).json()["id"]
+
+    assert status_of(client, search_id) == SearchStatus.PENDING.value
+    assert replica.query(Search).count() == 0
+
+
+def test_recent_writes_are_forgotten_after_the_window(replica, monkeypatch):
+    clock = iter([100.0, 103.0, 106.0])
+    monkeypatch.setattr(database, "time", SimpleNamespace(monotonic=lambda: next(clock)))
+    monkeypatch.setattr(settings, "DB_READ_YOUR_WRITES_SECONDS", 5)
+    database.note_write("a", "b")
+    database.note_write("c")
+    assert list(database._recent_writes) == ["a", "b", "c"]
+
+    database.note_write("b")
+
+    assert list(database._recent_writes) == ["c", "b"]
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import microservice_client
+from app import app
+from config import settings
+from db_models import Search
+from reaper import reap_stale_searches
+from retrosynthesis_search import SearchStatus
+
+
+@pytest.fixture
+def cancelled(monkeypatch):
+    cancelled = []
+
+    async def cancel_search(search_id, endpoint=None):
+        cancelled.append((search_id, endpoint))
+
+    monkeypatch.setattr(microservice_client, "cancel_search", cancel_search)
+    monkeypatch.setattr(settings, "SEARCH_STALE_AFTER_SECONDS", 60)
+    return cancelled
+
+
+def test_reap_stale_searches(db, cancelled):
+    now = datetime.utcnow()
+    stale = Search(
+        smiles="A", status=SearchStatus.IN_PROGRESS.value, updated_at=now - timedelta(minutes=5),
+        microservice_url="http://ms-a:8001",
+    )
+    fresh = Search(smiles="B", status=SearchStatus.IN_PROGRESS.value, updated_at=now)
+    # Pending jobs may just be waiting in the microservice's queue.
+    queued = Search(smiles="C", status=SearchStatus.PENDING.value, updated_at=now - timedelta(hours=1))
+    done = Search(smiles="D", status=SearchStatus.COMPLETED.value, updated_at=now - timedelta(days=1))
+    db.add_all([stale, fresh, queued, done])
+    db.commit()
+
+    assert reap_stale_searches(now) == 1
+
+    db.expire_all()
+    assert stale.status == SearchStatus.FAILED.value
+    assert "timed out" in stale.error_message
+    assert fresh.status == SearchStatus.IN_PROGRESS.value
+    assert queued.status == SearchStatus.PENDING.value
+    assert done.status == SearchStatus.COMPLETED.value
+    assert cancelled == [(stale.id, "http://ms-a:8001")]
+
+
+def test_reaped_search_rejects_late_updates(db, cancelled):
+    search = Search(smiles="A", status=SearchStatus.IN_PROGRESS.value, updated_at=datetime.utcnow() - timedelta(hours=1))
+    db.add(search)
+    db.commit()
+    assert reap_stale_searches() == 1
+
+    response = TestClient(app).post(f"/api/search/{search.id}/update", json={"routes": [], "batch_index": 1})
+
+    assert response.status_code == 410
+    db.expire_all()
+    assert search.status == SearchStatus.FAILED.value
+    assert "timed out" in search.error_message
@@ -0,0 +1,112 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from config import settings
+from database import engine
+from db_models import Search, Route, RouteMolecule, CatalogEntry, Reaction
+from retention import (
+    ARCHIVE,
+    DELETE,
+    RetentionRule,
+    _iter_route_data,
+    apply_rule,
+    parse_rules,
+    read_archive,
+)
+from retrosynthesis_search import SearchStatus
+
+
+def _add_search(db, status: SearchStatus, age: timedelta, n_routes: int) -> Search:
+    updated_at = datetime.now(timezone.utc) - age
+    search = Search(smiles="A", status=status.value, created_at=updated_at, updated_at=updated_at)
+    db.add(search)
+    db.flush()
+    for i in range(n_routes):
+        route = Route(search_id=search.id, score=i / 10)
+        db.add(route)
+        db.flush()
+        molecule = RouteMolecule(route_id=route.id, smiles="B", is_purchasable=True)
+        db.add(molecule)
+        db.flush()
+        db.add(CatalogEntry(molecule_id=molecule.id, vendor_id="V", catalog_name="C", lead_time_weeks=1.0))
+        db.add(Reaction(route_id=route.id, name="R", target="A", sources=json.dumps(["B"])))
+    db.commit()
+    return search
+
+
+def test_parse_rules():
+    rules = parse_rules("completed:30:archive, failed:7:delete")
+
+    assert rules == [
+        RetentionRule(SearchStatus.COMPLETED, timedelta(days=30), ARCHIVE),
+        RetentionRule(SearchStatus.FAILED, timedelta(days=7), DELETE),
+    ]
+
+
+@pytest.mark.parametrize("spec", ["completed:30", "done:1:delete", "failed:1:archive", "completed:1:shred"])
+def test_parse_rules_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_rules(spec)
+
+
+def test_archive_rule_moves_routes_to_archive(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "RETENTION_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE_SECONDS", 0)
+    old = _add_search(db, SearchStatus.COMPLETED, timedelta(days=40), n_routes=5)
+    recent = _add_search(db, SearchStatus.COMPLETED, timedelta(days=1), n_routes=1)
+    old_id, recent_id = old.id, recent.id
+
+    rule = RetentionRule(SearchStatus.COMPLETED, timedelta(days=30), ARCHIVE)
+    processed = apply_rule(db, rule, datetime.now(timezone.utc), limit=10)
+
+    assert processed == 1
+    archived = db.query(Search).filter(Search.id == old_id).one()
+    assert archived.archived_at is not None
+    assert db.query(Route).filter(Route.search_id == old_id).count() == 0
+    assert db.query(RouteMolecule).count() == 1
+    assert db.query(CatalogEntry).count() == 1
+    assert db.query(Route).filter(Route.search_id == recent_id).count() == 1
+
+    routes = read_archive(archived.archive_path)
+    assert sorted(route["score"] for route in routes) == [0.0, 0.1, 0.2, 0.3, 0.4]
+    assert routes[0]["reactions"] == [{"name": "R", "target": "A", "sources": ["B"]}]
+    assert routes[0]["molecules"][0]["catalog_entries"][0]["vendor_id"] == "V"
+
+
+def test_archive_reads_route_chunks_with_a_fixed_number_of_queries(db):
+    small = _add_search(db, SearchStatus.COMPLETED, timedelta(days=40), n_routes=3).id
+    large = _add_search(db, SearchStatus.COMPLETED, timedelta(days=40), n_routes=30).id
+    queries = []
+
+    def count(conn, cursor, statement, *args):
+        queries.append(statement)
+
+    def queries_to_read(search_id: str) -> int:
+        queries.clear()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            routes = list(_iter_route_data(db, search_id, batch_size=100))
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+        assert all(route["molecules"] and route["reactions"] for route in routes)
+        return len(queries)
+
+    assert queries_to_read(large) == queries_to_read(small)
+
+
+def test_delete_rule_removes_search(db, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE_SECONDS", 0)
+    failed = _add_search(db, SearchStatus.FAILED, timedelta(days=10), n_routes=3)
+    failed_id = failed.id
+
+    rule = RetentionRule(SearchStatus.FAILED, timedelta(days=7), DELETE)
+    processed = apply_rule(db, rule, datetime.now(timezone.utc), limit=10)
+
+    assert processed == 1
+    assert db.query(Search).filter(Search.id == failed_id).count() == 0
+    assert db.query(Route).count() == 0
+    assert db.query(Reaction).count() == 0
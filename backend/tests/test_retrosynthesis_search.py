@@ -5,6 +5,8 @@ from retrosynthesis_search import (
     SearchStatus,
     build_retrosynthesis_tree,
     CurrentSearchData,
+    decode_routes_dag,
+    encode_routes_dag,
 )
 
 
@@ -251,3 +253,44 @@ def test_update_search_progress_no_changes():
     assert updates["status"] == SearchStatus.PENDING
     assert "updated_at" in updates
     assert updates.get("error_message") is None
+
+
+def test_routes_dag_lists_shared_subtrees_once_and_round_trips():
+    vendor = [{"vendor_id": "V1", "catalog_name": "enamine", "lead_time_weeks": 1.0}]
+    # Both routes make B from C and D; the second also uses C twice.
+    routes: list[RouteData] = [
+        {
+            "score": 0.9,
+            "molecules": [
+                {"smiles": "A", "catalog_entries": []},
+                {"smiles": "B", "catalog_entries": []},
+                {"smiles": "C", "catalog_entries": vendor},
+                {"smiles": "D", "catalog_entries": vendor},
+            ],
+            "reactions": [
+                {"name": "R1", "target": "A", "sources": ["B"]},
+                {"name": "R2", "target": "B", "sources": ["C", "D"]},
+            ],
+        },
+        {
+            "score": 0.7,
+            "molecules": [
+                {"smiles": "A", "catalog_entries": []},
+                {"smiles": "B", "catalog_entries": []},
+                {"smiles": "C", "catalog_entries": vendor},
+                {"smiles": "D", "catalog_entries": vendor},
+            ],
+            "reactions": [
+                {"name": "R3", "target": "A", "sources": ["B", "C"]},
+                {"name": "R2", "target": "B", "sources": ["C", "D"]},
+            ],
+        },
+    ]
+    trees = [build_retrosynthesis_tree(route) for route in routes]
+
+    dag = encode_routes_dag(trees)
+
+    assert [m["smiles"] for m in dag["molecules"]] == ["A", "B", "C", "D"]
+    assert [r["name"] for r in dag["reactions"]] == ["R2", "R1", "R3"]
+    assert [len(route["reactions"]) for route in dag["routes"]] == [2, 2]
+    assert decode_routes_dag(dag) == trees
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from config import settings
+from db_models import Route, RouteMolecule, Search
+from retention import DELETE, RetentionRule, apply_rule
+from retrosynthesis_search import SearchStatus
+from route_hash import route_content_hash
+from tests.helpers import ingest, new_search, route
+
+
+# Equal content whatever the score: these routes deduplicate.
+chemistry = partial(route, name="R1")
+
+
+def two_source_chemistry(score: float = 0.5) -> dict:
+    branched = chemistry(score)
+    branched["molecules"].append({"smiles": "O", "catalog_entries": []})
+    branched["reactions"][0]["sources"].append("O")
+    return branched
+
+
+def test_hash_ignores_score_and_order():
+    reordered = two_source_chemistry(score=0.9)
+    reordered["molecules"].reverse()
+    reordered["reactions"][0]["sources"].reverse()
+
+    assert route_content_hash(reordered) == route_content_hash(two_source_chemistry())
+    assert route_content_hash(chemistry(lead_time=2.0)) != route_content_hash(chemistry())
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+def results(client, search_id) -> list[dict]:
+    return client.get(f"/api/search/{search_id}/results").json()["routes"]
+
+
+def test_duplicates_within_a_search_are_skipped(client, db):
+    search_id = new_search(db)
+
+    ingest(client, search_id, [chemistry(0.5), chemistry(0.7)])
+    ingest(client, search_id, [chemistry(0.6), chemistry(0.4, lead_time=3.0)], 2)
+
+    assert db.query(Route).filter(Route.search_id == search_id).count() == 2
+    status = client.get(f"/api/search/{search_id}/status").json()
+    assert status["route_count"] == 2
+    assert client.get(f"/api/search/{search_id}/results").json()["cursor"] == 2
+
+
+def test_bodies_are_shared_across_searches(client, db):
+    first, second = new_search(db), new_search(db)
+    ingest(client, first, [chemistry(0.5)])
+
+    ingest(client, second, [chemistry(0.8)])
+
+    shared = db.query(Route).filter(Route.search_id == second).one()
+    assert shared.body_route_id is not None
+    assert db.query(RouteMolecule).filter(RouteMolecule.route_id == shared.id).count() == 0
+    [tree] = results(client, second)
+    assert tree["score"] == 0.8
+    assert tree == {**results(client, first)[0], "score": 0.8}
+
+    # Vendor filters still apply to the sharing route.
+    assert len(client.get(f"/api/search/{second}/results", params={"vendor": "enamine"}).json()["routes"]) == 1
+
+
+def test_deleting_the_holder_hands_the_body_on(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "RETENTION_BATCH_PAUSE_SECONDS", 0)
+    holder, sharers = new_search(db), [new_search(db), new_search(db)]
+    ingest(client, holder, [chemistry(0.5)])
+    for search_id in sharers:
+        ingest(client, search_id, [chemistry(0.6)])
+    expected = results(client, sharers[0])
+    db.query(Search).filter(Search.id == holder).update({"status": SearchStatus.FAILED.value})
+    db.commit()
+
+    rule = RetentionRule(SearchStatus.FAILED, timedelta(0), DELETE)
+    apply_rule(db, rule, now=datetime.now(timezone.utc) + timedelta(seconds=1), limit=10)
+
+    assert db.query(Search).filter(Search.id == holder).count() == 0
+    for search_id in sharers:
+        assert results(client, search_id) == expected
+    assert db.query(Route).filter(Route.body_route_id.is_(None)).count() == 1
+
+
+def test_sharing_can_be_disabled(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "ROUTE_SHARE_BODIES", False)
+    first, second = new_search(db), new_search(db)
+    ingest(client, first, [chemistry(0.5)])
+
+    ingest(client, second, [chemistry(0.5)])
+
+    assert db.query(Route).filter(Route.body_route_id.isnot(None)).count() == 0
+    assert db.query(RouteMolecule).count() == 4
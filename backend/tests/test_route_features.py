@@ -0,0 +1,78 @@
+from retrosynthesis_search import RouteData
+from route_features import compute_route_features
+
+
+def _entry(catalog: str, weeks: float) -> dict:
+    return {"vendor_id": f"{catalog}-1", "catalog_name": catalog, "lead_time_weeks": weeks}
+
+
+def test_compute_route_features_two_step():
+    route: RouteData = {
+        "score": 0.9,
+        "molecules": [
+            {"smiles": "A", "catalog_entries": []},
+            {"smiles": "B", "catalog_entries": [_entry("molport", 0.0)]},
+            {"smiles": "C", "catalog_entries": [_entry("enamine", 6.0), _entry("molport", 2.0)]},
+            {"smiles": "D", "catalog_entries": [_entry("enamine", 4.0)]},
+        ],
+        "reactions": [
+            {"name": "Step1", "target": "B", "sources": ["C", "D"]},
+            {"name": "Step2", "target": "A", "sources": ["B", "C"]},
+        ],
+    }
+
+    features = compute_route_features(route)
+
+    assert features["step_count"] == 2
+    assert features["depth"] == 2
+    assert features["leaf_count"] == 2
+    assert features["purchasable_leaf_count"] == 2
+    assert features["max_lead_time_weeks"] == 4.0
+    assert features["min_lead_time_weeks"] == 2.0
+    assert features["vendors"] == ["enamine", "molport"]
+
+
+def test_compute_route_features_counts_unlisted_leaves_as_not_purchasable():
+    route: RouteData = {
+        "score": 0.5,
+        "molecules": [{"smiles": "A", "catalog_entries": []}],
+        "reactions": [{"name": "Step1", "target": "A", "sources": ["B"]}],
+    }
+
+    features = compute_route_features(route)
+
+    assert features["leaf_count"] == 1
+    assert features["purchasable_leaf_count"] == 0
+    assert features["max_lead_time_weeks"] is None
+    assert features["vendors"] == []
+
+
+def test_compute_route_features_without_reactions():
+    route: RouteData = {
+        "score": 0.7,
+        "molecules": [{"smiles": "H", "catalog_entries": [_entry("pubchem", 12.0)]}],
+        "reactions": [],
+    }
+
+    features = compute_route_features(route)
+
+    assert features["step_count"] == 0
+    assert features["depth"] == 0
+    assert features["leaf_count"] == 1
+    assert features["purchasable_leaf_count"] == 1
+
+
+def test_compute_route_features_tolerates_cycles():
+    route: RouteData = {
+        "score": 0.75,
+        "molecules": [],
+        "reactions": [
+            {"name": "Step1", "target": "A", "sources": ["B"]},
+            {"name": "Step2", "target": "B", "sources": ["A"]},
+        ],
+    }
+
+    features = compute_route_features(route)
+
+    assert features["step_count"] == 2
+    assert features["leaf_count"] == 0
@@ -0,0 +1,82 @@
+import json
+import random
+
+from fastapi.testclient import TestClient
+
+from app import app
+from models import SearchResultsResponse
+from retrosynthesis_search import build_retrosynthesis_tree
+from route_intern import RouteInterner
+from tests.helpers import ingest, new_search
+
+
+def payload(count: int, seed: int = 0) -> list[str]:
+    """``count`` two-step routes over a shared pool of building blocks, as JSON text."""
+    rng = random.Random(seed)
+    blocks = [
+        (f"CC(=O)N{i}c1ccc(Cl)cc1", [
+            {"vendor_id": f"V{i}-{j}", "catalog_name": "enamine", "lead_time_weeks": float(j)} for j in range(i % 3)
+        ])
+        for i in range(300)
+    ]
+    routes = []
+    for k in range(count):
+        leaves = rng.sample(blocks, 4)
+        routes.append({
+            "score": rng.random(),
+            "molecules": [{"smiles": f"T{k}", "catalog_entries": []}, {"smiles": f"I{k}", "catalog_entries": []}]
+            + [{"smiles": smiles, "catalog_entries": entries} for smiles, entries in leaves],
+            "reactions": [
+                {"name": "amide coupling", "target": f"T{k}", "sources": [f"I{k}", leaves[0][0]]},
+                {"name": "suzuki", "target": f"I{k}", "sources": [smiles for smiles, _ in leaves[1:]]},
+            ],
+        })
+    return [json.dumps(route) for route in routes]
+
+
+def test_interned_routes_and_trees_are_unchanged():
+    interner = RouteInterner()
+    for text in payload(50):
+        route = json.loads(text)
+
+        interned = interner.route(route)
+
+        assert interned == route
+        assert build_retrosynthesis_tree(interned, interner) == build_retrosynthesis_tree(route)
+
+
+def test_interner_shares_equal_parts():
+    interner = RouteInterner()
+    first, second = (interner.route(json.loads(text)) for text in payload(1) * 2)
+
+    assert first["reactions"][0]["name"] is second["reactions"][0]["name"]
+    assert first["molecules"][2]["smiles"] is second["molecules"][2]["smiles"]
+    assert first["molecules"][2]["catalog_entries"] is second["molecules"][2]["catalog_entries"]
+    first_leaf = build_retrosynthesis_tree(first, interner)["root"]["reactions"][0]["reactants"][1]
+    second_leaf = build_retrosynthesis_tree(second, interner)["root"]["reactions"][0]["reactants"][1]
+    assert first_leaf is second_leaf
+
+
+def test_interning_cuts_memory_of_10k_route_trees(retained_bytes):
+    texts = payload(10_000)
+
+    plain = retained_bytes(lambda: [build_retrosynthesis_tree(json.loads(text)) for text in texts])
+
+    def interned():
+        interner = RouteInterner()
+        return [build_retrosynthesis_tree(interner.route(json.loads(text)), interner) for text in texts]
+
+    # Measured at about a third of the plain size.
+    assert retained_bytes(interned) < plain * 0.5
+
+
+def test_tree_results_match_the_response_model(db):
+    # The tree response skips model validation, so check it still matches the model.
+    client = TestClient(app)
+    search_id = new_search(db)
+    ingest(client, search_id, [json.loads(text) for text in payload(20)])
+
+    body = client.get(f"/api/search/{search_id}/results").json()
+
+    assert body["total_routes"] == 20
+    assert SearchResultsResponse.model_validate(body).model_dump(mode="json") == body
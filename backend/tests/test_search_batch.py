@@ -0,0 +1,100 @@
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import microservice_client
+import rate_limit
+from app import app
+from config import settings
+from database import engine
+from db_models import Search
+from dispatch import Dispatcher
+from rate_limit import InMemoryTokenBucketStore
+from retrosynthesis_search import SearchStatus
+
+
+@pytest.fixture
+def chunks(db, monkeypatch):
+    """Requests the (stubbed) microservice receives; targets named BAD* are rejected, DOWN* fail the chunk."""
+    chunks = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        searches = json.loads(request.content)["searches"]
+        chunks.append([search["smiles"] for search in searches])
+        if any(search["smiles"].startswith("DOWN") for search in searches):
+            return httpx.Response(500)
+        return httpx.Response(200, json={"results": [
+            {"status": "rejected", "error": "invalid SMILES"} if search["smiles"].startswith("BAD")
+            else {"status": "accepted"}
+            for search in searches
+        ]})
+
+    transport = httpx.MockTransport(handle)
+    monkeypatch.setattr(microservice_client, "_client", lambda: httpx.AsyncClient(transport=transport))
+    monkeypatch.setattr(microservice_client, "dispatcher", Dispatcher([settings.MICROSERVICE_URL]))
+    monkeypatch.setattr(rate_limit, "store", InMemoryTokenBucketStore())
+    monkeypatch.setattr(settings, "MICROSERVICE_BATCH_SIZE", 2)
+    return chunks
+
+
+@pytest.fixture
+def client(chunks):
+    return TestClient(app)
+
+
+def test_batch_is_sent_in_chunks_and_answered_in_request_order(client, chunks, db):
+    smiles = [f"C{i}" for i in range(5)]
+
+    response = client.post("/api/search/batch", json={"smiles": smiles, "priority": "low"})
+
+    assert response.status_code == 201
+    items = response.json()["searches"]
+    assert [item["smiles"] for item in items] == smiles
+    assert all(item["status"] == SearchStatus.PENDING.value for item in items)
+    assert chunks == [["C0", "C1"], ["C2", "C3"], ["C4"]]
+    rows = {search.id: search for search in db.query(Search)}
+    assert [rows[item["id"]].smiles for item in items] == smiles
+    assert {search.priority for search in rows.values()} == {"low"}
+
+
+def test_failures_are_recorded_with_one_update_per_error(client, chunks, db):
+    smiles = ["C0", "BAD1", "C2", "BAD3", "DOWN4", "C5"]
+    updates = []
+
+    def count_updates(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE searches"):
+            updates.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_updates)
+    try:
+        response = client.post("/api/search/batch", json={"smiles": smiles})
+    finally:
+        event.remove(engine, "before_cursor_execute", count_updates)
+
+    assert response.status_code == 201
+    items = response.json()["searches"]
+    assert [item["smiles"] for item in items] == smiles
+    assert [item["status"] for item in items] == [
+        SearchStatus.PENDING.value, SearchStatus.FAILED.value,
+        SearchStatus.PENDING.value, SearchStatus.FAILED.value,
+        SearchStatus.FAILED.value, SearchStatus.FAILED.value,
+    ]
+    assert items[1]["error_message"] == items[3]["error_message"] == "Failed to initiate search: invalid SMILES"
+    assert "500" in items[4]["error_message"] and items[4]["error_message"] == items[5]["error_message"]
+    assert len(updates) == 2
+
+    stored = {search.id: (search.status, search.error_message) for search in db.query(Search)}
+    assert [stored[item["id"]] for item in items] == [(item["status"], item["error_message"]) for item in items]
+
+
+def test_batch_over_the_size_limit_is_rejected(client, chunks, db, monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_BATCH_MAX_SIZE", 3)
+
+    response = client.post("/api/search/batch", json={"smiles": ["C"] * 4})
+
+    assert response.status_code == 422
+    assert chunks == []
+    assert db.query(Search).count() == 0
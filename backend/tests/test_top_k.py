@@ -0,0 +1,72 @@
+from fastapi.testclient import TestClient
+
+import microservice_client
+from app import app
+from config import settings
+from db_models import Route, RouteMolecule
+from tests.helpers import ingest, new_search, route
+
+
+def stored_scores(db, search_id) -> list[float]:
+    return sorted(score for (score,) in db.query(Route.score).filter(Route.search_id == search_id))
+
+
+def test_ingest_keeps_the_best_max_routes(db):
+    client = TestClient(app)
+    search_id = new_search(db, max_routes=3)
+
+    ingest(client, search_id, [route(0.5, purchasable=False), route(0.6)], 1)
+    ingest(client, search_id, [route(0.9), route(0.1), route(0.7)], 2)
+
+    assert stored_scores(db, search_id) == [0.6, 0.7, 0.9]
+    # The evicted route's molecules went with it.
+    assert db.query(RouteMolecule).count() == 3 * 2
+    status = client.get(f"/api/search/{search_id}/status").json()
+    assert status["max_routes"] == 3
+    assert (status["route_count"], status["purchasable_route_count"]) == (3, 3)
+    assert (status["best_score"], status["worst_score"]) == (0.9, 0.6)
+
+    # A batch entirely below the K-th score writes nothing.
+    ingest(client, search_id, [route(0.2), route(0.3)], 3)
+    assert stored_scores(db, search_id) == [0.6, 0.7, 0.9]
+    results = client.get(f"/api/search/{search_id}/results").json()
+    assert [tree["score"] for tree in results["routes"]] == [0.9, 0.7, 0.6]
+
+
+def test_new_route_can_become_the_worst_score(db):
+    client = TestClient(app)
+    search_id = new_search(db, max_routes=3)
+
+    ingest(client, search_id, [route(0.9), route(0.8), route(0.7)], 1)
+    ingest(client, search_id, [route(0.75)], 2)
+
+    assert stored_scores(db, search_id) == [0.75, 0.8, 0.9]
+    status = client.get(f"/api/search/{search_id}/status").json()
+    assert (status["route_count"], status["best_score"], status["worst_score"]) == (3, 0.9, 0.75)
+
+
+def test_stored_routes_win_ties(db):
+    client = TestClient(app)
+    search_id = new_search(db, max_routes=2)
+    ingest(client, search_id, [route(0.5), route(0.8)], 1)
+    first_ids = {route_id for (route_id,) in db.query(Route.id)}
+
+    ingest(client, search_id, [route(0.5, name="other")], 2)
+
+    assert {route_id for (route_id,) in db.query(Route.id)} == first_ids
+
+
+def test_create_applies_default_max_routes(db, monkeypatch):
+    async def start_search(*args):
+        pass
+
+    monkeypatch.setattr(microservice_client, "start_search", start_search)
+    monkeypatch.setattr(settings, "SEARCH_DEFAULT_MAX_ROUTES", 50)
+    client = TestClient(app)
+
+    explicit = client.post("/api/search", json={"smiles": "CCO", "max_routes": 10}).json()["id"]
+    default = client.post("/api/search", json={"smiles": "CCO"}).json()["id"]
+
+    assert client.get(f"/api/search/{explicit}/status").json()["max_routes"] == 10
+    assert client.get(f"/api/search/{default}/status").json()["max_routes"] == 50
+    assert client.post("/api/search", json={"smiles": "CCO", "max_routes": 0}).status_code == 422
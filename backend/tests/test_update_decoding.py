@@ -0,0 +1,72 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import body_decoding
+from app import app
+from config import settings
+from db_models import Route
+from tests.helpers import new_search, route
+
+JSON = {"Content-Type": "application/json"}
+
+
+def body(**fields) -> bytes:
+    return json.dumps({"routes": [route()], **fields}).encode()
+
+
+def bad_lead_time() -> bytes:
+    bad = route()
+    bad["molecules"][1]["catalog_entries"][0]["lead_time_weeks"] = "soon"
+    return json.dumps({"routes": [bad, {"score": "x", "molecules": None}]}).encode()
+
+
+CASES = {
+    "valid": (body(is_complete=False, batch_index=1), JSON),
+    "valid vnd+json": (body(), {"Content-Type": "application/vnd.api+json"}),
+    "utf-16": (json.dumps({"routes": [route()]}).encode("utf-16"), JSON),
+    "utf-8 bom": (b"\xef\xbb\xbf" + body(), JSON),
+    "infinite score": (body().replace(b'"score": 0.5', b'"score": Infinity'), JSON),
+    "missing routes": (b'{"is_complete": true}', JSON),
+    "nested type errors": (bad_lead_time(), JSON),
+    "progress out of range": (body(progress=2, eta_seconds=-1), JSON),
+    "routes not a list": (b'{"routes": {"score": 1}}', JSON),
+    "truncated json": (body()[:40], JSON),
+    "trailing garbage": (body() + b"}", JSON),
+    "null": (b"null", JSON),
+    "empty body": (b"", JSON),
+    "text/plain": (body(), {"Content-Type": "text/plain"}),
+    "no content type": (body(), {}),
+}
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_fast_decoding_answers_exactly_like_fastapi(client, db, monkeypatch, case):
+    content, headers = CASES[case]
+    responses = []
+    for fast in (False, True):
+        monkeypatch.setattr(settings, "FAST_BODY_DECODING", fast)
+        response = client.post(f"/api/search/{new_search(db)}/update", content=content, headers=headers)
+        responses.append((response.status_code, response.json()))
+
+    assert responses[0] == responses[1]
+
+
+def test_valid_body_is_decoded_without_json_loads(client, db, monkeypatch):
+    def unexpected(_):
+        raise AssertionError("fell back to json.loads")
+
+    monkeypatch.setattr(body_decoding, "json", SimpleNamespace(loads=unexpected))
+    search_id = new_search(db)
+
+    response = client.post(f"/api/search/{search_id}/update", content=body(is_complete=True), headers=JSON)
+
+    assert response.json() == {"status": "ok"}
+    assert db.query(Route).filter(Route.search_id == search_id).count() == 1
@@ -0,0 +1,27 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+# The route factory is shared with the backend benchmarks. Both services have a
+# top-level ``benchmarks`` package, so load the module from its file instead.
+_FACTORY = Path(__file__).resolve().parents[2] / "backend" / "benchmarks" / "route_factory.py"
+_spec = importlib.util.spec_from_file_location("route_factory", _FACTORY)
+route_factory = importlib.util.module_from_spec(_spec)
+sys.modules["route_factory"] = route_factory
+_spec.loader.exec_module(route_factory)
+
+DEFAULT_SHAPES = "10x1x2,10x3x2,10x5x2,10x3x3,100x3x2"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--route-shapes",
+        default=DEFAULT_SHAPES,
+        help="Comma-separated ROUTESxDEPTHxBRANCHING shapes to benchmark (default: %(default)s)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "shape" in metafunc.fixturenames:
+        shapes = [route_factory.RouteShape.parse(spec) for spec in metafunc.config.getoption("route_shapes").split(",")]
+        metafunc.parametrize("shape", shapes, ids=str)
@@ -0,0 +1,120 @@
+"""Measure /health latency while the service is busy generating routes.
+
+For each ROUTE_GENERATOR_WORKERS value given, starts the microservice with a
+CPU-heavy simulated generator (SIMULATED_CPU_SECONDS_PER_BATCH), probes
+/health while idle, then submits searches and keeps probing until every one
+has delivered its final batch. With generation inline on the event loop
+(workers=0) the probes queue behind route generation; with a process pool
+they should stay flat.
+
+    cd microservice && python -m benchmarks.health_latency --workers 0,4 --jobs 16 --cpu-seconds 0.2
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.job_recovery import CallbackRecorder, free_port, start_receiver, start_service
+
+
+def summarize(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def probe(client: httpx.Client, url: str) -> float:
+    start = time.perf_counter()
+    client.get(url, timeout=30).raise_for_status()
+    return time.perf_counter() - start
+
+
+def run(workers: int, args) -> dict:
+    recorder = CallbackRecorder()
+    receiver, receiver_port = start_receiver(recorder)
+    service_port = free_port()
+    env = {
+        **os.environ,
+        "JOB_STORE_PATH": os.path.join(tempfile.mkdtemp(prefix="health-latency-"), "jobs.db"),
+        "ROUTE_GENERATOR_WORKERS": str(workers),
+        "SIMULATED_CPU_SECONDS_PER_BATCH": str(args.cpu_seconds),
+        "MAX_CONCURRENT_JOBS": str(args.jobs),
+        "JOB_POLL_INTERVAL_SECONDS": "0.1",
+        "BATCH_DELAY_MIN_SECONDS": "0",
+        "BATCH_DELAY_MAX_SECONDS": "0",
+        "LOG_LEVEL": "WARNING",
+    }
+    process = start_service(service_port, env)
+    health_url = f"http://127.0.0.1:{service_port}/health"
+    try:
+        with httpx.Client() as client:
+            idle = [probe(client, health_url) for _ in range(args.idle_probes)]
+
+            searches = [
+                {
+                    "smiles": "CCO",
+                    "callback_url": f"http://127.0.0.1:{receiver_port}/callback/job-{i}",
+                    "search_id": f"job-{i}",
+                }
+                for i in range(args.jobs)
+            ]
+            started = time.monotonic()
+            client.post(
+                f"http://127.0.0.1:{service_port}/start_search/batch", json={"searches": searches}, timeout=60
+            ).raise_for_status()
+
+            loaded = []
+            while len(recorder.completed) < args.jobs and time.monotonic() - started < args.timeout:
+                loaded.append(probe(client, health_url))
+                time.sleep(args.probe_interval)
+            elapsed = time.monotonic() - started
+    finally:
+        process.terminate()
+        process.wait()
+        receiver.shutdown()
+
+    return {
+        "workers": workers,
+        "completed_jobs": len(recorder.completed),
+        "elapsed_seconds": elapsed,
+        "idle": summarize(idle),
+        "under_load": summarize(loaded),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", default="0,4", help="Comma-separated ROUTE_GENERATOR_WORKERS values to compare")
+    parser.add_argument("--jobs", type=int, default=16, help="Concurrent searches to run")
+    parser.add_argument("--cpu-seconds", type=float, default=0.2, help="Simulated CPU seconds per batch")
+    parser.add_argument("--idle-probes", type=int, default=50, help="/health probes before submitting work")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Pause between probes under load")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up on a run after this many seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = [run(int(workers), args) for workers in args.workers.split(",")]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Measure job throughput and crash recovery of the durable job queue.
+
+Starts the microservice in a subprocess against a throwaway job store, submits
+a batch of searches whose callbacks go to an in-process receiver, and SIGKILLs
+and restarts the service at a fixed interval until every search has delivered
+its final batch. Reports throughput, per-crash recovery time (restart until
+the next delivered batch) and duplicate/missing batches.
+
+    cd microservice && python -m benchmarks.job_recovery --jobs 200 --crash-every 3
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class CallbackRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.deliveries: list[tuple[float, str, int | None]] = []
+        self.completed: set[str] = set()
+
+    def record(self, job_id: str, batch_index: int | None, is_complete: bool) -> None:
+        with self.lock:
+            self.deliveries.append((time.monotonic(), job_id, batch_index))
+            if is_complete:
+                self.completed.add(job_id)
+
+    def first_delivery_after(self, at: float) -> float | None:
+        with self.lock:
+            return next((t for t, _, _ in self.deliveries if t >= at), None)
+
+
+def start_receiver(recorder: CallbackRecorder) -> tuple[ThreadingHTTPServer, int]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            recorder.record(self.path.rsplit("/", 1)[-1], body.get("batch_index"), body.get("is_complete", False))
+            payload = b'{"status": "ok"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    port = free_port()
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, port
+
+
+def start_service(port: int, env: dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("microservice did not start")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--jobs", type=int, default=100, help="Number of searches to submit")
+    parser.add_argument("--crash-every", type=float, default=3.0, help="Seconds between injected crashes (0 = never)")
+    parser.add_argument("--max-crashes", type=int, default=5, help="Stop injecting crashes after this many")
+    parser.add_argument("--lease-seconds", type=float, default=2.0, help="JOB_LEASE_SECONDS for the service")
+    parser.add_argument("--concurrency", type=int, default=16, help="MAX_CONCURRENT_JOBS for the service")
+    parser.add_argument("--batch-delay", type=float, default=0.05, help="Delay between batches in seconds")
+    parser.add_argument(
+        "--ephemeral-worker-id",
+        action="store_true",
+        help="Use a new WORKER_ID per restart, so recovery waits for lease expiry",
+    )
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up after this many seconds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    recorder = CallbackRecorder()
+    receiver, receiver_port = start_receiver(recorder)
+    workdir = tempfile.mkdtemp(prefix="job-recovery-")
+    service_port = free_port()
+    env = {
+        **os.environ,
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.db"),
+        "JOB_LEASE_SECONDS": str(args.lease_seconds),
+        "JOB_POLL_INTERVAL_SECONDS": "0.1",
+        "MAX_CONCURRENT_JOBS": str(args.concurrency),
+        "BATCH_DELAY_MIN_SECONDS": str(args.batch_delay),
+        "BATCH_DELAY_MAX_SECONDS": str(args.batch_delay),
+        "LOG_LEVEL": "WARNING",
+        "WORKER_ID": "benchmark-worker",
+    }
+
+    process = start_service(service_port, env)
+    started = time.monotonic()
+    searches = [
+        {
+            "smiles": "CCO",
+            "callback_url": f"http://127.0.0.1:{receiver_port}/callback/job-{i}",
+            "search_id": f"job-{i}",
+        }
+        for i in range(args.jobs)
+    ]
+    httpx.post(
+        f"http://127.0.0.1:{service_port}/start_search/batch", json={"searches": searches}, timeout=60
+    ).raise_for_status()
+
+    restarts: list[float] = []
+    next_crash = started + args.crash_every if args.crash_every > 0 else float("inf")
+    try:
+        while len(recorder.completed) < args.jobs:
+            now = time.monotonic()
+            if now - started > args.timeout:
+                print("Timed out before all jobs completed", file=sys.stderr)
+                break
+            if now >= next_crash and len(restarts) < args.max_crashes:
+                process.send_signal(signal.SIGKILL)
+                process.wait()
+                if args.ephemeral_worker_id:
+                    env["WORKER_ID"] = f"benchmark-worker-{len(restarts) + 1}"
+                process = start_service(service_port, env)
+                restarts.append(time.monotonic())
+                next_crash = time.monotonic() + args.crash_every
+            time.sleep(0.02)
+    finally:
+        elapsed = time.monotonic() - started
+        process.terminate()
+        process.wait()
+        receiver.shutdown()
+
+    recoveries = []
+    for restart in restarts:
+        first = recorder.first_delivery_after(restart)
+        if first is not None:
+            recoveries.append(first - restart)
+
+    seen: dict[tuple[str, int | None], int] = {}
+    for _, job_id, batch_index in recorder.deliveries:
+        seen[(job_id, batch_index)] = seen.get((job_id, batch_index), 0) + 1
+    results = {
+        "jobs": args.jobs,
+        "completed_jobs": len(recorder.completed),
+        "elapsed_seconds": elapsed,
+        "jobs_per_second": len(recorder.completed) / elapsed,
+        "batches_delivered": len(recorder.deliveries),
+        "duplicate_deliveries": sum(count - 1 for count in seen.values()),
+        "crashes": len(restarts),
+        "recovery_seconds": recoveries,
+        "max_recovery_seconds": max(recoveries, default=None),
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measure time-to-first-batch and peak memory of route loading as the source file grows.
+
+Generates route files of increasing size (a JSON array and an NDJSON copy of
+each) by repeating the example routes with fresh scores, then reads the first
+batch of each in a fresh subprocess and reports the wall time until that batch
+and the process's peak RSS. Streaming from the file should stay flat across
+sizes; the previous ``json.load`` of the whole file grows linearly in both and
+is only run up to ``--load-limit-mb`` so the machine does not run out of memory.
+
+    cd microservice && python -m benchmarks.large_source --sizes-mb 64,256,1024
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVICE_DIR = Path(__file__).resolve().parent.parent
+
+# Executed in a fresh interpreter per measurement so peak RSS is not shared.
+_PROBE = """
+import json, resource, sys, time
+from get_routes import get_routes
+mode, path, batch_size = sys.argv[1], sys.argv[2], int(sys.argv[3])
+start = time.perf_counter()
+if mode == "load":
+    with open(path) as f:
+        batches = get_routes("CCO", batch_size=batch_size, routes=json.load(f))
+else:
+    batches = get_routes("CCO", batch_size=batch_size, path=path)
+batch, _ = next(batches)
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, "routes": len(batch)}))
+"""
+
+
+def write_dataset(directory: Path, size_mb: int, seed: int = 0) -> tuple[Path, Path]:
+    """Write ``routes-<size>.json`` and ``routes-<size>.ndjson`` of about ``size_mb`` each, reusing existing files."""
+    array_path = directory / f"routes-{size_mb}mb.json"
+    ndjson_path = directory / f"routes-{size_mb}mb.ndjson"
+    if array_path.exists() and ndjson_path.exists():
+        return array_path, ndjson_path
+    from get_routes import load_example_routes
+
+    templates = load_example_routes()
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(array_path, "w") as array, open(ndjson_path, "w") as ndjson:
+        array.write("[\n")
+        first = True
+        while written < target:
+            route = dict(templates[rng.randrange(len(templates))], score=round(rng.random(), 4))
+            line = json.dumps(route)
+            array.write(("" if first else ",\n") + line)
+            ndjson.write(line + "\n")
+            written += len(line) + 2
+            first = False
+        array.write("\n]\n")
+    return array_path, ndjson_path
+
+
+def probe(mode: str, path: Path, batch_size: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, mode, str(path), str(batch_size)],
+        cwd=SERVICE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-mb", default="16,64,256,1024", help="Comma-separated dataset sizes in MB")
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--load-limit-mb", type=int, default=256, help="Largest size to also measure with json.load")
+    parser.add_argument("--data-dir", help="Directory for the generated files (default: a temporary directory)")
+    args = parser.parse_args()
+
+    directory = Path(args.data_dir or tempfile.mkdtemp(prefix="route-source-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    print(f"Datasets in {directory}")
+    print(f"{'size':>8}  {'source':<14}  {'first batch':>12}  {'peak RSS':>10}")
+    for size_mb in (int(size) for size in args.sizes_mb.split(",")):
+        started = time.perf_counter()
+        array_path, ndjson_path = write_dataset(directory, size_mb)
+        print(f"  (generated {size_mb} MB in {time.perf_counter() - started:.1f}s)")
+        cases = [("stream", array_path, "json array"), ("stream", ndjson_path, "ndjson")]
+        if size_mb <= args.load_limit_mb:
+            cases.append(("load", array_path, "json.load"))
+        for mode, path, label in cases:
+            result = probe(mode, path, args.batch_size)
+            print(f"{size_mb:>6}MB  {label:<14}  {result['seconds'] * 1000:>10.1f}ms  {result['peak_rss_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
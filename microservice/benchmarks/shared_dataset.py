@@ -0,0 +1,100 @@
+"""Compare per-worker memory and load time of JSON route data and the binary dataset.
+
+Builds a route file of ``--size-mb`` (see large_source.py) and a ``RouteDataset``
+from it, then starts ``--workers`` processes at once that each load the routes
+the way a generation worker would and read every route once. Reports each
+worker's load time and, from /proc/self/smaps_rollup, its RSS and private
+memory: with the dataset the route pages are shared, file-backed page cache,
+so private memory stays near the bare interpreter's whatever the worker count.
+
+    cd microservice && python -m benchmarks.shared_dataset --size-mb 64 --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.large_source import SERVICE_DIR, write_dataset
+from get_routes import iter_route_file
+from route_dataset import build_dataset
+
+# Waits for a go file so all workers hold their routes at the same time.
+_PROBE = """
+import json, os, sys, time
+mode, path, go = sys.argv[1], sys.argv[2], sys.argv[3]
+start = time.perf_counter()
+if mode == "json":
+    with open(path) as f:
+        routes = json.load(f)
+else:
+    from route_dataset import RouteDataset
+    routes = RouteDataset(path)
+loaded = time.perf_counter() - start
+count = sum(len(route["molecules"]) for route in routes)
+print("ready", flush=True)
+while not os.path.exists(go):
+    time.sleep(0.05)
+memory = {}
+with open("/proc/self/smaps_rollup") as f:
+    for line in f:
+        key, _, value = line.partition(":")
+        if key in ("Rss", "Pss", "Private_Clean", "Private_Dirty"):
+            memory[key] = int(value.split()[0]) / 1024
+print(json.dumps({"load_seconds": loaded, "molecules": count, **memory}))
+"""
+
+
+def run_workers(mode: str, path: Path, workers: int) -> list[dict]:
+    go = Path(tempfile.mkdtemp()) / "go"
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", _PROBE, mode, str(path), str(go)],
+            cwd=SERVICE_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        if process.stdout.readline().strip() != "ready":
+            raise RuntimeError("benchmark worker failed while loading routes")
+    go.touch()
+    return [json.loads(process.communicate()[0]) for process in processes]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--data-dir", help="Directory for the generated files (default: a temporary directory)")
+    args = parser.parse_args()
+
+    directory = Path(args.data_dir or tempfile.mkdtemp(prefix="route-dataset-"))
+    directory.mkdir(parents=True, exist_ok=True)
+    array_path, ndjson_path = write_dataset(directory, args.size_mb)
+    dataset_path = directory / f"routes-{args.size_mb}mb.rtds"
+    started = time.perf_counter()
+    count = build_dataset(iter_route_file(ndjson_path), dataset_path)
+    print(
+        f"{count} routes: JSON {array_path.stat().st_size / 2**20:.0f} MB, "
+        f"dataset {dataset_path.stat().st_size / 2**20:.1f} MB (built in {time.perf_counter() - started:.1f}s)"
+    )
+    print(f"{'source':<8}  {'load':>9}  {'RSS':>9}  {'PSS':>9}  {'private':>9}   (mean of {args.workers} workers)")
+    for mode, path in (("json", array_path), ("dataset", dataset_path)):
+        results = run_workers(mode, path, args.workers)
+
+        def mean(key: str) -> float:
+            return sum(result[key] for result in results) / len(results)
+
+        private = mean("Private_Clean") + mean("Private_Dirty")
+        print(
+            f"{mode:<8}  {mean('load_seconds') * 1000:>7.1f}ms  {mean('Rss'):>7.1f}MB  "
+            f"{mean('Pss'):>7.1f}MB  {private:>7.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
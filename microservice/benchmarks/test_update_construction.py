@@ -0,0 +1,26 @@
+"""Microbenchmarks for turning generated routes into a callback payload.
+
+Every batch is validated into ``SearchUpdate`` models and dumped back to a
+dict before it is posted; both steps scale with route size:
+
+    cd microservice && pytest benchmarks --benchmark-group-by=func --benchmark-sort=name
+"""
+from route_factory import make_routes
+
+from main import build_update
+
+
+def test_build_update(benchmark, shape):
+    batch = make_routes(shape)
+
+    update = benchmark(build_update, batch, False, 1)
+
+    assert len(update.routes) == shape.routes
+
+
+def test_dump_update(benchmark, shape):
+    update = build_update(make_routes(shape), False, 1)
+
+    payload = benchmark(update.dict)
+
+    assert len(payload["routes"]) == shape.routes
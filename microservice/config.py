@@ -0,0 +1,65 @@
+import os
+import socket
+
+
+class Settings:
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+
+    # Durable job queue. Jobs survive restarts in a local SQLite file; a worker
+    # holds a lease on each job it runs and must renew it, so jobs whose worker
+    # died are picked up again once the lease expires. Give each instance a
+    # stable WORKER_ID to have it reclaim its own leases immediately on restart.
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", "jobs.db")
+    WORKER_ID: str = os.getenv("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+    MAX_CONCURRENT_JOBS: int = int(os.getenv("MAX_CONCURRENT_JOBS", "8"))
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "30"))
+    JOB_POLL_INTERVAL_SECONDS: float = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "0.5"))
+
+    # Backpressure: with MAX_QUEUED_JOBS jobs waiting (0 = no limit) new
+    # searches are refused with 429 and Retry-After.
+    MAX_QUEUED_JOBS: int = int(os.getenv("MAX_QUEUED_JOBS", "10000"))
+    QUEUE_FULL_RETRY_AFTER_SECONDS: int = int(os.getenv("QUEUE_FULL_RETRY_AFTER_SECONDS", "5"))
+
+    # Fair scheduling. Free slots go to the (tenant, priority) flow with the
+    # fewest running jobs relative to its class weight; a tenant never runs
+    # more than TENANT_MAX_CONCURRENT_JOBS at once (0 = no cap).
+    PRIORITY_WEIGHTS: str = os.getenv("PRIORITY_WEIGHTS", "high:8,normal:4,low:1")
+    TENANT_MAX_CONCURRENT_JOBS: int = int(os.getenv("TENANT_MAX_CONCURRENT_JOBS", "0"))
+
+    # Route generation runs in a pool of spawned worker processes so CPU-heavy
+    # generators do not block the event loop; 0 runs it inline on the loop.
+    # ROUTE_GENERATOR_QUEUE_SIZE bounds how many batches a worker may produce
+    # ahead of delivery.
+    ROUTE_GENERATOR_WORKERS: int = int(os.getenv("ROUTE_GENERATOR_WORKERS", str(os.cpu_count() or 1)))
+    ROUTE_GENERATOR_QUEUE_SIZE: int = int(os.getenv("ROUTE_GENERATOR_QUEUE_SIZE", "4"))
+    # Route file (JSON array, or NDJSON with a .ndjson/.jsonl suffix) streamed
+    # incrementally for each search; empty serves data/example_routes.json.
+    ROUTE_SOURCE_PATH: str = os.getenv("ROUTE_SOURCE_PATH", "")
+    # Binary route dataset shared read-only by all workers through mmap. Built
+    # at startup from ROUTE_SOURCE_PATH (or the example data) when missing or
+    # older than its source; empty disables it.
+    ROUTE_DATASET_PATH: str = os.getenv("ROUTE_DATASET_PATH", "")
+    # Simulated CPU work per generated batch, spent inside the generator.
+    SIMULATED_CPU_SECONDS_PER_BATCH: float = float(os.getenv("SIMULATED_CPU_SECONDS_PER_BATCH", "0"))
+
+    # Simulated processing latency between batches.
+    BATCH_DELAY_MIN_SECONDS: float = float(os.getenv("BATCH_DELAY_MIN_SECONDS", "0.5"))
+    BATCH_DELAY_MAX_SECONDS: float = float(os.getenv("BATCH_DELAY_MAX_SECONDS", "2.0"))
+
+    # Callback delivery. Failed posts are retried with exponential backoff and
+    # full jitter; after CIRCUIT_FAILURE_THRESHOLD consecutive failures a
+    # callback host is skipped for CIRCUIT_RESET_SECONDS. Batches that still
+    # cannot be delivered go to the outbox in the job store and are retried
+    # in the background.
+    CALLBACK_TIMEOUT_SECONDS: float = float(os.getenv("CALLBACK_TIMEOUT_SECONDS", "30"))
+    CALLBACK_MAX_RETRIES: int = int(os.getenv("CALLBACK_MAX_RETRIES", "3"))
+    CALLBACK_BACKOFF_BASE_SECONDS: float = float(os.getenv("CALLBACK_BACKOFF_BASE_SECONDS", "0.5"))
+    CALLBACK_BACKOFF_MAX_SECONDS: float = float(os.getenv("CALLBACK_BACKOFF_MAX_SECONDS", "10"))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    OUTBOX_INTERVAL_SECONDS: float = float(os.getenv("OUTBOX_INTERVAL_SECONDS", "5"))
+    OUTBOX_BACKOFF_MAX_SECONDS: float = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "30"))
+
+
+settings = Settings()
@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DeliveryError(Exception):
+    """A callback could not be delivered.
+
+    ``retryable`` is False when the backend answered with a client error
+    (e.g. 404 for an unknown search); sending the same batch again would not help.
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: float | None = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class SearchGoneError(DeliveryError):
+    """The backend answered 410: the search was cancelled (or has finished) and wants no more updates."""
+
+    def __init__(self, message: str):
+        super().__init__(message, retryable=False)
+
+
+class CircuitOpenError(DeliveryError):
+    """The destination's circuit breaker is open; nothing was sent."""
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter for the ``attempt``-th retry (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one callback destination.
+
+    Opens after ``failure_threshold`` failures in a row. While open every call
+    is refused until ``reset_seconds`` have passed; then a single trial call is
+    let through, which closes the breaker on success or reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class CallbackDelivery:
+    """Posts search updates to the backend with retries, circuit breaking and an outbox.
+
+    ``send`` tries a batch a few times inline; if it still fails it is written
+    to the job store's outbox and reported as handled, so the search keeps
+    going. ``drain_outbox`` (run periodically by ``run_outbox``) retries parked
+    batches. Batches of one job are always delivered in order: once a job has
+    anything in the outbox, its later batches are queued behind it.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        client: httpx.AsyncClient,
+        timeout: float,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        failure_threshold: int,
+        reset_seconds: float,
+        outbox_backoff_max: float,
+        outbox_max_attempts: int,
+    ):
+        self.store = store
+        self.client = client
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.outbox_backoff_max = outbox_backoff_max
+        self.outbox_max_attempts = outbox_max_attempts
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        destination = f"{parts.scheme}://{parts.netloc}"
+        if destination not in self._breakers:
+            self._breakers[destination] = CircuitBreaker(self.failure_threshold, self.reset_seconds)
+        return self._breakers[destination]
+
+    async def post(self, url: str, payload: dict) -> None:
+        """One delivery attempt through the destination's circuit breaker."""
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for {url}")
+        try:
+            response = await self.client.post(url, json=payload, timeout=self.timeout)
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            raise DeliveryError(f"{type(e).__name__}: {e}") from e
+
+        if response.status_code < 400:
+            breaker.record_success()
+            return
+        message = f"HTTP {response.status_code} from {url}"
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            breaker.record_failure()
+            raise DeliveryError(message, retry_after=_retry_after(response))
+        # The destination is up and answering; it just does not want this update.
+        breaker.record_success()
+        if response.status_code == 410:
+            raise SearchGoneError(message)
+        raise DeliveryError(message, retryable=False)
+
+    async def post_with_retry(self, url: str, payload: dict) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.post(url, payload)
+                return
+            except CircuitOpenError:
+                raise
+            except DeliveryError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                if e.retry_after is not None:
+                    delay = max(delay, min(e.retry_after, self.backoff_max))
+                logger.warning(f"Callback to {url} failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def send(self, job_id: str, batch_index: int, url: str, payload: dict) -> bool:
+        """Deliver batch ``batch_index`` of ``job_id``, falling back to the outbox.
+
+        Returns True if the backend accepted it now, False if it was parked in
+        the outbox. Raises DeliveryError only for non-retryable rejections.
+        """
+        if not self.store.has_outbox(job_id):
+            try:
+                await self.post_with_retry(url, payload)
+                return True
+            except DeliveryError as e:
+                if not e.retryable:
+                    raise
+                logger.warning(f"Spilling batch {batch_index} of job {job_id} to the outbox: {e}")
+        self.store.spill(
+            job_id,
+            batch_index,
+            url,
+            json.dumps(payload),
+            time.time() + backoff_delay(0, self.backoff_base, self.outbox_backoff_max),
+        )
+        return False
+
+    async def drain_outbox(self, limit: int = 100) -> int:
+        """Retry parked batches whose backoff has elapsed; returns the number delivered."""
+        delivered = 0
+        for job_id in self.store.due_outbox_jobs(time.time(), limit):
+            while (entry := self.store.outbox_head(job_id)) is not None:
+                try:
+                    await self.post(entry.callback_url, json.loads(entry.payload))
+                except CircuitOpenError:
+                    break
+                except DeliveryError as e:
+                    if not e.retryable:
+                        dropped = self.store.discard_outbox(job_id)
+                        logger.error(f"Backend rejected job {job_id} ({e}); dropped {dropped} outbox batches")
+                        break
+                    attempts = self.store.outbox_retry_later(
+                        job_id,
+                        entry.batch_index,
+                        time.time() + backoff_delay(entry.attempts + 1, self.backoff_base, self.outbox_backoff_max),
+                        str(e),
+                    )
+                    if attempts >= self.outbox_max_attempts:
+                        dropped = self.store.discard_outbox(job_id)
+                        logger.error(f"Giving up on job {job_id} after {attempts} attempts; dropped {dropped} batches")
+                    break
+                self.store.outbox_delivered(job_id, entry.batch_index)
+                delivered += 1
+        if delivered:
+            logger.info(f"Delivered {delivered} batches from the outbox")
+        return delivered
+
+    async def run_outbox(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                await self.drain_outbox()
+            except Exception as e:
+                logger.error(f"Outbox drain failed: {e}")
+            await asyncio.sleep(interval_seconds)
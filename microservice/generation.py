@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Callable, Sequence
+
+from get_routes import count_batches, get_routes, load_example_routes
+from route_dataset import RouteDataset, is_dataset
+
+logger = logging.getLogger(__name__)
+
+# Route data loaded once per worker process by _init_worker; None when routes
+# are streamed from a file instead.
+_routes: Sequence | None = None
+
+_POLL_SECONDS = 0.2
+
+
+def _load_routes(route_path: str | None) -> Sequence | None:
+    """The example routes, a mapped ``RouteDataset``, or None for a route file to stream."""
+    if not route_path:
+        return load_example_routes()
+    if is_dataset(route_path):
+        return RouteDataset(route_path)
+    return None
+
+
+def _init_worker(route_path: str | None = None) -> None:
+    global _routes
+    _routes = _load_routes(route_path)
+
+
+def _burn_cpu(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _iter_batches(smiles, batch_size, start_batch, cpu_seconds, routes, route_path):
+    path = route_path if routes is None else None
+    for batch, is_last in get_routes(smiles, batch_size, routes=routes, path=path, start_batch=start_batch):
+        if cpu_seconds:
+            _burn_cpu(cpu_seconds)
+        yield batch, is_last
+
+
+def _generate_into(smiles, batch_size, start_batch, cpu_seconds, route_path, results, cancel) -> None:
+    """Worker-process entry point: push ``("batch", batch, is_last)`` items into ``results``.
+
+    Starts with ``("total", expected_batches)`` and always finishes with
+    ``("done",)`` or ``("error", message)``. Stops early once ``cancel`` is
+    set, including while blocked on a full queue.
+    """
+    try:
+        results.put(("total", count_batches(batch_size, routes=_routes, path=route_path)))
+        for batch, is_last in _iter_batches(smiles, batch_size, start_batch, cpu_seconds, _routes, route_path):
+            while not cancel.is_set():
+                try:
+                    results.put(("batch", batch, is_last), timeout=_POLL_SECONDS)
+                    break
+                except queue.Full:
+                    continue
+            if cancel.is_set():
+                return
+        results.put(("done",))
+    except Exception as e:
+        results.put(("error", f"{type(e).__name__}: {e}"))
+
+
+def _get(results, timeout: float):
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+
+class RouteGenerator:
+    """Runs route generation off the event loop in a pool of worker processes.
+
+    Workers are started with the ``spawn`` method and load the route data
+    once: the example routes, or the dataset at ``route_path`` when it is a
+    ``RouteDataset`` file, which all workers map and share. Any other
+    ``route_path`` is a route file (JSON array or NDJSON) streamed per search. ``stream`` yields batches as the worker produces them through a
+    bounded queue, so a slow consumer applies backpressure; leaving the
+    iterator early (or cancelling the task consuming it) stops the worker at
+    the next batch. With ``workers=0`` generation runs inline on the event
+    loop, which is only suitable for cheap generators and tests.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        cpu_seconds_per_batch: float = 0.0,
+        route_path: str | Path | None = None,
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.cpu_seconds_per_batch = cpu_seconds_per_batch
+        self.route_path = str(route_path) if route_path else None
+        # Route data for inline generation; pool workers load their own.
+        self._routes = _load_routes(self.route_path) if workers == 0 else None
+        self._executor: ProcessPoolExecutor | None = None
+        self._manager = None
+        if workers > 0:
+            context = multiprocessing.get_context("spawn")
+            self._manager = context.Manager()
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.route_path,),
+            )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+
+    async def stream(
+        self,
+        smiles: str,
+        batch_size: int = 1,
+        start_batch: int = 0,
+        on_total: Callable[[int], None] | None = None,
+    ) -> AsyncIterator[tuple[list, bool]]:
+        """Yield ``(batch, is_last)`` pairs, skipping the first ``start_batch`` batches.
+
+        ``on_total`` is called with the expected total number of batches
+        (including skipped ones) before the first batch is yielded.
+        """
+        if self._executor is None:
+            if on_total is not None:
+                on_total(count_batches(batch_size, routes=self._routes, path=self.route_path))
+            for item in _iter_batches(
+                smiles, batch_size, start_batch, self.cpu_seconds_per_batch, self._routes, self.route_path
+            ):
+                yield item
+            return
+
+        results = self._manager.Queue(maxsize=self.queue_size)
+        cancel = self._manager.Event()
+        future = asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            _generate_into,
+            smiles,
+            batch_size,
+            start_batch,
+            self.cpu_seconds_per_batch,
+            self.route_path,
+            results,
+            cancel,
+        )
+        try:
+            while True:
+                item = await asyncio.to_thread(_get, results, _POLL_SECONDS)
+                if item is None:
+                    if future.done():
+                        # The worker died without reporting back (e.g. BrokenProcessPool).
+                        future.result()
+                        raise RuntimeError("Route generation worker exited unexpectedly")
+                    continue
+                if item[0] == "total":
+                    if on_total is not None:
+                        on_total(item[1])
+                    continue
+                if item[0] == "done":
+                    return
+                if item[0] == "error":
+                    raise RuntimeError(f"Route generation failed: {item[1]}")
+                yield item[1], item[2]
+        finally:
+            if not future.done():
+                cancel.set()
+                logger.debug(f"Cancelled route generation for {smiles}")
+
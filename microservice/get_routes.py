@@ -1,6 +1,21 @@
+import codecs
+import itertools
 import json
+import mmap
+import os
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, Sequence
+
+_NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+_WHITESPACE = " \t\r\n"
+# Bytes decoded at a time from a JSON array file; memory use is bounded by
+# this plus the largest single route.
+_CHUNK_BYTES = 1 << 20
+# Largest single route read from a file. Malformed input (an unclosed string
+# or bracket) fails once this much is buffered instead of reading to the end.
+_MAX_ROUTE_BYTES = 64 << 20
+# Routes read from the start of a file to estimate how many it holds.
+_SAMPLE_ROUTES = 32
 
 
 def load_example_routes():
@@ -9,10 +24,158 @@ def load_example_routes():
         return json.load(f)
 
 
-def get_routes(smiles: str, batch_size: int = 1) -> Iterator[tuple[list, bool]]:
-    all_routes = load_example_routes()
-    total_routes = len(all_routes)
-    for i in range(0, total_routes, batch_size):
-        batch = all_routes[i : i + batch_size]
-        is_last = (i + batch_size) >= total_routes
-        yield batch, is_last
+def _iter_ndjson(mm: mmap.mmap) -> Iterator[tuple[dict, int]]:
+    pos, size = 0, len(mm)
+    while pos < size:
+        end = mm.find(b"\n", pos)
+        if end == -1:
+            end = size
+        if end - pos > _MAX_ROUTE_BYTES:
+            raise ValueError(f"Route at offset {pos} is longer than {_MAX_ROUTE_BYTES} bytes")
+        line = mm[pos:end].strip()
+        pos = end + 1
+        if line:
+            yield json.loads(line), min(pos, size)
+
+
+def _iter_json_array(mm: mmap.mmap) -> Iterator[tuple[dict, int]]:
+    """Decode the elements of a top-level JSON array one at a time.
+
+    The file is decoded in ``_CHUNK_BYTES`` pieces; ``raw_decode`` parses one
+    element from the buffer and more input is appended only when an element
+    straddles the end of it, up to ``_MAX_ROUTE_BYTES`` for one element.
+    Offsets are in characters, which equal bytes for the ASCII JSON route
+    dumps are written in.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    size = len(mm)
+    offset = 0
+    buffer = ""
+    index = 0
+    consumed = 0
+
+    def fill() -> bool:
+        nonlocal offset, buffer, index, consumed
+        if offset >= size:
+            return False
+        chunk = mm[offset:offset + _CHUNK_BYTES]
+        offset += len(chunk)
+        consumed += index
+        buffer = buffer[index:] + utf8.decode(chunk, final=offset >= size)
+        index = 0
+        return True
+
+    def peek(skip: str) -> str | None:
+        """Advance past any of ``skip``; return the next character, or None at end of input."""
+        nonlocal index
+        while True:
+            while index < len(buffer) and buffer[index] in skip:
+                index += 1
+            if index < len(buffer):
+                return buffer[index]
+            if not fill():
+                return None
+
+    if peek(_WHITESPACE) != "[":
+        raise ValueError("Route file must contain a JSON array of routes")
+    index += 1
+    while True:
+        char = peek(_WHITESPACE + ",")
+        if char is None:
+            raise ValueError("Route file ends inside the JSON array")
+        if char == "]":
+            return
+        while True:
+            try:
+                route, end = decoder.raw_decode(buffer, index)
+                break
+            except json.JSONDecodeError as e:
+                if len(buffer) - index > _MAX_ROUTE_BYTES:
+                    raise ValueError(
+                        f"Route at offset {consumed + index} is not valid JSON "
+                        f"within {_MAX_ROUTE_BYTES} bytes: {e.msg}"
+                    ) from e
+                if not fill():
+                    raise
+        index = end
+        yield route, consumed + index
+
+
+def _iter_route_file(path: str | Path) -> Iterator[tuple[dict, int]]:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if str(path).endswith(_NDJSON_SUFFIXES):
+                yield from _iter_ndjson(mm)
+            else:
+                yield from _iter_json_array(mm)
+
+
+def iter_route_file(path: str | Path) -> Iterator[dict]:
+    """Yield the routes in a JSON array or NDJSON (``.ndjson``/``.jsonl``) file one by one.
+
+    The file is memory-mapped and parsed incrementally, so memory use and the
+    time until the first route do not grow with the size of the file.
+    """
+    for route, _ in _iter_route_file(path):
+        yield route
+
+
+def estimate_route_count(path: str | Path) -> int:
+    """Route count of a file, extrapolated from the size of its first routes."""
+    sample = list(itertools.islice(_iter_route_file(path), _SAMPLE_ROUTES))
+    if len(sample) < _SAMPLE_ROUTES:
+        return len(sample)
+    return max(len(sample), round(os.path.getsize(path) * len(sample) / sample[-1][1]))
+
+
+def get_routes(
+    smiles: str,
+    batch_size: int = 1,
+    routes: Sequence | None = None,
+    path: str | Path | None = None,
+    start_batch: int = 0,
+) -> Iterator[tuple[list, bool]]:
+    """Yield ``(batch, is_last)`` pairs from ``routes``, the file at ``path``, or the example data.
+
+    ``routes`` may be any sequence, such as a ``RouteDataset``; batches are
+    sliced from it, so only the routes of each batch are materialised. A file
+    is read as batches are requested, one batch ahead so the last one can be
+    flagged, and is never held in memory as a whole. The first
+    ``start_batch`` batches are skipped.
+    """
+    if routes is None and path is not None:
+        routes = itertools.islice(iter_route_file(path), start_batch * batch_size, None)
+        pending = None
+        for batch in _chunked(routes, batch_size):
+            if pending is not None:
+                yield pending, False
+            pending = batch
+        if pending is not None:
+            yield pending, True
+        return
+    if routes is None:
+        routes = load_example_routes()
+    for start in range(start_batch * batch_size, len(routes), batch_size):
+        yield routes[start:start + batch_size], start + batch_size >= len(routes)
+
+
+def _chunked(routes, batch_size: int) -> Iterator[list]:
+    iterator = iter(routes)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
+
+
+def count_batches(batch_size: int = 1, routes: Sequence | None = None, path: str | Path | None = None) -> int:
+    """Number of batches ``get_routes`` will yield for the same arguments.
+
+    Exact for route sequences; for a file it is an estimate that costs the
+    same whatever the file's size.
+    """
+    if routes is None and path is not None:
+        total = estimate_route_count(path)
+    else:
+        total = len(routes if routes is not None else load_example_routes())
+    return -(-total // batch_size)
@@ -0,0 +1,308 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    smiles TEXT NOT NULL,
+    callback_url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    acked_batches INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS outbox (
+    job_id TEXT NOT NULL,
+    batch_index INTEGER NOT NULL,
+    callback_url TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, batch_index)
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_next_attempt ON outbox (next_attempt_at);
+"""
+
+
+@dataclass
+class OutboxEntry:
+    job_id: str
+    batch_index: int
+    callback_url: str
+    payload: str
+    attempts: int
+    next_attempt_at: float
+    last_error: str | None
+    created_at: float
+
+
+@dataclass
+class Job:
+    id: str
+    smiles: str
+    callback_url: str
+    status: str
+    acked_batches: int
+    attempts: int
+    lease_owner: str | None
+    lease_expires_at: float | None
+    error: str | None
+    created_at: float
+    updated_at: float
+    priority: str = "normal"
+    tenant: str = "default"
+
+
+# select(candidates, running, limit) -> jobs to claim; ``candidates`` are
+# claimable jobs oldest first, ``running`` counts live jobs per (tenant, priority).
+SelectJobs = Callable[[list[Job], dict[tuple[str, str], int], int], list[Job]]
+
+
+def _oldest_first(candidates: list[Job], running: dict[tuple[str, str], int], limit: int) -> list[Job]:
+    return candidates[:limit]
+
+
+class JobStore:
+    """Persistent job queue backed by a local SQLite file.
+
+    Workers claim jobs under a time-limited lease and acknowledge each batch
+    they deliver. A job whose lease runs out (its worker crashed or hung) is
+    claimable again and resumes after its last acknowledged batch. All write
+    methods that take an ``owner`` are no-ops unless that owner still holds
+    the lease, so a worker that lost its lease cannot clobber the new owner.
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+
+    def _migrate(self) -> None:
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "priority" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN priority TEXT NOT NULL DEFAULT 'normal'")
+        if "tenant" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN tenant TEXT NOT NULL DEFAULT 'default'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_flow ON jobs (status, tenant, priority, created_at)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(
+        self, job_id: str, smiles: str, callback_url: str, priority: str = "normal", tenant: str = "default"
+    ) -> bool:
+        """Add a job; returns False if a job with this id already exists."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, smiles, callback_url, status, priority, tenant, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, smiles, callback_url, QUEUED, priority, tenant, now, now),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**row) if row else None
+
+    def claim(
+        self, owner: str, lease_seconds: float, limit: int, select: SelectJobs | None = None
+    ) -> list[Job]:
+        """Lease up to ``limit`` queued jobs, or running jobs whose lease expired.
+
+        ``select`` decides which of the claimable jobs to take (oldest first by
+        default). It sees at most ``limit`` candidates per (tenant, priority)
+        plus the number of jobs each of those currently has running.
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                candidates = [
+                    Job(**{key: row[key] for key in row.keys() if key != "flow_rank"})
+                    for row in self._conn.execute(
+                        "SELECT * FROM ("
+                        "  SELECT *, ROW_NUMBER() OVER (PARTITION BY tenant, priority ORDER BY created_at) AS flow_rank"
+                        "  FROM jobs WHERE status = ? OR (status = ? AND lease_expires_at < ?)"
+                        ") WHERE flow_rank <= ? ORDER BY created_at",
+                        (QUEUED, RUNNING, now, limit),
+                    )
+                ]
+                running = self._running_by_flow(now)
+                jobs = (select or _oldest_first)(candidates, running, limit) if candidates else []
+                self._conn.executemany(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    [(RUNNING, owner, now + lease_seconds, now, job.id) for job in jobs],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for job in jobs:
+            job.status = RUNNING
+            job.lease_owner = owner
+            job.lease_expires_at = now + lease_seconds
+            job.attempts += 1
+            job.updated_at = now
+        return jobs
+
+    def _update_owned(self, job_id: str, owner: str, assignments: str, params: tuple) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = ?",
+                (*params, time.time(), job_id, owner, RUNNING),
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        return self._update_owned(job_id, owner, "lease_expires_at = ?", (time.time() + lease_seconds,))
+
+    def ack_batch(self, job_id: str, owner: str, acked_batches: int) -> bool:
+        """Record that the first ``acked_batches`` batches have been delivered."""
+        return self._update_owned(job_id, owner, "acked_batches = ?", (acked_batches,))
+
+    def complete(self, job_id: str, owner: str) -> bool:
+        return self._update_owned(
+            job_id, owner, "status = ?, lease_owner = NULL, lease_expires_at = NULL", (COMPLETED,)
+        )
+
+    def fail(self, job_id: str, owner: str, error: str) -> bool:
+        return self._update_owned(
+            job_id, owner, "status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL", (FAILED, error)
+        )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job and drop its undelivered batches.
+
+        A worker running the job elsewhere notices at its next lease renewal.
+        Returns False if the job does not exist or has already finished.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+            self._conn.execute("DELETE FROM outbox WHERE job_id = ?", (job_id,))
+        return cursor.rowcount == 1
+
+    def release(self, owner: str) -> int:
+        """Hand every job leased by ``owner`` back to the queue (graceful shutdown)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE lease_owner = ? AND status = ?",
+                (QUEUED, time.time(), owner, RUNNING),
+            )
+        return cursor.rowcount
+
+    def _running_by_flow(self, now: float) -> dict[tuple[str, str], int]:
+        rows = self._conn.execute(
+            "SELECT tenant, priority, COUNT(*) AS n FROM jobs "
+            "WHERE status = ? AND lease_expires_at >= ? GROUP BY tenant, priority",
+            (RUNNING, now),
+        ).fetchall()
+        return {(row["tenant"], row["priority"]): row["n"] for row in rows}
+
+    def running_by_flow(self) -> dict[tuple[str, str], int]:
+        """Live (leased) jobs per (tenant, priority)."""
+        with self._lock:
+            return self._running_by_flow(time.time())
+
+    def queued_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def spill(self, job_id: str, batch_index: int, callback_url: str, payload: str, next_attempt_at: float) -> None:
+        """Park an undeliverable batch in the outbox; re-spilling the same batch is a no-op."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (job_id, batch_index, callback_url, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, batch_index, callback_url, payload, next_attempt_at, time.time()),
+            )
+
+    def has_outbox(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM outbox WHERE job_id = ? LIMIT 1", (job_id,)).fetchone()
+        return row is not None
+
+    def outbox_head(self, job_id: str) -> OutboxEntry | None:
+        """The oldest undelivered batch of ``job_id``; batches must go out in order."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM outbox WHERE job_id = ? ORDER BY batch_index LIMIT 1", (job_id,)
+            ).fetchone()
+        return OutboxEntry(**row) if row else None
+
+    def due_outbox_jobs(self, now: float, limit: int) -> list[str]:
+        """Jobs whose oldest outbox batch is due for another delivery attempt."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT o.job_id FROM outbox o "
+                "WHERE o.next_attempt_at <= ? "
+                "AND o.batch_index = (SELECT MIN(batch_index) FROM outbox WHERE job_id = o.job_id) "
+                "ORDER BY o.next_attempt_at LIMIT ?",
+                (now, limit),
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def outbox_delivered(self, job_id: str, batch_index: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE job_id = ? AND batch_index = ?", (job_id, batch_index))
+
+    def outbox_retry_later(self, job_id: str, batch_index: int, next_attempt_at: float, error: str) -> int:
+        """Record a failed attempt and reschedule; returns the attempt count so far."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? "
+                "WHERE job_id = ? AND batch_index = ?",
+                (next_attempt_at, error, job_id, batch_index),
+            )
+            row = self._conn.execute(
+                "SELECT attempts FROM outbox WHERE job_id = ? AND batch_index = ?", (job_id, batch_index)
+            ).fetchone()
+        return row["attempts"] if row else 0
+
+    def discard_outbox(self, job_id: str) -> int:
+        """Drop every pending batch of ``job_id`` (the backend will not accept them)."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM outbox WHERE job_id = ?", (job_id,))
+        return cursor.rowcount
+
+    def outbox_size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
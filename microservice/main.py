@@ -1,100 +1,192 @@
 import asyncio
+import functools
 import logging
 import random
+import time
+import uuid
+from contextlib import aclosing, asynccontextmanager
+from typing import Callable
 
 import httpx
-from fastapi import FastAPI, status
+from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 
-from models import SearchRequest, SearchUpdate, Route, Molecule, Reaction, CatalogEntry
-from get_routes import get_routes
+from config import settings
+from delivery import CallbackDelivery, DeliveryError, SearchGoneError
+import metrics
+from job_store import Job, JobStore
+from models import (
+    SearchRequest,
+    SearchBatchRequest,
+    SearchBatchResponse,
+    SearchBatchResult,
+    SearchUpdate,
+    Route,
+    Molecule,
+    Reaction,
+    CatalogEntry,
+)
+from generation import RouteGenerator
+from route_dataset import ensure_dataset
+from scheduling import parse_weights, pick_jobs
+from worker import JobWorker, LeaseLostError
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=getattr(logging, settings.LOG_LEVEL),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Reatrosynthesis Microservice",
-    description="Microservice for processing retrosynthesis searches",
-    version="1.0.0",
-)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def estimate_progress(batch_idx: int, is_last: bool, expected_batches: int | None, start_batch: int, elapsed: float) -> dict:
+    """``progress``, ``expected_batches`` and ``eta_seconds`` for the update carrying ``batch_idx``.
 
+    The ETA extrapolates the pace of this attempt: the batches produced since
+    ``start_batch`` in ``elapsed`` seconds.
+    """
+    if is_last:
+        return {"progress": 1.0, "expected_batches": batch_idx, "eta_seconds": 0.0}
+    if not expected_batches:
+        return {}
+    # The expected total is an estimate; never report completion before the last batch.
+    expected = max(expected_batches, batch_idx + 1)
+    return {
+        "progress": round(batch_idx / expected, 4),
+        "expected_batches": expected,
+        "eta_seconds": round(elapsed / (batch_idx - start_batch) * (expected - batch_idx), 3),
+    }
 
-async def process_search_async(smiles: str, callback_url: str, batch_size: int = 1):
-    logger.info(f"Starting search processing for SMILES: {smiles}, callback: {callback_url}")
 
-    try:
-        route_batches = list(get_routes(smiles, batch_size=batch_size))
-        total_batches = len(route_batches)
-
-        for batch_idx, (batch, is_last) in enumerate(route_batches, 1):
-            logger.info(f"Processing batch {batch_idx}/{total_batches} ({len(batch)} routes)")
-
-            routes = []
-            for route_data in batch:
-                molecules = [
-                    Molecule(
-                        smiles=mol["smiles"],
-                        catalog_entries=[
-                            CatalogEntry(**entry) for entry in mol.get("catalog_entries", [])
-                        ]
-                    )
-                    for mol in route_data.get("molecules", [])
-                ]
+def build_update(batch: list, is_last: bool, batch_idx: int, **progress) -> SearchUpdate:
+    # Routes in a batch share building blocks; build one model per distinct
+    # catalog entry and one string per distinct SMILES instead of one per use.
+    strings: dict[str, str] = {}
+    entries: dict[tuple, CatalogEntry] = {}
 
-                reactions = [
-                    Reaction(**rxn) for rxn in route_data.get("reactions", [])
-                ]
+    def string(value: str) -> str:
+        return strings.setdefault(value, value)
+
+    def catalog_entry(entry: dict) -> CatalogEntry:
+        key = (entry["vendor_id"], entry["catalog_name"], entry["lead_time_weeks"])
+        model = entries.get(key)
+        if model is None:
+            model = entries[key] = CatalogEntry(
+                vendor_id=string(entry["vendor_id"]),
+                catalog_name=string(entry["catalog_name"]),
+                lead_time_weeks=entry["lead_time_weeks"],
+            )
+        return model
 
-                routes.append(Route(
-                    score=route_data["score"],
-                    molecules=molecules,
-                    reactions=reactions
-                ))
+    routes = []
+    for route_data in batch:
+        molecules = [
+            Molecule(
+                smiles=string(mol["smiles"]),
+                catalog_entries=[
+                    catalog_entry(entry) for entry in mol.get("catalog_entries", [])
+                ]
+            )
+            for mol in route_data.get("molecules", [])
+        ]
 
-            update = SearchUpdate(
-                routes=routes,
-                is_complete=is_last
+        reactions = [
+            Reaction(
+                name=string(rxn["name"]),
+                target=string(rxn["target"]),
+                sources=[string(source) for source in rxn["sources"]],
             )
+            for rxn in route_data.get("reactions", [])
+        ]
 
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.post(
-                        callback_url,
-                        json=update.dict(),
-                        timeout=30.0
-                    )
-                    response.raise_for_status()
-                    logger.info(f"Successfully posted batch {batch_idx}/{total_batches}")
-                except Exception as e:
-                    logger.error(f"Failed to post batch {batch_idx}: {e}")
-                    error_update = SearchUpdate(
-                        routes=[],
-                        is_complete=True,
-                        error_message=f"Failed to process batch {batch_idx}: {str(e)}"
-                    )
-                    try:
-                        await client.post(callback_url, json=error_update.dict(), timeout=30.0)
-                    except:
-                        pass
-                    raise
-
-            if not is_last:
-                delay = random.uniform(0.5, 2.0)
-                await asyncio.sleep(delay)
+        routes.append(Route(
+            score=route_data["score"],
+            molecules=molecules,
+            reactions=reactions
+        ))
+
+    return SearchUpdate(
+        routes=routes,
+        is_complete=is_last,
+        batch_index=batch_idx,
+        **progress
+    )
+
+
+async def deliver_batch(
+    job_id: str,
+    batch_idx: int,
+    batch: list,
+    is_last: bool,
+    callback_url: str,
+    delivery: CallbackDelivery,
+    progress: dict | None = None,
+) -> None:
+    update = build_update(batch, is_last, batch_idx, **(progress or {}))
+    try:
+        if await delivery.send(job_id, batch_idx, callback_url, update.dict()):
+            logger.info(f"Successfully posted batch {batch_idx} ({len(update.routes)} routes)")
+    except SearchGoneError:
+        raise
+    except DeliveryError as e:
+        logger.error(f"Failed to post batch {batch_idx}: {e}")
+        error_update = SearchUpdate(
+            routes=[],
+            is_complete=True,
+            error_message=f"Failed to process batch {batch_idx}: {str(e)}"
+        )
+        try:
+            await delivery.post(callback_url, error_update.dict())
+        except DeliveryError:
+            pass
+        raise
+
+
+async def process_search_async(
+    job_id: str,
+    smiles: str,
+    callback_url: str,
+    delivery: CallbackDelivery,
+    generator: RouteGenerator,
+    batch_size: int = 1,
+    start_batch: int = 0,
+    ack_batch: Callable[[int], None] | None = None,
+):
+    """Generate routes for ``smiles`` and post them batch by batch to ``callback_url``.
+
+    Batches before ``start_batch`` were already delivered by an earlier attempt
+    and are skipped. ``ack_batch(n)`` is called once the n-th batch (1-based)
+    has been accepted by the backend or durably parked in the outbox.
+    """
+    logger.info(f"Starting search processing for SMILES: {smiles}, callback: {callback_url}")
+
+    expected_batches = None
+
+    def set_expected(total: int) -> None:
+        nonlocal expected_batches
+        expected_batches = total
+
+    try:
+        batch_idx = start_batch
+        started = time.monotonic()
+        stream = generator.stream(smiles, batch_size=batch_size, start_batch=start_batch, on_total=set_expected)
+        async with aclosing(stream) as batches:
+            async for batch, is_last in batches:
+                batch_idx += 1
+                progress = estimate_progress(
+                    batch_idx, is_last, expected_batches, start_batch, time.monotonic() - started
+                )
+                await deliver_batch(job_id, batch_idx, batch, is_last, callback_url, delivery, progress)
+                if ack_batch is not None:
+                    ack_batch(batch_idx)
+
+                if not is_last:
+                    delay = random.uniform(settings.BATCH_DELAY_MIN_SECONDS, settings.BATCH_DELAY_MAX_SECONDS)
+                    await asyncio.sleep(delay)
 
         logger.info(f"Completed search processing for SMILES: {smiles}")
 
+    except (LeaseLostError, DeliveryError):
+        raise
     except Exception as e:
         logger.error(f"Error processing search: {e}")
         error_update = SearchUpdate(
@@ -103,29 +195,187 @@ async def process_search_async(smiles: str, callback_url: str, batch_size: int =
             error_message=str(e)
         )
         try:
-            async with httpx.AsyncClient() as client:
-                await client.post(callback_url, json=error_update.dict(), timeout=30.0)
-        except:
+            await delivery.post_with_retry(callback_url, error_update.dict())
+        except DeliveryError:
             pass
         raise
 
 
+async def run_job(job: Job, ack_batch: Callable[[int], None]) -> None:
+    try:
+        await process_search_async(
+            job_id=job.id,
+            smiles=job.smiles,
+            callback_url=job.callback_url,
+            delivery=app.state.delivery,
+            generator=app.state.generator,
+            batch_size=1,
+            start_batch=job.acked_batches,
+            ack_batch=ack_batch,
+        )
+    except SearchGoneError:
+        logger.info(f"Search for job {job.id} was cancelled by the backend; stopping")
+        app.state.job_store.cancel(job.id)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    store = JobStore(settings.JOB_STORE_PATH)
+    worker = JobWorker(
+        store=store,
+        owner=settings.WORKER_ID,
+        run_job=run_job,
+        max_concurrent=settings.MAX_CONCURRENT_JOBS,
+        lease_seconds=settings.JOB_LEASE_SECONDS,
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        select=functools.partial(
+            pick_jobs,
+            weights=parse_weights(settings.PRIORITY_WEIGHTS),
+            tenant_cap=settings.TENANT_MAX_CONCURRENT_JOBS,
+        ),
+    )
+    client = httpx.AsyncClient()
+    delivery = CallbackDelivery(
+        store=store,
+        client=client,
+        timeout=settings.CALLBACK_TIMEOUT_SECONDS,
+        max_retries=settings.CALLBACK_MAX_RETRIES,
+        backoff_base=settings.CALLBACK_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.CALLBACK_BACKOFF_MAX_SECONDS,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds=settings.CIRCUIT_RESET_SECONDS,
+        outbox_backoff_max=settings.OUTBOX_BACKOFF_MAX_SECONDS,
+        outbox_max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    )
+    app.state.job_store = store
+    app.state.worker = worker
+    app.state.delivery = delivery
+    route_path = settings.ROUTE_SOURCE_PATH
+    if settings.ROUTE_DATASET_PATH:
+        if ensure_dataset(settings.ROUTE_DATASET_PATH, route_path or None):
+            logger.info(f"Built route dataset {settings.ROUTE_DATASET_PATH}")
+        route_path = settings.ROUTE_DATASET_PATH
+    app.state.generator = RouteGenerator(
+        workers=settings.ROUTE_GENERATOR_WORKERS,
+        queue_size=settings.ROUTE_GENERATOR_QUEUE_SIZE,
+        cpu_seconds_per_batch=settings.SIMULATED_CPU_SECONDS_PER_BATCH,
+        route_path=route_path,
+    )
+    # Leases still held under our own id belong to a previous run of this
+    # worker that died; reclaim them now rather than waiting for expiry.
+    reclaimed = store.release(settings.WORKER_ID)
+    logger.info(f"Job store at {settings.JOB_STORE_PATH}: {store.counts()} ({reclaimed} reclaimed)")
+    worker.start()
+    outbox_task = asyncio.create_task(delivery.run_outbox(settings.OUTBOX_INTERVAL_SECONDS))
+    yield
+
+    logger.info("Shutting down...")
+    outbox_task.cancel()
+    await asyncio.gather(outbox_task, return_exceptions=True)
+    await worker.stop()
+    app.state.generator.close()
+    await client.aclose()
+    store.close()
+
+
+app = FastAPI(
+    title="Reatrosynthesis Microservice",
+    description="Microservice for processing retrosynthesis searches",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+def reject_if_saturated(incoming: int) -> None:
+    if not settings.MAX_QUEUED_JOBS:
+        return
+    queued = app.state.job_store.queued_count()
+    if queued + incoming > settings.MAX_QUEUED_JOBS:
+        logger.warning(f"Refusing {incoming} searches: {queued} jobs already queued")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Job queue is full ({queued} queued)",
+            headers={"Retry-After": str(settings.QUEUE_FULL_RETRY_AFTER_SECONDS)},
+        )
+
+
+def enqueue_search(request: SearchRequest) -> str:
+    # The backend's search id doubles as the job id, which makes retried
+    # start_search calls idempotent.
+    job_id = request.search_id or str(uuid.uuid4())
+    if not app.state.job_store.enqueue(
+        job_id, request.smiles, request.callback_url, request.priority, request.tenant
+    ):
+        logger.info(f"Job {job_id} already queued; ignoring duplicate request")
+    return job_id
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    store = app.state.job_store
+    return {
+        "jobs": store.counts(),
+        "running": [
+            {"tenant": tenant, "priority": priority, "jobs": count}
+            for (tenant, priority), count in sorted(store.running_by_flow().items())
+        ],
+        "queue_wait_seconds": {
+            priority: recorder.summary() for priority, recorder in sorted(metrics.queue_wait_seconds.items())
+        },
+        "active_jobs": app.state.worker.active_jobs,
+    }
+
+
 @app.post("/start_search", status_code=status.HTTP_202_ACCEPTED)
 async def start_search(request: SearchRequest):
     logger.info(f"Received search request for SMILES: {request.smiles}")
+    reject_if_saturated(1)
+
+    job_id = enqueue_search(request)
+    app.state.worker.wake()
+
+    return {"status": "accepted", "message": "Search queued", "job_id": job_id}
+
+
+@app.delete("/search/{job_id}")
+async def cancel_search(job_id: str):
+    store = app.state.job_store
+    if store.cancel(job_id):
+        app.state.worker.cancel(job_id)
+        logger.info(f"Cancelled job {job_id}")
+        return {"status": "cancelled", "job_id": job_id}
+
+    job = store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return {"status": job.status, "job_id": job_id}
+
+
+@app.post("/start_search/batch", status_code=status.HTTP_202_ACCEPTED, response_model=SearchBatchResponse)
+async def start_search_batch(request: SearchBatchRequest):
+    logger.info(f"Received batch of {len(request.searches)} search requests")
+    reject_if_saturated(len(request.searches))
 
-    asyncio.create_task(process_search_async(
-        smiles=request.smiles,
-        callback_url=request.callback_url,
-        batch_size=1
-    ))
+    results = []
+    for search in request.searches:
+        enqueue_search(search)
+        results.append(SearchBatchResult(status="accepted"))
+    app.state.worker.wake()
 
-    return {"status": "accepted", "message": "Search started"}
+    return SearchBatchResponse(results=results)
 
 
 if __name__ == "__main__":
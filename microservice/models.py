@@ -3,6 +3,19 @@ from pydantic import BaseModel
 class SearchRequest(BaseModel):
     smiles: str
     callback_url: str
+    search_id: str | None = None
+    priority: str = "normal"
+    tenant: str = "default"
+
+class SearchBatchRequest(BaseModel):
+    searches: list[SearchRequest]
+
+class SearchBatchResult(BaseModel):
+    status: str
+    error: str | None = None
+
+class SearchBatchResponse(BaseModel):
+    results: list[SearchBatchResult]
 
 class CatalogEntry(BaseModel):
     vendor_id: str
@@ -27,3 +40,7 @@ class SearchUpdate(BaseModel):
     routes: list[Route]
     is_complete: bool = False
     error_message: str | None = None
+    batch_index: int | None = None
+    progress: float | None = None
+    expected_batches: int | None = None
+    eta_seconds: float | None = None
@@ -0,0 +1,263 @@
+"""Preprocessed binary route dataset, memory-mapped read-only by every worker.
+
+The dataset stores routes as flat columns rather than JSON objects:
+
+* every string (SMILES, vendor ids, catalog and reaction names) is stored once
+  in a string table and referred to by index;
+* molecules, catalog entries, reactions and reaction sources are arrays of
+  string indices and numbers;
+* routes, molecules and reactions own contiguous ranges of the next level,
+  described by offset arrays with one more element than there are owners.
+
+The file is built once (``build_dataset``) and opened with ``RouteDataset``,
+which maps it read-only and casts each section to a ``memoryview`` without
+copying it. Processes that open the same file share its pages through the OS
+page cache, so extra workers cost no extra route memory; only the routes of a
+batch being sent are turned back into dicts.
+"""
+import argparse
+import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+MAGIC = b"RTDS"
+VERSION = 1
+
+# Section name and array typecode, in file order.
+SECTIONS = (
+    ("route_scores", "d"),
+    ("route_molecules", "I"),   # offsets into molecule_*, len(routes) + 1
+    ("route_reactions", "I"),   # offsets into reaction_*, len(routes) + 1
+    ("molecule_smiles", "I"),
+    ("molecule_entries", "I"),  # offsets into entry_*, len(molecules) + 1
+    ("entry_vendor", "I"),
+    ("entry_catalog", "I"),
+    ("entry_lead_time", "d"),
+    ("reaction_name", "I"),
+    ("reaction_target", "I"),
+    ("reaction_sources", "I"),  # offsets into sources, len(reactions) + 1
+    ("sources", "I"),
+    ("string_offsets", "Q"),    # offsets into strings, len(string table) + 1
+    ("strings", "B"),           # UTF-8
+)
+
+_HEADER = struct.Struct("<4sHBxI")
+_SECTION = struct.Struct("<QQ")
+_BYTEORDER = {"little": 0, "big": 1}
+_ALIGN = 8
+
+
+def is_dataset(path: str | Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def build_dataset(routes: Iterable[dict], path: str | Path) -> int:
+    """Write ``routes`` to a dataset at ``path``; returns the number of routes.
+
+    The file is written next to ``path`` and renamed into place, so processes
+    racing to build the same dataset never see a partial file.
+    """
+    columns = {name: array.array(code) for name, code in SECTIONS}
+    for name in ("route_molecules", "route_reactions", "molecule_entries", "reaction_sources", "string_offsets"):
+        columns[name].append(0)
+    interned: dict[str, int] = {}
+    strings = bytearray()
+
+    def intern(value: str) -> int:
+        index = interned.get(value)
+        if index is None:
+            index = interned[value] = len(interned)
+            strings.extend(value.encode("utf-8"))
+            columns["string_offsets"].append(len(strings))
+        return index
+
+    count = 0
+    for route in routes:
+        for molecule in route["molecules"]:
+            columns["molecule_smiles"].append(intern(molecule["smiles"]))
+            for entry in molecule["catalog_entries"]:
+                columns["entry_vendor"].append(intern(entry["vendor_id"]))
+                columns["entry_catalog"].append(intern(entry["catalog_name"]))
+                columns["entry_lead_time"].append(entry["lead_time_weeks"])
+            columns["molecule_entries"].append(len(columns["entry_vendor"]))
+        for reaction in route["reactions"]:
+            columns["reaction_name"].append(intern(reaction["name"]))
+            columns["reaction_target"].append(intern(reaction["target"]))
+            columns["sources"].extend(intern(source) for source in reaction["sources"])
+            columns["reaction_sources"].append(len(columns["sources"]))
+        columns["route_scores"].append(route["score"])
+        columns["route_molecules"].append(len(columns["molecule_smiles"]))
+        columns["route_reactions"].append(len(columns["reaction_name"]))
+        count += 1
+    columns["strings"] = array.array("B", strings)
+
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, "wb") as f:
+            table_end = _HEADER.size + _SECTION.size * len(SECTIONS)
+            f.write(b"\0" * table_end)
+            layout = []
+            for name, _ in SECTIONS:
+                f.write(b"\0" * (-f.tell() % _ALIGN))
+                layout.append((f.tell(), len(columns[name]) * columns[name].itemsize))
+                columns[name].tofile(f)
+            f.seek(0)
+            f.write(_HEADER.pack(MAGIC, VERSION, _BYTEORDER[sys.byteorder], len(SECTIONS)))
+            for offset, size in layout:
+                f.write(_SECTION.pack(offset, size))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+class RouteDataset(Sequence):
+    """Read-only, memory-mapped view of a dataset written by ``build_dataset``.
+
+    Indexing returns route dicts in the same shape as the JSON route data;
+    everything else stays in the mapped file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            if len(self._view) < _HEADER.size or bytes(self._view[:len(MAGIC)]) != MAGIC:
+                raise ValueError(f"{self.path} is not a route dataset")
+            _, version, byteorder, section_count = _HEADER.unpack_from(self._view)
+            if version != VERSION or section_count != len(SECTIONS):
+                raise ValueError(f"{self.path} has unsupported dataset version {version}")
+            if byteorder != _BYTEORDER[sys.byteorder]:
+                raise ValueError(f"{self.path} was built on a machine with different byte order")
+            self._sections = []
+            for index, (_, code) in enumerate(SECTIONS):
+                offset, size = _SECTION.unpack_from(self._view, _HEADER.size + index * _SECTION.size)
+                self._sections.append(self._view[offset:offset + size].cast(code))
+        except BaseException:
+            self.close()
+            raise
+        (
+            self._scores,
+            self._route_molecules,
+            self._route_reactions,
+            self._molecule_smiles,
+            self._molecule_entries,
+            self._entry_vendor,
+            self._entry_catalog,
+            self._entry_lead_time,
+            self._reaction_name,
+            self._reaction_target,
+            self._reaction_sources,
+            self._sources,
+            self._string_offsets,
+            self._strings,
+        ) = self._sections
+
+    def close(self) -> None:
+        for section in getattr(self, "_sections", ()):
+            section.release()
+        self._sections = []
+        self._view.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "RouteDataset":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # One decoded string per distinct string table entry in the slice.
+            strings: dict[int, str] = {}
+            return [self._route(i, strings) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("route index out of range")
+        return self._route(index, {})
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._route(index, {})
+
+    def string(self, index: int) -> str:
+        return str(self._strings[self._string_offsets[index]:self._string_offsets[index + 1]], "utf-8")
+
+    def _route(self, index: int, strings: dict[int, str]) -> dict:
+        def string(i: int) -> str:
+            value = strings.get(i)
+            if value is None:
+                value = strings[i] = self.string(i)
+            return value
+
+        molecules = []
+        for m in range(self._route_molecules[index], self._route_molecules[index + 1]):
+            entries = [
+                {
+                    "vendor_id": string(self._entry_vendor[e]),
+                    "catalog_name": string(self._entry_catalog[e]),
+                    "lead_time_weeks": self._entry_lead_time[e],
+                }
+                for e in range(self._molecule_entries[m], self._molecule_entries[m + 1])
+            ]
+            molecules.append({"smiles": string(self._molecule_smiles[m]), "catalog_entries": entries})
+        reactions = [
+            {
+                "name": string(self._reaction_name[r]),
+                "target": string(self._reaction_target[r]),
+                "sources": [
+                    string(self._sources[s]) for s in range(self._reaction_sources[r], self._reaction_sources[r + 1])
+                ],
+            }
+            for r in range(self._route_reactions[index], self._route_reactions[index + 1])
+        ]
+        return {"score": self._scores[index], "molecules": molecules, "reactions": reactions}
+
+
+def ensure_dataset(path: str | Path, source_path: str | Path | None = None) -> bool:
+    """Build the dataset at ``path`` unless it exists and is newer than its source.
+
+    ``source_path`` is a JSON array or NDJSON route file; without one the
+    example routes are used. Returns whether the dataset was (re)built.
+    """
+    from get_routes import iter_route_file, load_example_routes
+
+    path = Path(path)
+    if path.exists() and (not source_path or path.stat().st_mtime >= os.path.getmtime(source_path)):
+        return False
+    build_dataset(iter_route_file(source_path) if source_path else load_example_routes(), path)
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build a binary route dataset from a JSON or NDJSON route file.")
+    parser.add_argument("output", help="Dataset file to write")
+    parser.add_argument("--source", help="Route file (default: data/example_routes.json)")
+    args = parser.parse_args()
+    from get_routes import iter_route_file, load_example_routes
+
+    routes = iter_route_file(args.source) if args.source else load_example_routes()
+    count = build_dataset(routes, args.output)
+    print(f"Wrote {count} routes to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from collections import defaultdict, deque
+
+from job_store import Job
+
+DEFAULT_PRIORITY = "normal"
+DEFAULT_TENANT = "default"
+
+Flow = tuple[str, str]
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """Parse ``class:weight`` pairs, e.g. ``high:8,normal:4,low:1``."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            name, weight = item.split(":")
+            weights[name.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid priority weight {item!r}; expected class:weight")
+        if weights[name.strip()] <= 0:
+            raise ValueError(f"Priority weight for {name!r} must be positive")
+    return weights
+
+
+def pick_jobs(
+    candidates: list[Job],
+    running: dict[Flow, int],
+    limit: int,
+    weights: dict[str, float],
+    tenant_cap: int = 0,
+) -> list[Job]:
+    """Choose up to ``limit`` jobs from ``candidates`` (oldest first) by weighted fair share.
+
+    Jobs are grouped into flows by ``(tenant, priority)``. Each pick goes to
+    the flow whose share of running jobs would stay lowest relative to its
+    priority weight, ``(running + 1) / weight``, with the oldest job breaking
+    ties. A tenant with a thousand queued jobs therefore gets no more slots
+    than any other tenant of the same class, and higher classes get
+    proportionally more. Tenants already running ``tenant_cap`` jobs
+    (0 = no cap) are skipped.
+    """
+    queues: dict[Flow, deque[Job]] = defaultdict(deque)
+    for job in candidates:
+        queues[(job.tenant, job.priority)].append(job)
+
+    running = defaultdict(int, running)
+    tenant_running: dict[str, int] = defaultdict(int)
+    for (tenant, _), count in running.items():
+        tenant_running[tenant] += count
+
+    picked = []
+    while len(picked) < limit:
+        best, best_key = None, None
+        for flow, queue in queues.items():
+            if not queue or (tenant_cap and tenant_running[flow[0]] >= tenant_cap):
+                continue
+            key = ((running[flow] + 1) / weights.get(flow[1], 1.0), queue[0].created_at)
+            if best_key is None or key < best_key:
+                best, best_key = flow, key
+        if best is None:
+            break
+        picked.append(queues[best].popleft())
+        running[best] += 1
+        tenant_running[best[0]] += 1
+    return picked
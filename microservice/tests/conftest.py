@@ -0,0 +1,19 @@
+import tracemalloc
+
+import pytest
+
+
+@pytest.fixture
+def retained_bytes():
+    """Measure the memory still held by what a callable builds, via tracemalloc."""
+    def measure(build) -> int:
+        tracemalloc.start()
+        try:
+            result = build()
+            current, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return current
+
+    return measure
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from delivery import CallbackDelivery, CircuitBreaker, CircuitOpenError, DeliveryError, SearchGoneError
+from job_store import JobStore
+
+URL = "http://backend/api/search/s1/update"
+
+
+def make_delivery(tmp_path, handler, **overrides):
+    options = dict(
+        timeout=1.0,
+        max_retries=2,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        failure_threshold=100,
+        reset_seconds=30.0,
+        outbox_backoff_max=0.0,
+        outbox_max_attempts=5,
+    )
+    options.update(overrides)
+    return CallbackDelivery(
+        store=JobStore(str(tmp_path / "jobs.db")),
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        **options,
+    )
+
+
+def test_transient_errors_are_retried(tmp_path):
+    statuses = iter([503, 503, 200])
+    delivery = make_delivery(tmp_path, lambda request: httpx.Response(next(statuses)))
+
+    assert asyncio.run(delivery.send("job-1", 1, URL, {"batch_index": 1})) is True
+    assert delivery.store.outbox_size() == 0
+
+
+def test_client_errors_are_not_retried(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(404)
+
+    delivery = make_delivery(tmp_path, handler)
+
+    with pytest.raises(DeliveryError) as exc_info:
+        asyncio.run(delivery.send("job-1", 1, URL, {"batch_index": 1}))
+    assert exc_info.value.retryable is False
+    assert len(calls) == 1
+
+
+def test_cancelled_search_raises_search_gone(tmp_path):
+    delivery = make_delivery(tmp_path, lambda request: httpx.Response(410))
+
+    with pytest.raises(SearchGoneError):
+        asyncio.run(delivery.send("job-1", 1, URL, {"batch_index": 1}))
+
+
+def test_undeliverable_batches_spill_and_drain_in_order(tmp_path):
+    backend_up = False
+    received = []
+
+    def handler(request):
+        if not backend_up:
+            return httpx.Response(503)
+        received.append(json.loads(request.content)["batch_index"])
+        return httpx.Response(200)
+
+    delivery = make_delivery(tmp_path, handler)
+
+    async def scenario():
+        nonlocal backend_up
+        assert await delivery.send("job-1", 1, URL, {"batch_index": 1}) is False
+        backend_up = True
+        # Batch 1 is still parked, so batch 2 must queue behind it.
+        assert await delivery.send("job-1", 2, URL, {"batch_index": 2}) is False
+        return await delivery.drain_outbox()
+
+    assert asyncio.run(scenario()) == 2
+    assert received == [1, 2]
+    assert delivery.store.outbox_size() == 0
+
+
+def test_outbox_gives_up_after_max_attempts(tmp_path):
+    delivery = make_delivery(tmp_path, lambda request: httpx.Response(503), max_retries=0, outbox_max_attempts=2)
+
+    async def scenario():
+        await delivery.send("job-1", 1, URL, {"batch_index": 1})
+        await delivery.drain_outbox()
+        await delivery.drain_outbox()
+
+    asyncio.run(scenario())
+    assert delivery.store.outbox_size() == 0
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.0)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.opened_at is not None
+
+    # After the reset period exactly one trial call is let through.
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_open_circuit_skips_the_network(tmp_path):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    delivery = make_delivery(tmp_path, handler, max_retries=0, failure_threshold=1)
+
+    async def scenario():
+        with pytest.raises(DeliveryError):
+            await delivery.post(URL, {})
+        with pytest.raises(CircuitOpenError):
+            await delivery.post(URL, {})
+        # Spilled without another request while the circuit is open.
+        return await delivery.send("job-1", 1, URL, {"batch_index": 1})
+
+    assert asyncio.run(scenario()) is False
+    assert len(calls) == 1
@@ -0,0 +1,89 @@
+import asyncio
+import json
+
+import pytest
+
+from generation import RouteGenerator
+from get_routes import get_routes, load_example_routes
+from route_dataset import build_dataset
+
+
+async def collect(generator, **kwargs):
+    return [item async for item in generator.stream("CCO", **kwargs)]
+
+
+def test_inline_stream_matches_get_routes():
+    generator = RouteGenerator(workers=0, queue_size=2)
+
+    assert asyncio.run(collect(generator)) == list(get_routes("CCO"))
+
+
+@pytest.fixture(scope="module")
+def pool_generator():
+    generator = RouteGenerator(workers=1, queue_size=1)
+    yield generator
+    generator.close()
+
+
+def test_pool_stream_resumes_after_start_batch(pool_generator):
+    expected = list(get_routes("CCO"))
+
+    batches = asyncio.run(collect(pool_generator, start_batch=1))
+
+    assert batches == expected[1:]
+    assert batches[-1][1] is True
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_stream_reports_expected_total_first(workers, pool_generator):
+    generator = pool_generator if workers else RouteGenerator(workers=0, queue_size=2)
+    events = []
+
+    async def run():
+        async for batch, is_last in generator.stream("CCO", start_batch=1, on_total=events.append):
+            events.append(is_last)
+
+    asyncio.run(run())
+
+    expected = len(list(get_routes("CCO")))
+    assert events == [expected] + [False] * (expected - 2) + [True]
+
+
+def test_pool_stream_can_be_abandoned(pool_generator):
+    async def first_then_stop():
+        stream = pool_generator.stream("CCO")
+        first = await anext(stream)
+        await stream.aclose()
+        return first
+
+    assert asyncio.run(first_then_stop()) == list(get_routes("CCO"))[0]
+    # The worker stopped, so the pool is free for the next search.
+    assert len(asyncio.run(collect(pool_generator))) == len(list(get_routes("CCO")))
+
+
+def test_pool_streams_from_route_file(tmp_path):
+    routes = load_example_routes() * 4
+    path = tmp_path / "routes.ndjson"
+    path.write_text("".join(json.dumps(route) + "\n" for route in routes))
+    generator = RouteGenerator(workers=1, queue_size=1, route_path=path)
+    totals = []
+    try:
+        batches = asyncio.run(collect(generator, batch_size=5, on_total=totals.append))
+    finally:
+        generator.close()
+
+    assert batches == list(get_routes("CCO", batch_size=5, routes=routes))
+    assert totals == [3]
+
+
+def test_pool_workers_share_a_route_dataset(tmp_path):
+    routes = load_example_routes() * 4
+    path = tmp_path / "routes.rtds"
+    build_dataset(routes, path)
+    generator = RouteGenerator(workers=1, queue_size=1, route_path=path)
+    try:
+        batches = asyncio.run(collect(generator, batch_size=5, start_batch=1))
+    finally:
+        generator.close()
+
+    assert batches == list(get_routes("CCO", batch_size=5, routes=routes))[1:]
@@ -1,6 +1,10 @@
+import json
 from unittest.mock import patch
 
-from get_routes import load_example_routes, get_routes
+import pytest
+
+import get_routes as get_routes_module
+from get_routes import count_batches, get_routes, iter_route_file, load_example_routes
 
 
 def test_load_example_routes():
@@ -89,3 +93,78 @@ def test_get_routes():
         batch3, is_last3 = batches[2]
         assert len(batch3) == 1
         assert is_last3 is True
+
+
+def write_routes(path, routes, ndjson=False):
+    with open(path, "w", encoding="utf-8") as f:
+        if ndjson:
+            f.writelines(json.dumps(route) + "\n" for route in routes)
+        else:
+            json.dump(routes, f, indent=2)
+    return path
+
+
+@pytest.mark.parametrize("name", ["routes.json", "routes.ndjson"])
+def test_route_file_streams_like_in_memory_routes(tmp_path, name):
+    routes = load_example_routes() * 5
+    path = write_routes(tmp_path / name, routes, ndjson=name.endswith(".ndjson"))
+
+    assert list(iter_route_file(path)) == routes
+    assert list(get_routes("CCO", batch_size=4, path=path)) == list(get_routes("CCO", batch_size=4, routes=routes))
+
+
+def test_json_array_routes_straddling_chunks(tmp_path, monkeypatch):
+    # Tiny chunks put chunk boundaries inside strings and multi-byte characters.
+    monkeypatch.setattr(get_routes_module, "_CHUNK_BYTES", 7)
+    routes = [{"score": i / 10, "molecules": [{"smiles": f"C{i}é→", "catalog_entries": []}], "reactions": []}
+              for i in range(10)]
+    path = write_routes(tmp_path / "routes.json", routes)
+
+    assert list(iter_route_file(path)) == routes
+
+
+@pytest.mark.parametrize("content", ["", "[]", " [ ] \n"])
+def test_empty_route_files(tmp_path, content):
+    path = tmp_path / "routes.json"
+    path.write_text(content)
+
+    assert list(get_routes("CCO", path=path)) == []
+    assert count_batches(path=path) == 0
+
+
+@pytest.mark.parametrize("content", ['{"score": 1}', '[{"score": 1},'])
+def test_malformed_route_file(tmp_path, content):
+    path = tmp_path / "routes.json"
+    path.write_text(content)
+
+    with pytest.raises(ValueError):
+        list(iter_route_file(path))
+
+
+@pytest.mark.parametrize("name", ["routes.json", "routes.ndjson"])
+def test_oversized_route_stops_reading(tmp_path, monkeypatch, name):
+    monkeypatch.setattr(get_routes_module, "_CHUNK_BYTES", 16)
+    monkeypatch.setattr(get_routes_module, "_MAX_ROUTE_BYTES", 64)
+    first = '{"score": 1, "molecules": [], "reactions": []}'
+    # An unterminated string: without the cap the rest of the file is buffered.
+    unclosed = '{"score": "' + "C" * 1000
+    path = tmp_path / name
+    if name.endswith(".ndjson"):
+        path.write_text(f"{first}\n{unclosed}")
+        start = len(first) + 1
+    else:
+        path.write_text(f"[{first}, {unclosed}")
+        start = len(first) + 3
+
+    routes = iter_route_file(path)
+    assert next(routes) == json.loads(first)
+    with pytest.raises(ValueError, match=f"Route at offset {start} "):
+        next(routes)
+
+
+@pytest.mark.parametrize("ndjson", [False, True])
+def test_count_batches_estimates_from_file_prefix(tmp_path, ndjson):
+    routes = load_example_routes() * 100
+    path = write_routes(tmp_path / ("routes.ndjson" if ndjson else "routes.json"), routes, ndjson=ndjson)
+
+    assert count_batches(batch_size=10, path=path) == pytest.approx(30, abs=3)
@@ -0,0 +1,83 @@
+import time
+
+from job_store import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobStore
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    assert store.enqueue("job-1", "CCO", "http://callback") is True
+    assert store.enqueue("job-1", "CCO", "http://callback") is False
+    assert store.counts() == {QUEUED: 1}
+
+
+def test_claim_leases_oldest_jobs_first(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    for i in range(3):
+        store.enqueue(f"job-{i}", "CCO", "http://callback")
+
+    claimed = store.claim("worker-a", lease_seconds=30, limit=2)
+
+    assert [job.id for job in claimed] == ["job-0", "job-1"]
+    assert all(job.status == RUNNING and job.lease_owner == "worker-a" for job in claimed)
+    assert store.claim("worker-b", lease_seconds=30, limit=5)[0].id == "job-2"
+    assert store.claim("worker-b", lease_seconds=30, limit=5) == []
+
+
+def test_expired_lease_resumes_from_last_ack(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.enqueue("job-1", "CCO", "http://callback")
+    store.claim("worker-a", lease_seconds=0.01, limit=1)
+    assert store.ack_batch("job-1", "worker-a", 2)
+
+    time.sleep(0.02)
+    [job] = store.claim("worker-b", lease_seconds=30, limit=1)
+
+    assert job.lease_owner == "worker-b"
+    assert job.acked_batches == 2
+    assert job.attempts == 2
+    # The old owner can no longer touch the job.
+    assert not store.ack_batch("job-1", "worker-a", 3)
+    assert not store.complete("job-1", "worker-a")
+
+
+def test_complete_fail_and_release(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    for i in range(3):
+        store.enqueue(f"job-{i}", "CCO", "http://callback")
+    store.claim("worker-a", lease_seconds=30, limit=3)
+
+    assert store.complete("job-0", "worker-a")
+    assert store.fail("job-1", "worker-a", "boom")
+    assert store.release("worker-a") == 1
+
+    assert store.get("job-0").status == COMPLETED
+    assert store.get("job-1").error == "boom"
+    assert store.get("job-1").status == FAILED
+    assert store.get("job-2").status == QUEUED
+
+
+def test_jobs_survive_reopening(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    store = JobStore(path)
+    store.enqueue("job-1", "CCO", "http://callback")
+    store.close()
+
+    reopened = JobStore(path)
+
+    assert reopened.get("job-1").smiles == "CCO"
+
+
+def test_cancel_stops_running_job_and_drops_outbox(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    store.enqueue("job-1", "CCO", "http://callback")
+    store.claim("worker-a", lease_seconds=30, limit=1)
+    store.spill("job-1", 1, "http://callback", "{}", next_attempt_at=0)
+
+    assert store.cancel("job-1") is True
+    assert store.get("job-1").status == CANCELLED
+    assert store.outbox_size() == 0
+    # The worker still running it finds out when it next renews its lease.
+    assert not store.renew("job-1", "worker-a", 30)
+    assert not store.complete("job-1", "worker-a")
+    assert store.cancel("job-1") is False
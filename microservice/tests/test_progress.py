@@ -0,0 +1,19 @@
+import pytest
+
+from main import estimate_progress
+
+
+def test_progress_and_eta_follow_the_pace_of_the_attempt():
+    # Resumed at batch 2 of 10; batches 3 and 4 took 8 seconds.
+    progress = estimate_progress(4, False, 10, start_batch=2, elapsed=8.0)
+
+    assert progress == {"progress": 0.4, "expected_batches": 10, "eta_seconds": pytest.approx(24.0)}
+
+
+def test_last_batch_is_complete_whatever_the_estimate():
+    assert estimate_progress(7, True, 10, start_batch=0, elapsed=3.0) == {
+        "progress": 1.0, "expected_batches": 7, "eta_seconds": 0.0
+    }
+    # More batches than expected: keep reporting one batch still to come.
+    assert estimate_progress(12, False, 10, start_batch=0, elapsed=12.0)["progress"] == pytest.approx(12 / 13, abs=1e-4)
+    assert estimate_progress(1, False, None, start_batch=0, elapsed=1.0) == {}
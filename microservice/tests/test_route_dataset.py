@@ -0,0 +1,89 @@
+import json
+import os
+
+import pytest
+
+from get_routes import count_batches, get_routes, load_example_routes
+from route_dataset import RouteDataset, build_dataset, ensure_dataset, is_dataset
+
+
+def unicode_routes():
+    return [
+        {
+            "score": 0.5,
+            "molecules": [
+                {"smiles": "C→é", "catalog_entries": [{"vendor_id": "V-ü", "catalog_name": "cat", "lead_time_weeks": 2.5}]},
+                {"smiles": "", "catalog_entries": []},
+            ],
+            "reactions": [{"name": "R", "target": "C→é", "sources": []}],
+        },
+        {"score": 0.25, "molecules": [], "reactions": []},
+    ]
+
+
+@pytest.mark.parametrize("routes", [load_example_routes(), unicode_routes(), []], ids=["example", "unicode", "empty"])
+def test_dataset_round_trip(tmp_path, routes):
+    path = tmp_path / "routes.rtds"
+
+    assert build_dataset(iter(routes), path) == len(routes)
+
+    with RouteDataset(path) as dataset:
+        assert len(dataset) == len(routes)
+        assert list(dataset) == routes
+        assert dataset[1:] == routes[1:]
+        if routes:
+            assert dataset[-1] == routes[-1]
+        with pytest.raises(IndexError):
+            dataset[len(routes)]
+
+
+def test_dataset_interns_strings(tmp_path):
+    routes = load_example_routes() * 50
+    path = tmp_path / "routes.rtds"
+    build_dataset(routes, path)
+
+    assert os.path.getsize(path) < len(json.dumps(routes)) / 5
+    with RouteDataset(path) as dataset:
+        strings = {dataset.string(i) for i in range(len(dataset._string_offsets) - 1)}
+        assert len(strings) == len(dataset._string_offsets) - 1
+
+
+def test_get_routes_slices_datasets(tmp_path):
+    routes = load_example_routes() * 3
+    path = tmp_path / "routes.rtds"
+    build_dataset(routes, path)
+
+    with RouteDataset(path) as dataset:
+        for start_batch in (0, 2):
+            assert list(get_routes("CCO", batch_size=2, routes=dataset, start_batch=start_batch)) == list(
+                get_routes("CCO", batch_size=2, routes=routes, start_batch=start_batch)
+            )
+        assert count_batches(batch_size=2, routes=dataset) == 5
+        # Routes of one batch share the decoded strings.
+        first, second = dataset[0:len(load_example_routes()) + 1:len(load_example_routes())]
+        assert first["molecules"][0]["smiles"] is second["molecules"][0]["smiles"]
+
+
+def test_ensure_dataset_rebuilds_only_when_stale(tmp_path):
+    source = tmp_path / "routes.json"
+    source.write_text(json.dumps(load_example_routes()))
+    path = tmp_path / "routes.rtds"
+
+    assert ensure_dataset(path, source) is True
+    assert ensure_dataset(path, source) is False
+
+    source.write_text(json.dumps(unicode_routes()))
+    os.utime(source, (path.stat().st_mtime + 10,) * 2)
+    assert ensure_dataset(path, source) is True
+    with RouteDataset(path) as dataset:
+        assert list(dataset) == unicode_routes()
+
+
+def test_other_files_are_not_datasets(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text("[]")
+
+    assert not is_dataset(path)
+    assert not is_dataset(tmp_path / "missing")
+    with pytest.raises(ValueError):
+        RouteDataset(path)
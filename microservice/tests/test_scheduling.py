@@ -0,0 +1,60 @@
+import functools
+
+import pytest
+
+from job_store import JobStore
+from scheduling import parse_weights, pick_jobs
+
+WEIGHTS = {"high": 8.0, "normal": 4.0, "low": 1.0}
+
+
+def test_parse_weights():
+    assert parse_weights("high:8, normal:4,low:1") == WEIGHTS
+    with pytest.raises(ValueError):
+        parse_weights("high")
+    with pytest.raises(ValueError):
+        parse_weights("low:0")
+
+
+def enqueue(store, job_id, priority="normal", tenant="default"):
+    store.enqueue(job_id, "CCO", "http://callback", priority, tenant)
+
+
+def test_bulk_tenant_does_not_starve_interactive_search(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    for i in range(20):
+        enqueue(store, f"bulk-{i}", priority="low", tenant="bulk")
+    select = functools.partial(pick_jobs, weights=WEIGHTS)
+
+    # The bulk tenant fills the idle worker, then an interactive search arrives.
+    assert len(store.claim("worker", 30, 4, select)) == 4
+    enqueue(store, "interactive", priority="high", tenant="alice")
+
+    [job] = store.claim("worker", 30, 1, select)
+    assert job.id == "interactive"
+
+
+def test_same_class_tenants_share_slots_evenly(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    for i in range(10):
+        enqueue(store, f"a-{i}", tenant="a")
+    for i in range(10):
+        enqueue(store, f"b-{i}", tenant="b")
+
+    claimed = store.claim("worker", 30, 6, functools.partial(pick_jobs, weights=WEIGHTS))
+
+    assert sorted(job.tenant for job in claimed) == ["a"] * 3 + ["b"] * 3
+
+
+def test_tenant_cap_limits_concurrency(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    for i in range(5):
+        enqueue(store, f"a-{i}", tenant="a")
+    enqueue(store, "b-0", tenant="b")
+    select = functools.partial(pick_jobs, weights=WEIGHTS, tenant_cap=2)
+
+    claimed = store.claim("worker", 30, 5, select)
+
+    assert sorted(job.id for job in claimed) == ["a-0", "a-1", "b-0"]
+    assert store.claim("worker", 30, 5, select) == []
+    assert store.running_by_flow() == {("a", "normal"): 2, ("b", "normal"): 1}
@@ -0,0 +1,57 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from job_store import QUEUED, JobStore
+from main import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # No lifespan: jobs are only enqueued, never run.
+    store = JobStore(str(tmp_path / "jobs.db"))
+    wakes = []
+    monkeypatch.setattr(app.state, "job_store", store, raising=False)
+    monkeypatch.setattr(app.state, "worker", SimpleNamespace(wake=lambda: wakes.append(1)), raising=False)
+    client = TestClient(app)
+    client.wakes = wakes
+    yield client
+    store.close()
+
+
+def search(i: int, **fields) -> dict:
+    return {"smiles": f"C{i}", "callback_url": f"http://backend/api/search/s-{i}/update", "search_id": f"s-{i}", **fields}
+
+
+def test_batch_enqueues_every_job_idempotently(client):
+    batch = {"searches": [search(0), search(1, priority="low", tenant="acme"), search(2)]}
+
+    response = client.post("/start_search/batch", json=batch)
+
+    assert response.status_code == 202
+    assert response.json() == {"results": [{"status": "accepted", "error": None}] * 3}
+    store = app.state.job_store
+    assert store.counts() == {QUEUED: 3}
+    job = store.get("s-1")
+    assert (job.smiles, job.callback_url, job.priority, job.tenant) == (
+        "C1", "http://backend/api/search/s-1/update", "low", "acme"
+    )
+
+    # A retried batch (and a repeat within one) queues nothing new.
+    batch["searches"].append(search(0))
+    assert client.post("/start_search/batch", json=batch).status_code == 202
+    assert store.counts() == {QUEUED: 3}
+    assert len(client.wakes) == 2
+
+
+def test_batch_over_the_queue_limit_is_refused_whole(client, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_QUEUED_JOBS", 5)
+    client.post("/start_search/batch", json={"searches": [search(i) for i in range(3)]})
+
+    response = client.post("/start_search/batch", json={"searches": [search(i) for i in range(3, 6)]})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == str(settings.QUEUE_FULL_RETRY_AFTER_SECONDS)
+    assert app.state.job_store.counts() == {QUEUED: 3}
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+import metrics
+from job_store import Job, JobStore, SelectJobs
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLostError(Exception):
+    """Raised inside a job when another worker has taken over its lease."""
+
+
+AckBatch = Callable[[int], None]
+RunJob = Callable[[Job, AckBatch], Awaitable[None]]
+
+
+class JobWorker:
+    """Claims jobs from a JobStore and runs up to ``max_concurrent`` of them.
+
+    ``run_job(job, ack_batch)`` does the actual work and must call
+    ``ack_batch(n)`` once the first ``n`` batches are delivered, so a restart
+    resumes from there. Leases of running jobs are renewed in the background.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        owner: str,
+        run_job: RunJob,
+        max_concurrent: int,
+        lease_seconds: float,
+        poll_interval: float,
+        select: SelectJobs | None = None,
+    ):
+        self.store = store
+        self.owner = owner
+        self.run_job = run_job
+        self.max_concurrent = max_concurrent
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.select = select
+        self._active: dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._loop_task: asyncio.Task | None = None
+
+    @property
+    def active_jobs(self) -> int:
+        return len(self._active)
+
+    def start(self) -> None:
+        self._loop_task = asyncio.create_task(self._run())
+
+    def wake(self) -> None:
+        """Claim new work now instead of waiting for the next poll."""
+        self._wakeup.set()
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop ``job_id`` if it is running in this worker."""
+        task = self._active.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def stop(self) -> None:
+        tasks = [t for t in [self._loop_task, *self._active.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        released = self.store.release(self.owner)
+        if released:
+            logger.info(f"Released {released} unfinished jobs back to the queue")
+
+    async def _run(self) -> None:
+        last_renewal = time.monotonic()
+        while True:
+            try:
+                free_slots = self.max_concurrent - len(self._active)
+                for job in self.store.claim(self.owner, self.lease_seconds, free_slots, self.select):
+                    self._start_job(job)
+
+                if time.monotonic() - last_renewal >= self.lease_seconds / 3:
+                    for job_id in list(self._active):
+                        if not self.store.renew(job_id, self.owner, self.lease_seconds):
+                            logger.warning(f"Lost lease on job {job_id} (cancelled or taken over); stopping it")
+                            self._active[job_id].cancel()
+                    last_renewal = time.monotonic()
+            except Exception as e:
+                logger.error(f"Job worker loop error: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _start_job(self, job: Job) -> None:
+        if job.attempts == 1:
+            metrics.queue_wait_seconds[job.priority].observe(job.updated_at - job.created_at)
+        else:
+            logger.info(f"Resuming job {job.id} after batch {job.acked_batches} (attempt {job.attempts})")
+        task = asyncio.create_task(self._execute(job))
+        self._active[job.id] = task
+
+    async def _execute(self, job: Job) -> None:
+        def ack_batch(acked_batches: int) -> None:
+            if not self.store.ack_batch(job.id, self.owner, acked_batches):
+                raise LeaseLostError(f"Lease on job {job.id} lost")
+
+        try:
+            await self.run_job(job, ack_batch)
+            self.store.complete(job.id, self.owner)
+        except LeaseLostError as e:
+            logger.warning(str(e))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.store.fail(job.id, self.owner, str(e))
+        finally:
+            self._active.pop(job.id, None)
+            self.wake()
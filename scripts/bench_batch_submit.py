@@ -0,0 +1,76 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def make_targets(count: int) -> list[str]:
+    # Distinct, syntactically valid SMILES: linear alkanes of increasing length
+    # with a varying heteroatom.
+    heteroatoms = ["O", "N", "S", "Cl"]
+    return [f"{'C' * (i % 40 + 1)}{heteroatoms[i % len(heteroatoms)]}" for i in range(count)]
+
+
+def submit_individually(base_url: str, targets: list[str], concurrency: int) -> float:
+    session = requests.Session()
+
+    def submit(smiles: str) -> None:
+        session.post(f"{base_url}/api/search", json={"smiles": smiles}, timeout=60).raise_for_status()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(submit, targets))
+    return time.perf_counter() - start
+
+
+def submit_batch(base_url: str, targets: list[str]) -> tuple[float, dict[str, int]]:
+    start = time.perf_counter()
+    response = requests.post(f"{base_url}/api/search/batch", json={"smiles": targets}, timeout=600)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    statuses: dict[str, int] = {}
+    for item in response.json()["searches"]:
+        statuses[item["status"]] = statuses.get(item["status"], 0) + 1
+    return elapsed, statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare submitting N searches one by one against POST /api/search/batch"
+    )
+    parser.add_argument("--backend-url", default="http://localhost:8000", help="Backend API URL")
+    parser.add_argument("--targets", type=int, default=1000, help="Number of target SMILES")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client concurrency for individual submissions")
+    parser.add_argument("--skip-individual", action="store_true", help="Only benchmark the batch endpoint")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    base_url = args.backend_url.rstrip("/")
+    targets = make_targets(args.targets)
+
+    results = {"targets": args.targets}
+    try:
+        if not args.skip_individual:
+            elapsed = submit_individually(base_url, targets, args.concurrency)
+            results["individual_seconds"] = elapsed
+            print(f"Individual: {elapsed:.2f}s ({args.targets / elapsed:.0f} searches/s, concurrency {args.concurrency})")
+
+        elapsed, statuses = submit_batch(base_url, targets)
+        results["batch_seconds"] = elapsed
+        results["batch_statuses"] = statuses
+        print(f"Batch:      {elapsed:.2f}s ({args.targets / elapsed:.0f} searches/s) statuses={statuses}")
+    except requests.RequestException as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if "individual_seconds" in results:
+        print(f"Speedup:    {results['individual_seconds'] / results['batch_seconds']:.1f}x")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
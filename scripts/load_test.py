@@ -0,0 +1,346 @@
+"""Load-test the backend end to end against a stub microservice.
+
+Starts the backend (uvicorn, in a subprocess) on SQLite or a given database
+URL, with MICROSERVICE_URL pointing at an in-process stub that accepts every
+search and never calls back. The harness plays the microservice itself,
+posting generated route batches to the update endpoint, so each kind of
+traffic runs at a controlled rate. Requests are issued open-loop at
+--rps in the proportions of --mix. Latency is measured from each request's
+scheduled start, so a backend that falls behind shows up in the
+percentiles instead of silently lowering the offered load.
+
+    python load_test.py --rps 100 --duration 30 --mix create:1,ingest:4,status:10,results:5 --output run.json
+    python load_test.py ... --baseline previous.json   # print p95/p99 deltas
+"""
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "backend"
+EXAMPLE_ROUTES = ROOT / "microservice" / "data" / "example_routes.json"
+OPERATIONS = ("create", "ingest", "status", "results")
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, weight = item.split(":")
+        if name not in OPERATIONS:
+            raise SystemExit(f"Unknown operation {name!r} in --mix; expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_stub_microservice() -> tuple[ThreadingHTTPServer, int]:
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._reply(200, {"status": "healthy"})
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/start_search/batch":
+                self._reply(202, {"results": [{"status": "accepted"} for _ in body.get("searches", [])]})
+            else:
+                self._reply(202, {"status": "accepted", "job_id": body.get("search_id")})
+
+        def do_DELETE(self):
+            self._reply(200, {"status": "cancelled"})
+
+        def log_message(self, *args):
+            pass
+
+    port = free_port()
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, port
+
+
+def start_backend(port: int, database_url: str, microservice_port: int, workers: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "MICROSERVICE_URL": f"http://127.0.0.1:{microservice_port}",
+        "RATE_LIMIT_ENABLED": "false",
+        "LOG_LEVEL": "WARNING",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/metrics", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise SystemExit("Backend exited during startup; check DATABASE_URL")
+            time.sleep(0.1)
+    process.kill()
+    raise SystemExit("Backend did not start within 60s")
+
+
+# Numbers every generated route, across threads (next() on a count is atomic).
+_route_numbers = itertools.count()
+
+
+def make_batch(routes: list[dict], size: int) -> list[dict]:
+    """``size`` copies of the example routes, each made distinct.
+
+    The backend drops a route whose content (not score) it already has, so
+    every copy gets its own reaction names; otherwise all but the first few
+    batches would be skipped as duplicates and ingest would measure nothing.
+    """
+    batch = []
+    for _ in range(size):
+        route = copy.deepcopy(random.choice(routes))
+        route["score"] = round(random.random(), 4)
+        number = next(_route_numbers)
+        for reaction in route["reactions"]:
+            reaction["name"] = f"{reaction['name']} #{number}"
+        batch.append(route)
+    return batch
+
+
+class Workload:
+    """The state shared by request threads: known searches and their next batch index."""
+
+    def __init__(self, base_url: str, routes: list[dict], routes_per_batch: int):
+        self.base_url = base_url
+        self.routes = routes
+        self.routes_per_batch = routes_per_batch
+        self.searches: list[str] = []
+        self.next_batch: dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def pick_search(self) -> str:
+        with self.lock:
+            return random.choice(self.searches)
+
+    def create(self) -> bool:
+        smiles = "C" * random.randint(1, 30) + random.choice("ONS")
+        response = self.session.post(f"{self.base_url}/api/search", json={"smiles": smiles}, timeout=30)
+        if response.status_code != 201:
+            return False
+        search_id = response.json()["id"]
+        with self.lock:
+            self.searches.append(search_id)
+            self.next_batch[search_id] = 1
+        return True
+
+    def ingest(self) -> bool:
+        with self.lock:
+            search_id = random.choice(self.searches)
+            batch_index = self.next_batch[search_id]
+            self.next_batch[search_id] += 1
+        response = self.session.post(
+            f"{self.base_url}/api/search/{search_id}/update",
+            json={
+                "routes": make_batch(self.routes, self.routes_per_batch),
+                "is_complete": False,
+                "batch_index": batch_index,
+            },
+            timeout=30,
+        )
+        return response.status_code == 200
+
+    def status(self) -> bool:
+        response = self.session.get(f"{self.base_url}/api/search/{self.pick_search()}/status", timeout=30)
+        return response.status_code == 200
+
+    def results(self) -> bool:
+        response = self.session.get(
+            f"{self.base_url}/api/search/{self.pick_search()}/results", params={"limit": 20}, timeout=30
+        )
+        return response.status_code == 200
+
+
+def run_load(workload: Workload, mix: dict[str, float], rps: float, duration: float, concurrency: int) -> dict:
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    record_lock = threading.Lock()
+
+    def execute(name: str, scheduled: float) -> None:
+        try:
+            ok = getattr(workload, name)()
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - scheduled
+        with record_lock:
+            if ok:
+                latencies[name].append(elapsed)
+            else:
+                errors[name] += 1
+
+    interval = 1.0 / rps
+    started = time.perf_counter()
+    total = int(rps * duration)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for i in range(total):
+            scheduled = started + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(execute, random.choices(names, weights)[0], scheduled)
+    elapsed = time.perf_counter() - started
+
+    def summarize(samples: list[float], failed: int) -> dict:
+        return {
+            "requests": len(samples) + failed,
+            "errors": failed,
+            "throughput_rps": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+            "p99_ms": percentile(samples, 0.99) * 1000,
+            "max_ms": max(samples, default=0.0) * 1000,
+        }
+
+    report = {name: summarize(latencies[name], errors[name]) for name in names}
+    report["all"] = summarize([value for name in names for value in latencies[name]], sum(errors.values()))
+    report["elapsed_seconds"] = elapsed
+    return report
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    print(f"{'operation':<10} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in report["operations"].items():
+        line = (
+            f"{name:<10} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}"
+        )
+        previous = (baseline or {}).get("operations", {}).get(name)
+        if previous:
+            line += (
+                f"   p95 {stats['p95_ms'] - previous['p95_ms']:+.1f} ms,"
+                f" p99 {stats['p99_ms'] - previous['p99_ms']:+.1f} ms vs {baseline.get('commit') or 'baseline'}"
+            )
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Backend DATABASE_URL (default: a fresh SQLite file)")
+    parser.add_argument("--rps", type=float, default=50.0, help="Offered load in requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument(
+        "--mix", default="create:1,ingest:4,status:10,results:5", help="Relative weights of create/ingest/status/results"
+    )
+    parser.add_argument("--concurrency", type=int, default=64, help="Maximum requests in flight")
+    parser.add_argument("--seed-searches", type=int, default=20, help="Searches created (and given one batch) before the run")
+    parser.add_argument("--routes-per-batch", type=int, default=5, help="Routes in each ingested batch")
+    parser.add_argument("--backend-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--random-seed", type=int, default=0, help="Seed for the request mix and payloads")
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    random.seed(args.random_seed)
+    mix = parse_mix(args.mix)
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='load-test-')}/load.db"
+    stub, stub_port = start_stub_microservice()
+    backend_port = free_port()
+    backend = start_backend(backend_port, database_url, stub_port, args.backend_workers)
+    try:
+        with open(EXAMPLE_ROUTES) as f:
+            routes = json.load(f)
+        workload = Workload(f"http://127.0.0.1:{backend_port}", routes, args.routes_per_batch)
+        for _ in range(args.seed_searches):
+            if not workload.create():
+                raise SystemExit("Could not create seed searches")
+            workload.ingest()
+
+        operations = run_load(workload, mix, args.rps, args.duration, args.concurrency)
+    finally:
+        backend.terminate()
+        backend.wait()
+        stub.shutdown()
+
+    elapsed = operations.pop("elapsed_seconds")
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "database": "sqlite" if database_url.startswith("sqlite") else database_url.split(":", 1)[0],
+            "rps": args.rps,
+            "duration": args.duration,
+            "mix": mix,
+            "concurrency": args.concurrency,
+            "seed_searches": args.seed_searches,
+            "routes_per_batch": args.routes_per_batch,
+            "backend_workers": args.backend_workers,
+        },
+        "elapsed_seconds": elapsed,
+        "operations": operations,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
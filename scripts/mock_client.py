@@ -25,10 +25,19 @@ class RetrosynthesisClient:
         response.raise_for_status()
         return response.json()
 
+    def cancel_search(self, search_id: str) -> dict[str, Any]:
+        response = self.session.delete(f"{self.base_url}/api/search/{search_id}")
+        response.raise_for_status()
+        return response.json()
+
     def get_search_results(
-        self, search_id: str, min_score: float | None = None
+        self, search_id: str, min_score: float | None = None, **filters: Any
     ) -> dict[str, Any]:
-        params = {}
+        """Fetch results; extra keyword arguments are passed through as server-side
+        filters (``max_steps``, ``max_depth``, ``fully_purchasable``,
+        ``max_lead_time_weeks``, ``vendor``, ``sort_by``, ``limit``...) or
+        options such as ``since`` and ``format``; see ``inflate_dag``."""
+        params = {key: value for key, value in filters.items() if value is not None}
         if min_score is not None:
             params["min_score"] = min_score
 
@@ -44,12 +53,20 @@ class RetrosynthesisClient:
         while time.time() - start_time < timeout:
             status = self.get_search_status(search_id)
 
-            print(f"Status: {status['status']}")
+            if status.get("progress") is not None:
+                eta = status.get("eta_seconds")
+                eta_text = f", ~{eta:.0f}s left" if eta is not None else ""
+                print(f"Status: {status['status']} ({status['progress']:.0%}{eta_text})")
+            else:
+                print(f"Status: {status['status']}")
 
-            if status["status"] in ["completed", "failed"]:
+            if status["status"] in ["completed", "failed", "cancelled"]:
                 return status
 
-            time.sleep(2)
+            # Poll every 2s, or less often while the search reports it is far
+            # from done: sleep half the remaining estimate, up to 30s.
+            eta = status.get("eta_seconds")
+            time.sleep(min(max(2, eta / 2), 30) if eta else 2)
 
         raise TimeoutError(f"Search did not complete within {timeout} seconds")
 
@@ -90,6 +107,38 @@ def count_steps(node: dict[str, Any]) -> int:
     return max_depth + 1
 
 
+def inflate_dag(results: dict[str, Any]) -> dict[str, Any]:
+    """Turn a ``format=dag`` response back into the default nested-tree form.
+
+    Each route lists indexes into the shared ``reactions`` table; a molecule is
+    expanded with the route's reactions whose ``product`` it is.
+    """
+    molecules, reactions = results["molecules"], results["reactions"]
+
+    def inflate_route(route: dict[str, Any]) -> dict[str, Any]:
+        by_product: dict[int, list[dict[str, Any]]] = {}
+        for index in route["reactions"]:
+            by_product.setdefault(reactions[index]["product"], []).append(reactions[index])
+
+        def inflate(index: int) -> dict[str, Any]:
+            return {
+                **molecules[index],
+                "reactions": [
+                    {"name": reaction["name"], "reactants": [inflate(r) for r in reaction["reactants"]]}
+                    for reaction in by_product.get(index, [])
+                ],
+            }
+
+        return {"score": route["score"], "root": inflate(route["root"]), "features": route.get("features")}
+
+    return {
+        "search_id": results["search_id"],
+        "total_routes": results["total_routes"],
+        "routes": [inflate_route(route) for route in results["routes"]],
+        "cursor": results["cursor"],
+    }
+
+
 def display_results(results: dict[str, Any], max_routes: int = 5) -> None:
     print(f"\nFound {results['total_routes']} routes")
 
@@ -103,6 +152,11 @@ def display_results(results: dict[str, Any], max_routes: int = 5) -> None:
         print(f"  Steps: {steps}")
         print(f"  Molecules: {total_molecules} ({purchasable_molecules} purchasable)")
 
+        features = route.get("features")
+        if features and features["max_lead_time_weeks"] is not None:
+            print(f"  Lead time: {features['max_lead_time_weeks']:g} weeks")
+            print(f"  Vendors: {', '.join(features['vendors'])}")
+
     if results["total_routes"] > max_routes:
         print(f"\n({results['total_routes'] - max_routes} more routes not shown)")
 
@@ -120,6 +174,37 @@ def main() -> None:
         type=float,
         help="Minimum route score to retrieve",
     )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        help="Only retrieve routes with at most this many reactions",
+    )
+    parser.add_argument(
+        "--max-lead-time",
+        type=float,
+        help="Only retrieve routes whose starting materials arrive within this many weeks",
+    )
+    parser.add_argument(
+        "--vendor",
+        action="append",
+        help="Only retrieve routes offered by this catalog (repeatable)",
+    )
+    parser.add_argument(
+        "--sort-by",
+        choices=["score", "steps", "depth", "lead_time", "purchasable_leaves"],
+        help="Server-side sort order",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Only retrieve the top N routes",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["tree", "dag"],
+        default="tree",
+        help="Results encoding to request; dag responses are re-inflated locally",
+    )
     parser.add_argument(
         "--timeout",
         type=int,
@@ -143,7 +228,19 @@ def main() -> None:
             sys.exit(1)
 
         print("\nRetrieving results...")
-        results = client.get_search_results(search_id, min_score=args.min_score)
+        results = client.get_search_results(
+            search_id,
+            min_score=args.min_score,
+            max_steps=args.max_steps,
+            max_lead_time_weeks=args.max_lead_time,
+            vendor=args.vendor,
+            sort_by=args.sort_by,
+            limit=args.limit,
+            format=args.format,
+        )
+        if args.format == "dag":
+            print(f"DAG payload: {len(results['molecules'])} molecules, {len(results['reactions'])} reactions")
+            results = inflate_dag(results)
         display_results(results)
 
     except requests.exceptions.ConnectionError:
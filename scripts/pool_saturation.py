@@ -0,0 +1,131 @@
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import requests
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_stage(base_url: str, search_id: str, concurrency: int, duration: float) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    url = f"{base_url}/api/search/{search_id}/status"
+
+    def worker() -> None:
+        nonlocal errors
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+
+    total = len(latencies) + errors
+    pool = requests.get(f"{base_url}/metrics", timeout=10).json()["database"]
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": len(latencies) / duration,
+        "error_rate": errors / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "pool_in_use": pool["in_use"],
+        "pool_overflow": pool["overflow"],
+        "checkout_wait_p95_ms": pool["checkout_wait_seconds"]["p95"] * 1000,
+        "checkout_timeouts": pool["checkout_timeouts"],
+    }
+
+
+def is_saturated(stage: dict[str, Any], previous: dict[str, Any] | None, args: argparse.Namespace) -> bool:
+    if stage["error_rate"] > args.max_error_rate:
+        return True
+    if stage["p95_ms"] > args.max_p95_ms:
+        return True
+    if previous and stage["throughput_rps"] < previous["throughput_rps"] * (1 + args.min_gain):
+        return True
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ramp concurrent status polls against the backend until the DB pool saturates"
+    )
+    parser.add_argument("--backend-url", default="http://localhost:8000", help="Backend API URL")
+    parser.add_argument("--smiles", default="CCO", help="SMILES used for the seed search")
+    parser.add_argument("--start", type=int, default=1, help="Initial concurrency")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="Upper bound on concurrency")
+    parser.add_argument("--stage-seconds", type=float, default=10.0, help="Duration of each stage")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate that counts as saturated")
+    parser.add_argument("--max-p95-ms", type=float, default=500.0, help="p95 latency that counts as saturated")
+    parser.add_argument(
+        "--min-gain",
+        type=float,
+        default=0.05,
+        help="Minimum relative throughput gain expected when doubling concurrency",
+    )
+    args = parser.parse_args()
+    base_url = args.backend_url.rstrip("/")
+
+    try:
+        response = requests.post(f"{base_url}/api/search", json={"smiles": args.smiles}, timeout=30)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        print(f"Error: could not create seed search: {e}", file=sys.stderr)
+        sys.exit(1)
+    search_id = response.json()["id"]
+
+    print(f"{'conc':>6} {'rps':>9} {'p50ms':>8} {'p95ms':>8} {'err%':>6} {'in_use':>7} {'ovf':>5} {'wait95ms':>9}")
+    previous = None
+    saturation = None
+    concurrency = args.start
+    while concurrency <= args.max_concurrency:
+        stage = run_stage(base_url, search_id, concurrency, args.stage_seconds)
+        print(
+            f"{stage['concurrency']:>6} {stage['throughput_rps']:>9.1f} {stage['p50_ms']:>8.1f} "
+            f"{stage['p95_ms']:>8.1f} {stage['error_rate'] * 100:>6.2f} {stage['pool_in_use']!s:>7} "
+            f"{stage['pool_overflow']!s:>5} {stage['checkout_wait_p95_ms']:>9.2f}"
+        )
+        if is_saturated(stage, previous, args):
+            saturation = stage
+            break
+        previous = stage
+        concurrency *= 2
+
+    if saturation is None:
+        print(f"\nNo saturation observed up to concurrency {args.max_concurrency}")
+    else:
+        best = previous or saturation
+        print(
+            f"\nSaturated at concurrency {saturation['concurrency']}; "
+            f"peak sustainable throughput ~{best['throughput_rps']:.1f} rps "
+            f"at concurrency {best['concurrency']}"
+        )
+
+
+if __name__ == "__main__":
+    main()